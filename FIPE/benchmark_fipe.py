@@ -0,0 +1,247 @@
+"""
+Benchmark das buscas e exportações contra a API FIPE simulada (fipe_mock_server)
+Cada cenário roda em um processo separado (pico de memória isolado) e reporta
+requisições/s, latência p50/p95/p99, tempo total e pico de memória (RSS).
+Com --base, compara com um resultado anterior e falha se houver regressão.
+
+Uso:
+    python benchmark_fipe.py --marcas 20 --latencia 0.005 --json atual.json
+    python benchmark_fipe.py --base atual.json --tolerancia 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from fipe_mock_server import MockFipeServer
+
+
+CENARIOS = ('todos_precos', 'simples', 'exportar')
+
+FORMATOS_EXPORTACAO = ('csv', 'excel', 'html', 'json', 'parquet')
+
+# Métricas em que valores maiores são piores (comparadas com --base)
+METRICAS_REGRESSAO = ('tempo_total', 'p95_ms', 'pico_rss_mb')
+
+
+def percentil(valores: Sequence[float], p: float) -> Optional[float]:
+    """Percentil p (0-100) por interpolação linear; None se não há valores"""
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+def pico_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo atual (MB)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def _cliente(url: str, latencias: List[float]):
+    """FipeClient apontando para o servidor simulado, registrando a latência de cada resposta"""
+    from fipe_client import FipeClient
+
+    client = FipeClient(base_url=url)
+    client.session.hooks['response'].append(
+        lambda response, *args, **kwargs: latencias.append(response.elapsed.total_seconds())
+    )
+    return client
+
+
+def _executar_cenario(cenario: str, url: str, diretorio: str) -> Dict[str, Any]:
+    """Executa um cenário (no processo filho) e retorna suas medições"""
+    from criar_tabela_carros import criar_tabela_simples, criar_tabela_todos_precos, exportar_tabela
+
+    latencias: List[float] = []
+    client = _cliente(url, latencias)
+    etapas: Dict[str, float] = {}
+    saida = io.StringIO()
+
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(saida):
+        if cenario == 'simples':
+            df = criar_tabela_simples(client, limite=10_000)
+        else:
+            df = criar_tabela_todos_precos(client)
+        etapas['busca'] = time.perf_counter() - inicio
+
+        if cenario == 'exportar':
+            for formato in FORMATOS_EXPORTACAO:
+                t0 = time.perf_counter()
+                exportar_tabela(df, formato=formato, arquivo=os.path.join(diretorio, f'benchmark_{formato}.csv'))
+                etapas[formato] = time.perf_counter() - t0
+    tempo_total = time.perf_counter() - inicio
+
+    return {
+        'cenario': cenario,
+        'linhas': len(df),
+        'requisicoes': len(latencias),
+        'requisicoes_por_segundo': len(latencias) / etapas['busca'] if etapas['busca'] else None,
+        'p50_ms': _ms(percentil(latencias, 50)),
+        'p95_ms': _ms(percentil(latencias, 95)),
+        'p99_ms': _ms(percentil(latencias, 99)),
+        'tempo_total': tempo_total,
+        'etapas': etapas,
+        'pico_rss_mb': pico_rss_mb(),
+    }
+
+
+def _ms(segundos: Optional[float]) -> Optional[float]:
+    return None if segundos is None else segundos * 1000
+
+
+def _processo_cenario(fila, cenario: str, url: str, diretorio: str) -> None:
+    try:
+        fila.put(_executar_cenario(cenario, url, diretorio))
+    except BaseException as e:
+        fila.put({'cenario': cenario, 'erro': f"{type(e).__name__}: {e}"})
+
+
+def executar_benchmark(
+    cenarios: Sequence[str] = CENARIOS,
+    marcas: int = 20,
+    modelos_por_marca: int = 10,
+    anos_por_modelo: int = 5,
+    latencia: float = 0.0,
+    taxa_erro: float = 0.0,
+    taxa_429: float = 0.0
+) -> List[Dict[str, Any]]:
+    """
+    Sobe o servidor simulado e executa os cenários, cada um em um processo novo
+
+    Args:
+        cenarios: Cenários a executar ('todos_precos', 'simples', 'exportar')
+        marcas, modelos_por_marca, anos_por_modelo: Tamanho do catálogo simulado
+        latencia: Atraso (segundos) de cada resposta do servidor
+        taxa_erro: Fração de respostas 500
+        taxa_429: Fração de respostas 429
+
+    Returns:
+        Lista com as medições de cada cenário
+    """
+    contexto = multiprocessing.get_context('spawn')
+    resultados = []
+
+    with MockFipeServer(
+        marcas=marcas,
+        modelos_por_marca=modelos_por_marca,
+        anos_por_modelo=anos_por_modelo,
+        latencia=latencia,
+        taxa_erro=taxa_erro,
+        taxa_429=taxa_429
+    ) as servidor, tempfile.TemporaryDirectory() as diretorio:
+        for cenario in cenarios:
+            fila = contexto.Queue()
+            processo = contexto.Process(target=_processo_cenario, args=(fila, cenario, servidor.url, diretorio))
+            processo.start()
+            resultado = fila.get()
+            processo.join()
+            resultados.append(resultado)
+
+    return resultados
+
+
+def comparar(resultados: List[Dict[str, Any]], base: List[Dict[str, Any]], tolerancia: float = 0.2) -> List[str]:
+    """
+    Compara com um resultado anterior
+
+    Returns:
+        Descrições das regressões (métrica pior que a base em mais que `tolerancia`)
+    """
+    anteriores = {r['cenario']: r for r in base}
+    regressoes = []
+    for resultado in resultados:
+        anterior = anteriores.get(resultado['cenario'])
+        if anterior is None or 'erro' in resultado or 'erro' in anterior:
+            continue
+        for metrica in METRICAS_REGRESSAO:
+            atual, antes = resultado.get(metrica), anterior.get(metrica)
+            if atual is None or not antes:
+                continue
+            if atual > antes * (1 + tolerancia):
+                regressoes.append(
+                    f"{resultado['cenario']}: {metrica} {antes:.2f} -> {atual:.2f} (+{(atual / antes - 1) * 100:.0f}%)"
+                )
+    return regressoes
+
+
+def imprimir_resultados(resultados: List[Dict[str, Any]]) -> None:
+    def fmt(valor, casas=1):
+        return '-' if valor is None else f"{valor:.{casas}f}"
+
+    print(f"{'Cenário':<14}{'Linhas':>8}{'Req':>8}{'Req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'Tempo s':>9}{'RSS MB':>9}")
+    for r in resultados:
+        if 'erro' in r:
+            print(f"{r['cenario']:<14}ERRO: {r['erro']}")
+            continue
+        print(
+            f"{r['cenario']:<14}{r['linhas']:>8}{r['requisicoes']:>8}{fmt(r['requisicoes_por_segundo']):>9}"
+            f"{fmt(r['p50_ms'], 2):>9}{fmt(r['p95_ms'], 2):>9}{fmt(r['p99_ms'], 2):>9}"
+            f"{fmt(r['tempo_total'], 2):>9}{fmt(r['pico_rss_mb']):>9}"
+        )
+        outras = {k: v for k, v in r['etapas'].items() if k != 'busca'}
+        if outras:
+            print("    " + ", ".join(f"{k}: {v:.2f}s" for k, v in outras.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das buscas FIPE contra a API simulada")
+    parser.add_argument('--cenarios', nargs='+', choices=CENARIOS, default=list(CENARIOS))
+    parser.add_argument('--marcas', type=int, default=20)
+    parser.add_argument('--modelos-por-marca', type=int, default=10)
+    parser.add_argument('--anos-por-modelo', type=int, default=5)
+    parser.add_argument('--latencia', type=float, default=0.0, help="segundos por resposta do servidor")
+    parser.add_argument('--taxa-erro', type=float, default=0.0)
+    parser.add_argument('--taxa-429', type=float, default=0.0)
+    parser.add_argument('--json', help="arquivo onde gravar os resultados")
+    parser.add_argument('--base', help="resultados anteriores (--json) para detectar regressões")
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="piora relativa aceita (padrão: 0.2)")
+    args = parser.parse_args()
+
+    resultados = executar_benchmark(
+        args.cenarios,
+        marcas=args.marcas,
+        modelos_por_marca=args.modelos_por_marca,
+        anos_por_modelo=args.anos_por_modelo,
+        latencia=args.latencia,
+        taxa_erro=args.taxa_erro,
+        taxa_429=args.taxa_429
+    )
+    imprimir_resultados(resultados)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+    falhou = any('erro' in r for r in resultados)
+    if args.base:
+        with open(args.base, encoding='utf-8') as f:
+            regressoes = comparar(resultados, json.load(f), args.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO: {regressao}")
+        falhou = falhou or bool(regressoes)
+
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,190 @@
 Script para criar tabela com dados de carros da API FIPE
 """
 
-from fipe_client import FipeClient, VehicleType
-import pandas as pd
-from typing import List, Optional
+from __future__ import annotations
 
+from fipe_client import FipeAPIError, FipeClient, VehicleType
+from fipe_cache import SQLiteCache
+from fipe_rate_limit import QuotaExceededError, RateLimiter
+from fipe_journal import CrawlJournal
+from fipe_resolver import FipeCodeResolver
+from fipe_records import PADRAO_PRECO, centavos, formatar_reais
+from fipe_sinks import CsvSink, HtmlSink, Sink, XlsxSink, gravar_em_sinks, registros_para_dataframe
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+import os
+import uuid
 
-def criar_tabela_marcas_modelos_anos(
+# pandas é importado apenas nas funções que montam DataFrames: quem só gera
+# linhas (iter_*) ou grava em sinks não paga o custo da importação
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class LinhaMarcaModeloAnos(NamedTuple):
+    """Linha da tabela de marcas, modelos e anos disponíveis"""
+    marca: str
+    modelo: str
+    codigo_marca: int
+    codigo_modelo: int
+    anos_disponiveis: str
+    codigos_anos: str
+    
+    COLUNAS = ('Marca', 'Modelo', 'Código Marca', 'Código Modelo', 'Anos Disponíveis', 'Códigos Anos')
+
+
+class LinhaPreco(NamedTuple):
+    """Linha da tabela de preços"""
+    marca: str
+    modelo: str
+    ano: Any
+    ano_descricao: str
+    combustivel: str
+    preco: str
+    codigo_fipe: str
+    referencia: str
+    tipo: str = VehicleType.CARS.value
+    
+    COLUNAS = ('Marca', 'Modelo', 'Ano', 'Ano Descrição', 'Combustível', 'Preço', 'Código FIPE', 'Referência', 'Tipo')
+    
+    @classmethod
+    def de_dict(cls, linha: Dict[str, Any]) -> "LinhaPreco":
+        """Cria o registro a partir de um dicionário com os nomes das colunas"""
+        return cls(**{
+            campo: linha[coluna]
+            for campo, coluna in zip(cls._fields, cls.COLUNAS)
+            if coluna in linha
+        })
+    
+    @classmethod
+    def de_detalhes(
+        cls,
+        details: Dict[str, Any],
+        brand_name: str = '',
+        model_name: str = '',
+        year_name: str = '',
+        vehicle_type: VehicleType = VehicleType.CARS
+    ) -> "LinhaPreco":
+        """Monta a linha a partir dos detalhes do veículo (get_vehicle_details)"""
+        return cls(
+            details.get('brand', brand_name),
+            details.get('model', model_name),
+            details.get('modelYear', ''),
+            year_name,
+            details.get('fuel', ''),
+            details.get('price', ''),
+            details.get('codeFipe', ''),
+            details.get('referenceMonth', ''),
+            vehicle_type.value,
+        )
+    
+    def como_dict(self) -> Dict[str, Any]:
+        """Retorna o registro como dicionário com os nomes das colunas"""
+        return dict(zip(self.COLUNAS, self))
+
+
+# Tipos das colunas de cada tabela (ver aplicar_schema)
+SCHEMA_MARCAS_MODELOS_ANOS = {
+    'Marca': 'category',
+    'Modelo': 'string',
+    'Código Marca': 'Int32',
+    'Código Modelo': 'Int32',
+    'Anos Disponíveis': 'string',
+    'Códigos Anos': 'string',
+}
+
+SCHEMA_SIMPLES = {
+    'Marca': 'category',
+    'Modelo': 'string',
+    'Código Marca': 'Int32',
+    'Código Modelo': 'Int32',
+}
+
+# Preço em centavos (Int64); textos repetidos como categorias; anos como inteiros anuláveis
+SCHEMA_PRECOS = {
+    'Marca': 'category',
+    'Modelo': 'category',
+    'Ano': 'Int16',
+    'Ano Descrição': 'category',
+    'Combustível': 'category',
+    'Preço': 'Int64',
+    'Código FIPE': 'category',
+    'Referência': 'category',
+    'Tipo': 'category',
+}
+
+
+def preco_em_centavos(precos: pd.Series) -> pd.Series:
+    """
+    Converte preços no formato da API ("R$ 10.000,00") em centavos (Int64), de forma vetorizada
+    
+    Valores fora do formato viram nulos. Séries já numéricas são devolvidas como Int64.
+    """
+    import pandas as pd
+    
+    if pd.api.types.is_numeric_dtype(precos):
+        return precos.astype('Int64')
+    
+    partes = precos.astype('string').str.extract(PADRAO_PRECO)
+    digitos = partes[0].str.replace('.', '', regex=False) + partes[1]
+    return pd.to_numeric(digitos, errors='coerce').astype('Int64')
+
+
+# Formata um preço em centavos no padrão da API, ex: 1000000 -> 'R$ 10.000,00'
+formatar_preco = formatar_reais
+
+
+def precos_para_exibicao(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Devolve o DataFrame com 'Preço' em centavos formatado como a API ("R$ 10.000,00")
+    
+    Usado na saída para csv, excel, html e json, que assim gravam o mesmo texto das
+    linhas em fluxo (LinhaPreco). Preços já em texto ou sem a coluna: df inalterado.
+    """
+    import pandas as pd
+    
+    if 'Preço' not in df.columns or not pd.api.types.is_numeric_dtype(df['Preço']):
+        return df
+    return df.assign(**{'Preço': df['Preço'].map(formatar_reais, na_action='ignore').fillna('')})
+
+
+def aplicar_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """
+    Converte as colunas do DataFrame para os tipos do schema, em uma passada vetorizada
+    
+    - 'Preço' em texto ("R$ 10.000,00") vira centavos (Int64)
+    - Colunas inteiras aceitam texto/valores vazios (viram nulos)
+    - Colunas ausentes no DataFrame são ignoradas
+    
+    Args:
+        df: DataFrame a converter
+        schema: Mapa coluna -> dtype pandas (ex: SCHEMA_PRECOS)
+        
+    Returns:
+        DataFrame com as colunas tipadas
+    """
+    import pandas as pd
+    
+    df = df.copy()
+    for coluna, dtype in schema.items():
+        if coluna not in df.columns:
+            continue
+        if coluna == 'Preço':
+            df[coluna] = preco_em_centavos(df[coluna])
+        elif dtype.startswith('Int'):
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype(dtype)
+        else:
+            df[coluna] = df[coluna].astype(dtype)
+    return df
+
+
+def iter_marcas_modelos_anos(
     client: FipeClient,
     limite_marcas: int = 5,
     limite_modelos_por_marca: int = 3,
     limite_anos_por_modelo: int = 2
-) -> pd.DataFrame:
+) -> Iterator[LinhaMarcaModeloAnos]:
     """
-    Cria uma tabela com marcas, modelos e anos disponíveis
+    Gera as linhas da tabela de marcas, modelos e anos à medida que são obtidas
     
     Args:
         client: Cliente FIPE
@@ -22,11 +193,9 @@ def criar_tabela_marcas_modelos_anos(
         limite_modelos_por_marca: Número máximo de modelos por marca
         limite_anos_por_modelo: Número máximo de anos por modelo
         
-    Returns:
-        DataFrame com marca, modelo e anos disponíveis
+    Yields:
+        LinhaMarcaModeloAnos para cada modelo
     """
-    dados = []
-    
     print("Buscando marcas, modelos e anos...")
     brands = client.get_brands(VehicleType.CARS)
     
@@ -48,36 +217,55 @@ def criar_tabela_marcas_modelos_anos(
                         brand_code,
                         model_code
                     )
-                    
-                    anos_disponiveis = [y['name'] for y in years[:limite_anos_por_modelo]]
-                    anos_codigos = [y['code'] for y in years[:limite_anos_por_modelo]]
-                    
-                    dados.append({
-                        'Marca': brand_name,
-                        'Modelo': model_name,
-                        'Código Marca': brand_code,
-                        'Código Modelo': model_code,
-                        'Anos Disponíveis': ', '.join(anos_disponiveis),
-                        'Códigos Anos': ', '.join(anos_codigos)
-                    })
-                    
                 except Exception as e:
                     print(f"  Erro ao buscar anos do modelo {model_name}: {e}")
-                    dados.append({
-                        'Marca': brand_name,
-                        'Modelo': model_name,
-                        'Código Marca': brand_code,
-                        'Código Modelo': model_code,
-                        'Anos Disponíveis': 'Erro ao buscar',
-                        'Códigos Anos': ''
-                    })
+                    yield LinhaMarcaModeloAnos(
+                        brand_name, model_name, brand_code, model_code, 'Erro ao buscar', ''
+                    )
                     continue
+                
+                anos_disponiveis = [y['name'] for y in years[:limite_anos_por_modelo]]
+                anos_codigos = [y['code'] for y in years[:limite_anos_por_modelo]]
+                
+                yield LinhaMarcaModeloAnos(
+                    brand_name,
+                    model_name,
+                    brand_code,
+                    model_code,
+                    ', '.join(anos_disponiveis),
+                    ', '.join(anos_codigos)
+                )
                     
         except Exception as e:
             print(f"Erro ao processar marca {brand_name}: {e}")
             continue
+
+
+def criar_tabela_marcas_modelos_anos(
+    client: FipeClient,
+    limite_marcas: int = 5,
+    limite_modelos_por_marca: int = 3,
+    limite_anos_por_modelo: int = 2
+) -> pd.DataFrame:
+    """
+    Cria uma tabela com marcas, modelos e anos disponíveis
     
-    return pd.DataFrame(dados)
+    Args:
+        client: Cliente FIPE
+        limite_marcas: Número máximo de marcas a processar
+        limite_modelos_por_marca: Número máximo de modelos por marca
+        limite_anos_por_modelo: Número máximo de anos por modelo
+        
+    Returns:
+        DataFrame com marca, modelo e anos disponíveis
+    """
+    linhas = list(iter_marcas_modelos_anos(
+        client, limite_marcas, limite_modelos_por_marca, limite_anos_por_modelo
+    ))
+    return aplicar_schema(
+        registros_para_dataframe(linhas, LinhaMarcaModeloAnos.COLUNAS),
+        SCHEMA_MARCAS_MODELOS_ANOS
+    )
 
 
 def criar_tabela_simples(client: FipeClient, limite: int = 20) -> pd.DataFrame:
@@ -122,176 +310,370 @@ def criar_tabela_simples(client: FipeClient, limite: int = 20) -> pd.DataFrame:
         if len(dados) >= limite:
             break
     
-    return pd.DataFrame(dados)
+    return aplicar_schema(registros_para_dataframe(dados, list(SCHEMA_SIMPLES)), SCHEMA_SIMPLES)
 
 
-def criar_tabela_todos_precos(
+# Nomes dos tipos de veículo nas mensagens de progresso
+_NOMES_TIPOS = {
+    VehicleType.CARS: 'carros',
+    VehicleType.MOTORCYCLES: 'motos',
+    VehicleType.TRUCKS: 'caminhões',
+}
+
+
+class EstadoBusca:
+    """
+    Como terminou uma execução de iter_todos_precos (preenchido ao fim da geração)
+    
+    completa só é True se todas as marcas selecionadas foram percorridas sem
+    falhas; senão, motivo é 'max_requisicoes', 'falhas', 'interrompida' ou 'cota'.
+    """
+    
+    def __init__(self):
+        self.completa = False
+        self.motivo: Optional[str] = None
+
+
+def marcas_do_shard(brands: List[Dict[str, Any]], indice: int, total: int) -> List[Dict[str, Any]]:
+    """
+    Seleciona as marcas de um shard
+    
+    A divisão usa o código da marca (código % total == indice), e não a posição na
+    lista: processos ou máquinas diferentes chegam à mesma partição mesmo que
+    recebam a lista de marcas em outra ordem.
+    
+    Args:
+        brands: Lista de marcas (get_brands)
+        indice: Shard desejado (0 <= indice < total)
+        total: Número de shards
+    """
+    if not 0 <= indice < total:
+        raise ValueError(f"Shard inválido: {indice}/{total} (use 0 <= i < N)")
+    return [brand for brand in brands if int(brand['code']) % total == indice]
+
+
+def iter_todos_precos(
     client: FipeClient,
     limite_marcas: Optional[int] = None,
     limite_modelos_por_marca: Optional[int] = None,
     limite_anos_por_modelo: Optional[int] = None,
-    max_requisicoes: Optional[int] = None
-) -> pd.DataFrame:
+    max_requisicoes: Optional[int] = None,
+    reference: Optional[int] = None,
+    journal: Optional[str] = None,
+    resolver: Optional[FipeCodeResolver] = None,
+    vehicle_type: VehicleType = VehicleType.CARS,
+    shard: Optional[Tuple[int, int]] = None,
+    estado: Optional[EstadoBusca] = None
+) -> Iterator[LinhaPreco]:
     """
-    Cria tabela com preços de carros buscando através de marcas, modelos e anos
+    Gera as linhas da tabela de preços à medida que são obtidas (marcas -> modelos -> anos)
+    
+    Com journal, as linhas já gravadas em execuções anteriores são geradas primeiro.
+    
+    Os anos de cada modelo vêm de get_years_by_model, então não há consulta a
+    get_models_by_brand_and_year para confirmar que o modelo existe no ano: nem
+    com um índice por (marca, ano), que faria uma requisição por ano distinto da
+    marca sem evitar nenhuma (o custo é uma requisição por modelo e uma por preço).
     
     Args:
         client: Cliente FIPE
         limite_marcas: Número máximo de marcas a processar (None = sem limite)
         limite_modelos_por_marca: Número máximo de modelos por marca (None = sem limite)
         limite_anos_por_modelo: Número máximo de anos por modelo (None = sem limite)
-        max_requisicoes: Limite máximo de requisições (None = sem limite, use com cuidado!)
+        max_requisicoes: Limite máximo de requisições desta busca (None = sem limite próprio;
+            o ritmo e a cota diária são controlados pelo rate_limiter do cliente)
+        reference: Código de referência (None = mais recente). Com referência fixa,
+            as respostas podem ser guardadas no cache do cliente sem expiração
+        journal: Arquivo de journal (.jsonl) para retomar a busca. Cada (marca, modelo, ano)
+            concluído é gravado imediatamente; ao executar de novo com o mesmo arquivo,
+            as unidades já obtidas são puladas sem nenhuma requisição
+        resolver: Tabela modelo -> código FIPE (padrão: tabela em memória). Com uma tabela
+            persistente, os códigos descobertos são reaproveitados entre buscas
+        vehicle_type: Tipo de veículo (carros, motos ou caminhões)
+        shard: (i, N) para processar apenas a parte i (0 <= i < N) das marcas, ver
+            marcas_do_shard; use um journal diferente para cada shard
+        estado: Recebe, ao fim da geração, se a busca terminou (EstadoBusca). Sem
+            ele, uma busca parada pelo limite de requisições ou por falhas é
+            indistinguível de uma busca completa
         
-    Returns:
-        DataFrame com dados dos carros e preços
+    Yields:
+        LinhaPreco para cada veículo com preço
+        
+    Raises:
+        QuotaExceededError: Se a cota diária acabar (rate_limiter sem esperar_janela).
+            O progresso fica no journal; execute novamente após a liberação da cota
+        KeyboardInterrupt: Repassado após gravar e fechar o journal
     """
-    dados = []
+    registro = CrawlJournal(journal, reference, vehicle_type.value) if journal else None
+    total_veiculos = 0
+    
+    if registro and registro.total_linhas:
+        print(f"Retomando busca do journal {journal}: {registro.total_linhas} veículos já obtidos")
+        # Relidas do arquivo: o journal não guarda as linhas em memória
+        for linha in registro.iter_linhas():
+            total_veiculos += 1
+            yield LinhaPreco.de_dict(linha)
     
+    nome_tipo = _NOMES_TIPOS[vehicle_type]
     if limite_marcas is None:
-        print("Buscando preços de TODOS os carros (SEM LIMITE)...")
+        print(f"Buscando preços de TODOS os {nome_tipo} (SEM LIMITE)...")
     else:
-        print(f"Buscando preços de carros (limite: {limite_marcas} marcas)...")
-    
-    brands = client.get_brands(VehicleType.CARS)
-    total_brands = len(brands) if limite_marcas is None else min(limite_marcas, len(brands))
+        print(f"Buscando preços de {nome_tipo} (limite: {limite_marcas} marcas)...")
     
     total_requisicoes = 0
+    limite_atingido = False
+    falhas = False
     if max_requisicoes is None:
-        # Se não há limite de requisições, usar um número muito alto como segurança
-        max_requisicoes = 999999
+        # Sem limite próprio: a cota da API é respeitada pelo rate_limiter do cliente
+        max_requisicoes = float('inf')
     
-    brands_to_process = brands if limite_marcas is None else brands[:limite_marcas]
+    if resolver is None:
+        resolver = FipeCodeResolver(client)
     
-    for idx, brand in enumerate(brands_to_process, 1):
-        if total_requisicoes >= max_requisicoes:
-            print(f"\nLimite de requisições atingido ({max_requisicoes})")
-            break
-            
-        brand_code = int(brand['code'])
-        brand_name = brand['name']
+    try:
+        brands = client.get_brands(vehicle_type, reference=reference)
         total_requisicoes += 1
         
-        try:
-            print(f"\n[{idx}/{total_brands}] Processando {brand_name}...")
-            models = client.get_models(VehicleType.CARS, brand_code)
-            total_requisicoes += 1
+        brands_to_process = brands if limite_marcas is None else brands[:limite_marcas]
+        if shard is not None:
+            brands_to_process = marcas_do_shard(brands_to_process, *shard)
+        total_brands = len(brands_to_process)
+        
+        for idx, brand in enumerate(brands_to_process, 1):
+            if total_requisicoes >= max_requisicoes:
+                print(f"\nLimite de requisições atingido ({max_requisicoes})")
+                limite_atingido = True
+                break
+            
+            brand_code = int(brand['code'])
+            brand_name = brand['name']
+            chave_marca = CrawlJournal.chave(brand_code)
+            
+            if registro and registro.concluido('marca', chave_marca):
+                continue
+            
+            try:
+                print(f"\n[{idx}/{total_brands}] Processando {brand_name}...")
+                models = client.get_models(vehicle_type, brand_code, reference=reference)
+                total_requisicoes += 1
+            except QuotaExceededError:
+                raise
+            except Exception as e:
+                print(f"Erro ao processar marca {brand_name}: {e}")
+                falhas = True
+                continue
             
             models_to_process = models if limite_modelos_por_marca is None else models[:limite_modelos_por_marca]
+            # A marca só é marcada no journal se todos os modelos forem concluídos;
+            # modelos com falhas são repetidos ao retomar a busca. Uma marca cortada
+            # pelo limite de modelos também não é marcada: retomada sem o limite,
+            # os modelos restantes ainda precisam ser buscados
+            marca_completa = True
+            marca_cortada = len(models_to_process) < len(models)
             
-            for model_idx, model in enumerate(models_to_process, 1):
+            for model in models_to_process:
                 if total_requisicoes >= max_requisicoes:
+                    limite_atingido = True
                     break
-                    
+                
                 model_code = int(model['code'])
                 model_name = model['name']
+                chave_modelo = CrawlJournal.chave(brand_code, model_code)
+                
+                if registro and registro.concluido('modelo', chave_modelo):
+                    continue
                 
                 try:
                     years = client.get_years_by_model(
-                        VehicleType.CARS,
+                        vehicle_type,
                         brand_code,
-                        model_code
+                        model_code,
+                        reference=reference
                     )
                     total_requisicoes += 1
-                    
-                    years_to_process = years if limite_anos_por_modelo is None else years[:limite_anos_por_modelo]
-                    
-                    for year in years_to_process:
-                        if total_requisicoes >= max_requisicoes:
-                            break
-                            
-                        year_code = year['code']
-                        year_name = year['name']
-                        
-                        # Tentar obter modelos por marca e ano para descobrir código FIPE
-                        try:
-                            models_by_year = client.get_models_by_brand_and_year(
-                                VehicleType.CARS,
-                                brand_code,
-                                year_code
-                            )
-                            total_requisicoes += 1
-                            
-                            # Procurar nosso modelo na lista
-                            for model_by_year in models_by_year:
-                                if model_by_year.get('code') == model_code:
-                                    # Tentar obter código FIPE do modelo
-                                    # Estratégia: tentar usar o código do modelo formatado como FIPE
-                                    # Código FIPE geralmente tem formato: "004278-1"
-                                    fipe_code_candidate = f"{model_code:06d}-1"
-                                    
-                                    try:
-                                        details = client.get_vehicle_details(
-                                            VehicleType.CARS,
-                                            fipe_code=fipe_code_candidate,
-                                            year_id=year_code
-                                        )
-                                        total_requisicoes += 1
-                                        
-                                        dados.append({
-                                            'Marca': details.get('brand', brand_name),
-                                            'Modelo': details.get('model', model_name),
-                                            'Ano': details.get('modelYear', ''),
-                                            'Ano Descrição': year_name,
-                                            'Combustível': details.get('fuel', ''),
-                                            'Preço': details.get('price', ''),
-                                            'Código FIPE': details.get('codeFipe', ''),
-                                            'Referência': details.get('referenceMonth', ''),
-                                        })
-                                        print(f"  ✓ [{len(dados)}] {model_name} {year_name}: {details.get('price', 'N/A')}")
-                                        break  # Sair do loop de models_by_year
-                                        
-                                    except Exception:
-                                        # Se falhar, tentar outras variações do código FIPE
-                                        for suffix in ['-2', '-3', '']:
-                                            try:
-                                                fipe_code_variant = f"{model_code:06d}{suffix}"
-                                                details = client.get_vehicle_details(
-                                                    VehicleType.CARS,
-                                                    fipe_code=fipe_code_variant,
-                                                    year_id=year_code
-                                                )
-                                                total_requisicoes += 1
-                                                
-                                                dados.append({
-                                                    'Marca': details.get('brand', brand_name),
-                                                    'Modelo': details.get('model', model_name),
-                                                    'Ano': details.get('modelYear', ''),
-                                                    'Ano Descrição': year_name,
-                                                    'Combustível': details.get('fuel', ''),
-                                                    'Preço': details.get('price', ''),
-                                                    'Código FIPE': details.get('codeFipe', ''),
-                                                    'Referência': details.get('referenceMonth', ''),
-                                                })
-                                                print(f"  ✓ [{len(dados)}] {model_name} {year_name}: {details.get('price', 'N/A')}")
-                                                break
-                                            except Exception:
-                                                continue
-                                        break
-                                        
-                        except Exception as e:
-                            # Se não conseguir buscar modelos por ano, pular
-                            continue
-                        
-                        if total_requisicoes >= max_requisicoes:
-                            break
-                            
+                except QuotaExceededError:
+                    raise
                 except Exception as e:
                     print(f"  Erro ao buscar anos do modelo {model_name}: {e}")
+                    marca_completa = False
                     continue
                 
-                if total_requisicoes >= max_requisicoes:
-                    break
+                years_to_process = years if limite_anos_por_modelo is None else years[:limite_anos_por_modelo]
+                # Idem para o limite de anos: o modelo cortado não é marcado
+                modelo_completo = True
+                modelo_cortado = len(years_to_process) < len(years)
+                
+                for year in years_to_process:
+                    if total_requisicoes >= max_requisicoes:
+                        limite_atingido = True
+                        break
                     
-        except Exception as e:
-            print(f"Erro ao processar marca {brand_name}: {e}")
-            continue
+                    year_code = year['code']
+                    year_name = year['name']
+                    chave_unidade = CrawlJournal.chave(brand_code, model_code, year_code)
+                    
+                    if registro and registro.concluido('unidade', chave_unidade):
+                        continue
+                    
+                    # O resolver usa o código FIPE conhecido do modelo ou o descobre
+                    # na própria resposta: uma requisição por preço (duas se o código
+                    # gravado estiver desatualizado, ambas contadas no limite)
+                    requisicoes_antes = resolver.requisicoes
+                    try:
+                        details = resolver.get_vehicle_details(
+                            vehicle_type,
+                            brand_code,
+                            model_code,
+                            year_code,
+                            reference=reference
+                        )
+                    except QuotaExceededError:
+                        raise
+                    except Exception as e:
+                        total_requisicoes += resolver.requisicoes - requisicoes_antes
+                        if isinstance(e, FipeAPIError) and e.status == 404:
+                            # Veículo inexistente na referência: concluído, sem linha
+                            if registro:
+                                registro.registrar_unidade(chave_unidade, None)
+                            continue
+                        print(f"  Erro ao buscar preço de {model_name} {year_name}: {e}")
+                        modelo_completo = False
+                        continue
+                    
+                    total_requisicoes += resolver.requisicoes - requisicoes_antes
+                    linha = LinhaPreco.de_detalhes(details, brand_name, model_name, year_name, vehicle_type)
+                    total_veiculos += 1
+                    if registro:
+                        registro.registrar_unidade(chave_unidade, linha.como_dict())
+                    print(f"  ✓ [{total_veiculos}] {model_name} {year_name}: {details.get('price', 'N/A')}")
+                    yield linha
+                else:
+                    # Todos os anos do modelo foram processados: marcado apenas se
+                    # nenhum falhou, para que as falhas sejam repetidas ao retomar
+                    if not modelo_completo:
+                        marca_completa = False
+                    elif modelo_cortado:
+                        marca_cortada = True
+                    elif registro:
+                        registro.marcar('modelo', chave_modelo)
+                    continue
+                break
+            else:
+                if not marca_completa:
+                    falhas = True
+                elif registro and not marca_cortada:
+                    registro.marcar('marca', chave_marca)
+                continue
+            break
+        
+        if estado is not None:
+            if limite_atingido:
+                estado.motivo = 'max_requisicoes'
+            elif falhas:
+                estado.motivo = 'falhas'
+            else:
+                estado.completa = True
+    
+    except QuotaExceededError as e:
+        # Cota esgotada: o restante deve ser processado na próxima janela
+        print(f"\n{e}")
+        print("Busca interrompida. Execute novamente após a liberação da cota.")
+        if estado is not None:
+            estado.motivo = 'cota'
+        raise
+    except KeyboardInterrupt:
+        if estado is not None:
+            estado.motivo = 'interrompida'
+        if registro:
+            registro.close()
+            print(f"\nBusca interrompida. Progresso salvo em {journal}")
+        raise
+    finally:
+        if registro:
+            registro.close()
     
     print(f"\n{'='*70}")
     print(f"Total de requisições realizadas: {total_requisicoes}")
-    print(f"Total de veículos com preços encontrados: {len(dados)}")
+    print(f"Total de veículos com preços encontrados: {total_veiculos}")
     print(f"{'='*70}")
+
+
+def criar_tabela_todos_precos(
+    client: FipeClient,
+    limite_marcas: Optional[int] = None,
+    limite_modelos_por_marca: Optional[int] = None,
+    limite_anos_por_modelo: Optional[int] = None,
+    max_requisicoes: Optional[int] = None,
+    reference: Optional[int] = None,
+    journal: Optional[str] = None,
+    resolver: Optional[FipeCodeResolver] = None,
+    vehicle_type: VehicleType = VehicleType.CARS,
+    shard: Optional[Tuple[int, int]] = None
+) -> pd.DataFrame:
+    """
+    Cria tabela com preços de veículos buscando através de marcas, modelos e anos
     
-    return pd.DataFrame(dados)
+    Os argumentos são os mesmos de iter_todos_precos; para buscas grandes, prefira
+    consumir iter_todos_precos com um sink (fipe_sinks) em vez de montar a tabela.
+        
+    Returns:
+        DataFrame com dados dos veículos e preços, tipado conforme SCHEMA_PRECOS
+        ('Preço' em centavos)
+        
+    Raises:
+        QuotaExceededError: Se a cota diária acabar antes do fim da busca; nenhuma
+            tabela parcial é devolvida (com journal, o progresso é retomado na
+            próxima execução)
+    """
+    linhas = list(iter_todos_precos(
+        client,
+        limite_marcas=limite_marcas,
+        limite_modelos_por_marca=limite_modelos_por_marca,
+        limite_anos_por_modelo=limite_anos_por_modelo,
+        max_requisicoes=max_requisicoes,
+        reference=reference,
+        journal=journal,
+        resolver=resolver,
+        vehicle_type=vehicle_type,
+        shard=shard
+    ))
+    return aplicar_schema(registros_para_dataframe(linhas, LinhaPreco.COLUNAS), SCHEMA_PRECOS)
+
+
+def iter_precos_por_fipe(
+    client: FipeClient,
+    fipe_codes: List[str],
+    year_ids: List[str],
+    vehicle_type: VehicleType = VehicleType.CARS,
+    max_workers: int = 8
+) -> Iterator[LinhaPreco]:
+    """
+    Gera as linhas de preço para códigos FIPE conhecidos, na ordem dos códigos
+    
+    As consultas são feitas em paralelo (FipeClient.iter_vehicle_details_many);
+    códigos com erro são informados e pulados.
+    
+    Args:
+        client: Cliente FIPE
+        fipe_codes: Lista de códigos FIPE
+        year_ids: Lista de IDs de anos (mesma ordem dos códigos FIPE)
+        vehicle_type: Tipo de veículo
+        max_workers: Consultas simultâneas
+        
+    Yields:
+        LinhaPreco para cada veículo encontrado
+    """
+    resultados = client.iter_vehicle_details_many(
+        zip(fipe_codes, year_ids),
+        vehicle_type=vehicle_type,
+        max_workers=max_workers
+    )
+    for resultado in resultados:
+        if not resultado.ok:
+            print(f"Erro ao buscar código FIPE {resultado.fipe_code}: {resultado.error}")
+            continue
+        
+        yield LinhaPreco.de_detalhes(resultado.details, vehicle_type=vehicle_type)
 
 
 def criar_tabela_com_precos_por_fipe(
@@ -310,31 +692,147 @@ def criar_tabela_com_precos_por_fipe(
     Returns:
         DataFrame com dados dos veículos
     """
-    dados = []
+    linhas = list(iter_precos_por_fipe(client, fipe_codes, year_ids))
+    df = registros_para_dataframe(linhas, LinhaPreco.COLUNAS)
+    # Sem a descrição do ano: apenas os IDs de ano são conhecidos nesta consulta
+    return aplicar_schema(df.drop(columns=['Ano Descrição']), SCHEMA_PRECOS)
+
+
+# Colunas usadas para particionar o dataset Parquet (Tipo=cars/Referência=.../Marca=...)
+PARTICOES_PARQUET = ('Tipo', 'Referência', 'Marca')
+
+
+def _schema_parquet(particoes: Sequence[str]):
+    """Schema tipado da tabela de preços no dataset Parquet"""
+    import pyarrow as pa
     
-    for fipe_code, year_id in zip(fipe_codes, year_ids):
-        try:
-            details = client.get_vehicle_details(
-                VehicleType.CARS,
-                fipe_code=fipe_code,
-                year_id=year_id
-            )
-            
-            dados.append({
-                'Marca': details.get('brand', ''),
-                'Modelo': details.get('model', ''),
-                'Ano': details.get('modelYear', ''),
-                'Combustível': details.get('fuel', ''),
-                'Preço': details.get('price', ''),
-                'Código FIPE': details.get('codeFipe', ''),
-                'Referência': details.get('referenceMonth', ''),
-            })
-            
-        except Exception as e:
-            print(f"Erro ao buscar código FIPE {fipe_code}: {e}")
-            continue
+    tipos = {
+        'Marca': pa.string(),
+        'Modelo': pa.string(),
+        'Ano': pa.int16(),
+        'Ano Descrição': pa.string(),
+        'Combustível': pa.string(),
+        'Preço': pa.int64(),  # centavos
+        'Código FIPE': pa.string(),
+        'Referência': pa.string(),
+        'Tipo': pa.string(),
+    }
+    colunas = [c for c in LinhaPreco.COLUNAS if c not in particoes] + list(particoes)
+    return pa.schema([(c, tipos[c]) for c in colunas])
+
+
+def _tabela_arrow(df: pd.DataFrame, schema, particoes: Sequence[str]):
+    """Converte um pedaço da tabela de preços em uma tabela Arrow tipada"""
+    import pandas as pd
+    import pyarrow as pa
+    
+    df = df.copy()
+    for coluna in schema.names:
+        if coluna not in df.columns:
+            df[coluna] = None
+    
+    df['Ano'] = pd.to_numeric(df['Ano'], errors='coerce').astype('Int16')
+    df['Preço'] = preco_em_centavos(df['Preço'])
+    for coluna in particoes:
+        # Partições não podem ser nulas
+        df[coluna] = df[coluna].astype('string').fillna('N/A').replace('', 'N/A')
+    
+    return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+
+def exportar_parquet(
+    dados: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    diretorio: str,
+    particoes: Sequence[str] = PARTICOES_PARQUET,
+    linhas_por_grupo: int = 100_000,
+    compressao: str = 'zstd'
+) -> None:
+    """
+    Exporta a tabela de preços como dataset Parquet particionado (requer pyarrow)
     
-    return pd.DataFrame(dados)
+    O dataset é gravado em pedaços, com colunas tipadas (Ano int16, Preço em centavos
+    int64), compressão e row groups de tamanho limitado. Cada partição fica em
+    diretorio/Tipo=.../Referência=.../Marca=..., para que consultas leiam apenas
+    as partições necessárias.
+    
+    Args:
+        dados: DataFrame ou iterável de DataFrames (ex: iter_dataframes(iter_todos_precos(...)))
+        diretorio: Diretório raiz do dataset
+        particoes: Colunas de particionamento
+        linhas_por_grupo: Número máximo de linhas por row group
+        compressao: Codec de compressão ('zstd', 'snappy', 'gzip', ...)
+    """
+    import pandas as pd
+    import pyarrow.dataset as ds
+    
+    if isinstance(dados, pd.DataFrame):
+        dados = [dados]
+    
+    schema = _schema_parquet(particoes)
+    
+    def lotes():
+        for chunk in dados:
+            if not chunk.empty:
+                yield from _tabela_arrow(chunk, schema, particoes).to_batches()
+    
+    ds.write_dataset(
+        lotes(),
+        diretorio,
+        schema=schema,
+        format='parquet',
+        partitioning=ds.partitioning(schema.empty_table().select(list(particoes)).schema, flavor='hive'),
+        file_options=ds.ParquetFileFormat().make_write_options(compression=compressao),
+        max_rows_per_group=linhas_por_grupo,
+        min_rows_per_group=min(linhas_por_grupo, 10_000),
+        # Nome único por exportação: novas gravações não sobrescrevem partes anteriores
+        basename_template=f"parte-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore'
+    )
+
+
+# Formatos gravados em fluxo, em uma única passada pelos registros (ver sinks_para_formatos)
+FORMATOS_EM_FLUXO = {'csv': '.csv', 'excel': '.xlsx', 'html': '.html'}
+
+
+def sinks_para_formatos(
+    formatos: Sequence[str],
+    arquivo: str = 'carros_fipe.csv',
+    colunas: Optional[Sequence[str]] = None,
+    linhas_por_pagina: Optional[int] = None
+) -> List[Sink]:
+    """
+    Cria um destino (fipe_sinks) por formato, para gravar todos em uma única passada
+    
+    Ao contrário de chamar exportar_tabela uma vez por formato, os registros são
+    percorridos uma só vez e nenhum formato monta o arquivo inteiro em memória
+    (XLSX em modo write-only, dividido em abas no limite de linhas do Excel; HTML
+    gravado em pedaços, opcionalmente paginado):
+    
+        gravar_em_sinks(iter_todos_precos(client), *sinks_para_formatos(['csv', 'excel', 'html']))
+    
+    Args:
+        formatos: 'csv', 'excel' e/ou 'html'
+        arquivo: Nome base; a extensão é trocada pela de cada formato
+        colunas: Cabeçalho (padrão: colunas do primeiro registro; obrigatório
+            para registros que são tuplas simples)
+        linhas_por_pagina: Linhas por página do HTML (None = uma única página)
+        
+    Returns:
+        Lista de destinos, na ordem dos formatos
+    """
+    base = os.path.splitext(arquivo)[0]
+    sinks: List[Sink] = []
+    for formato in formatos:
+        if formato not in FORMATOS_EM_FLUXO:
+            raise ValueError(f"Formato {formato} não suportado em fluxo. Use: {', '.join(FORMATOS_EM_FLUXO)}")
+        caminho = base + FORMATOS_EM_FLUXO[formato]
+        if formato == 'csv':
+            sinks.append(CsvSink(caminho, colunas))
+        elif formato == 'excel':
+            sinks.append(XlsxSink(caminho, colunas))
+        else:
+            sinks.append(HtmlSink(caminho, colunas, linhas_por_pagina=linhas_por_pagina))
+    return sinks
 
 
 def exportar_tabela(df: pd.DataFrame, formato: str = 'csv', arquivo: str = 'carros_fipe.csv'):
@@ -343,37 +841,88 @@ def exportar_tabela(df: pd.DataFrame, formato: str = 'csv', arquivo: str = 'carr
     
     Args:
         df: DataFrame a exportar
-        formato: 'csv', 'excel', 'html', ou 'json'
+        formato: 'csv', 'excel', 'html', 'json' ou 'parquet' (dataset particionado
+            por Tipo/Referência/Marca, gravado em um diretório). O parquet mantém
+            'Preço' em centavos; os demais gravam "R$ 10.000,00"
         arquivo: Nome do arquivo de saída
     """
+    if formato.lower() != 'parquet':
+        df = precos_para_exibicao(df)
+    
     if formato.lower() == 'csv':
         df.to_csv(arquivo, index=False, encoding='utf-8-sig')
         print(f"Tabela exportada para {arquivo}")
         
-    elif formato.lower() == 'excel':
-        arquivo = arquivo.replace('.csv', '.xlsx')
-        df.to_excel(arquivo, index=False, engine='openpyxl')
-        print(f"Tabela exportada para {arquivo}")
-        
-    elif formato.lower() == 'html':
-        arquivo = arquivo.replace('.csv', '.html')
-        df.to_html(arquivo, index=False, classes='table table-striped', table_id='tabela-carros')
-        print(f"Tabela exportada para {arquivo}")
+    elif formato.lower() in ('excel', 'html'):
+        # Gravados em fluxo (memória constante), em vez de df.to_excel/df.to_html
+        sink, = sinks_para_formatos([formato.lower()], arquivo, list(df.columns))
+        gravar_em_sinks(df.itertuples(index=False, name=None), sink)
+        print(f"Tabela exportada para {sink.arquivo}")
         
     elif formato.lower() == 'json':
         arquivo = arquivo.replace('.csv', '.json')
         df.to_json(arquivo, orient='records', indent=2, force_ascii=False)
         print(f"Tabela exportada para {arquivo}")
         
+    elif formato.lower() == 'parquet':
+        diretorio = arquivo.replace('.csv', '_parquet')
+        exportar_parquet(df, diretorio)
+        print(f"Tabela exportada para {diretorio}/")
+        
     else:
-        print(f"Formato {formato} não suportado. Use: csv, excel, html ou json")
+        print(f"Formato {formato} não suportado. Use: csv, excel, html, json ou parquet")
+
+
+class _ResumoPrecos(Sink):
+    """Estatísticas da tabela de preços acumuladas durante a gravação (para main)"""
+    
+    def __init__(self, n_primeiras: int = 10):
+        self.n_primeiras = n_primeiras
+        self.total = 0
+        self.primeiras: List[LinhaPreco] = []
+        self.marcas = set()
+        self.modelos = set()
+        self._soma_centavos = 0
+        self._com_preco = 0
+    
+    def write(self, linha: LinhaPreco) -> None:
+        self.total += 1
+        if len(self.primeiras) < self.n_primeiras:
+            self.primeiras.append(linha)
+        self.marcas.add(linha.marca)
+        self.modelos.add(linha.modelo)
+        preco = centavos(linha.preco)
+        if preco is not None:
+            self._soma_centavos += preco
+            self._com_preco += 1
+    
+    def preco_medio(self) -> Optional[int]:
+        """Preço médio em centavos (None sem preços)"""
+        if not self._com_preco:
+            return None
+        return round(self._soma_centavos / self._com_preco)
+
+
+# Mensagem final de main() para cada EstadoBusca.motivo
+_MOTIVOS_INCOMPLETA = {
+    'cota': "a cota acabou antes do fim da busca",
+    'falhas': "algumas marcas, modelos ou anos falharam",
+    'interrompida': "a busca foi interrompida",
+    'max_requisicoes': "o limite de requisições foi atingido",
+    None: "a busca não terminou",
+}
 
 
 def main():
     """Função principal - Cria tabela com preços de TODOS os carros (SEM LIMITE)"""
     
-    # Criar cliente
-    client = FipeClient()
+    # Criar cliente com cache persistente: meses já consultados não geram novas requisições.
+    # O rate_limiter respeita a cota diária (compartilhada entre processos) e, ao esgotá-la,
+    # aguarda a próxima janela em vez de receber erros 429 da API
+    client = FipeClient(
+        cache=SQLiteCache('fipe_cache.sqlite'),
+        rate_limiter=RateLimiter.para_token(None, esperar_janela=True)
+    )
     
     print("=" * 70)
     print("CRIANDO TABELA COM PREÇOS DE TODOS OS CARROS - API FIPE")
@@ -383,50 +932,80 @@ def main():
     print("AVISO: Esta busca processará TODAS as marcas, modelos e anos disponíveis.")
     print("Isso pode levar muito tempo e consumir muitas requisições da API.")
     print("Limite da API: 500 requisições/dia (sem token) ou 1000/dia (com token)")
+    print("Ao esgotar a cota, a busca aguarda a próxima janela de 24h automaticamente.")
+    print()
+    
+    # Fixar a referência mais recente para que o cache nunca expire as respostas deste mês
+    referencia = int(client.get_references()[0]['code'])
+    print(f"Referência utilizada: {referencia}")
     print()
     
-    # Criar tabela com preços - SEM LIMITES
-    df_precos = criar_tabela_todos_precos(
+    # Buscar e gravar CSV, Excel e HTML em uma única passada, com memória constante:
+    # cada linha vai para os arquivos assim que é obtida, sem montar a tabela inteira
+    resumo = _ResumoPrecos()
+    estado = EstadoBusca()
+    sinks = sinks_para_formatos(
+        ['csv', 'excel', 'html'],
+        'todos_carros_precos.csv',
+        LinhaPreco.COLUNAS,
+        linhas_por_pagina=50_000  # HTML paginado: navegadores não abrem uma página com todo o catálogo
+    )
+    linhas = iter_todos_precos(
         client,
         limite_marcas=None,  # None = sem limite (todas as marcas)
         limite_modelos_por_marca=None,  # None = sem limite (todos os modelos)
         limite_anos_por_modelo=None,  # None = sem limite (todos os anos)
-        max_requisicoes=None  # None = sem limite de requisições (use com cuidado!)
+        max_requisicoes=None,  # None = sem limite de requisições (use com cuidado!)
+        reference=referencia,
+        journal=f'todos_carros_precos_{referencia}.journal.jsonl',  # permite retomar a busca
+        resolver=FipeCodeResolver(client, 'fipe_codigos.sqlite'),  # códigos FIPE entre execuções
+        estado=estado  # completa só se a busca percorreu todo o catálogo
     )
+    try:
+        gravar_em_sinks(linhas, resumo, *sinks)
+    except (QuotaExceededError, KeyboardInterrupt):
+        # Os arquivos ficam com as linhas obtidas até aqui; o journal retoma o restante
+        pass
+    
+    # Onde a busca gastou seu tempo: requisições, latência e cache por tipo de consulta
+    metricas = client.metrics.snapshot()
+    print("\nRequisições à rede por tipo de consulta:")
+    for template, m in metricas['templates'].items():
+        taxa = m['taxa_acerto_cache']
+        print(f"  {template:<15} {m['requisicoes']:>7} req  {m['latencia_total']:>8.1f}s"
+              f"  cache {'-' if taxa is None else f'{taxa:.0%}'}")
+    with open('todos_carros_precos.metrics.json', 'w', encoding='utf-8') as f:
+        f.write(client.metrics.to_json())
     
-    if not df_precos.empty:
+    if resumo.total:
         print(f"\n{'='*70}")
-        print(f"Tabela criada com {len(df_precos)} veículos com preços!")
+        print(f"Tabela criada com {resumo.total} veículos com preços!")
         print(f"{'='*70}\n")
         
         # Mostrar resumo
         print("Primeiras linhas da tabela:")
-        print(df_precos.head(10).to_string(index=False))
+        print(registros_para_dataframe(resumo.primeiras, LinhaPreco.COLUNAS).to_string(index=False))
         
         # Estatísticas
         print(f"\n{'='*70}")
         print("ESTATÍSTICAS:")
         print(f"{'='*70}")
-        print(f"Total de veículos: {len(df_precos)}")
-        print(f"Total de marcas únicas: {df_precos['Marca'].nunique()}")
-        print(f"Total de modelos únicos: {df_precos['Modelo'].nunique()}")
-        
-        # Exportar tabela
-        print(f"\n{'='*70}")
-        print("EXPORTANDO TABELA...")
-        print(f"{'='*70}\n")
-        
-        exportar_tabela(df_precos, formato='csv', arquivo='todos_carros_precos.csv')
-        exportar_tabela(df_precos, formato='excel', arquivo='todos_carros_precos.xlsx')
-        exportar_tabela(df_precos, formato='html', arquivo='todos_carros_precos.html')
+        print(f"Total de veículos: {resumo.total}")
+        print(f"Total de marcas únicas: {len(resumo.marcas)}")
+        print(f"Total de modelos únicos: {len(resumo.modelos)}")
+        print(f"Preço médio: {formatar_preco(resumo.preco_medio())}")
         
         print(f"\n{'='*70}")
-        print("TABELA CRIADA COM SUCESSO!")
+        if estado.completa:
+            print("TABELA CRIADA COM SUCESSO!")
+        else:
+            print(f"TABELA INCOMPLETA: {_MOTIVOS_INCOMPLETA[estado.motivo]}.")
+            print("Execute novamente para continuar do journal.")
         print(f"{'='*70}")
         print("\nArquivos gerados:")
-        print("  - todos_carros_precos.csv")
-        print("  - todos_carros_precos.xlsx")
-        print("  - todos_carros_precos.html")
+        for sink in sinks:
+            for caminho in getattr(sink, 'paginas', None) or [sink.arquivo]:
+                print(f"  - {caminho}")
     else:
         print("\nNenhum veículo com preço foi encontrado.")
         print("Tente aumentar os limites ou verifique sua conexão com a API.")
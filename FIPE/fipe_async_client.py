@@ -0,0 +1,392 @@
+"""
+Cliente assíncrono para a API FIPE
+Usa um pool de conexões compartilhado (aiohttp) e limita o número de
+requisições simultâneas, permitindo sobrepor centenas de consultas.
+"""
+
+import asyncio
+import time
+from typing import Optional, List, Dict, Any, Union, Callable
+
+import aiohttp
+
+from fipe_cache import MemoryCache, ResponseCache, cache_key, endpoint_template
+from fipe_metrics import ClientMetrics
+from fipe_rate_limit import AdaptiveConcurrencyLimiter, RateLimiter, interpretar_retry_after
+from fipe_records import Brand, Model, VehicleDetails, YearEntry, loads, tipar
+from fipe_client import FipeAPIError, FipeClient, VehicleType
+
+
+class AsyncFipeClient:
+    """Cliente assíncrono para consultar a API FIPE"""
+
+    BASE_URL = FipeClient.BASE_URL
+    ERROS_DE_CONEXAO = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+    # Mesma política de novas tentativas do cliente síncrono
+    _sobrecarga = FipeClient._sobrecarga
+    _espera_apos_falha = FipeClient._espera_apos_falha
+
+    def __init__(
+        self,
+        subscription_token: Optional[str] = None,
+        max_concorrencia: int = 50,
+        timeout: float = 30.0,
+        cache: Optional[ResponseCache] = None,
+        memory_cache: Union[MemoryCache, bool] = True,
+        rate_limiter: Optional[RateLimiter] = None,
+        base_url: Optional[str] = None,
+        metrics: Optional[ClientMetrics] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 60.0
+    ):
+        """
+        Inicializa o cliente FIPE assíncrono
+
+        Args:
+            subscription_token: Token de assinatura (opcional, aumenta limite de requisições)
+            max_concorrencia: Número máximo de requisições em andamento ao mesmo tempo
+            timeout: Tempo máximo (segundos) de cada requisição
+            cache: Cache persistente de respostas (opcional, ex: SQLiteCache)
+            memory_cache: Cache LRU em memória (ver FipeClient)
+            rate_limiter: Limitador de ritmo e de cota diária (ver FipeClient)
+            base_url: URL base da API (ver FipeClient)
+            metrics: Métricas do cliente (ver FipeClient)
+            concurrency_limiter: Limite adaptativo (AIMD) de requisições simultâneas,
+                dentro de max_concorrencia (opcional)
+            max_retries: Novas tentativas após 429, 5xx ou falha de conexão
+            backoff_base: Espera base (segundos) do backoff exponencial com jitter
+            backoff_max: Maior espera (segundos); um Retry-After maior encerra as tentativas
+        """
+        if max_concorrencia < 1:
+            raise ValueError("max_concorrencia deve ser maior que zero")
+
+        self.subscription_token = subscription_token
+        self.max_concorrencia = max_concorrencia
+        self.timeout = timeout
+        self.cache = cache
+        if memory_cache is True:
+            memory_cache = MemoryCache()
+        self.memory_cache: Optional[MemoryCache] = memory_cache or None
+        self.rate_limiter = rate_limiter
+        self.base_url = (base_url or self.BASE_URL).rstrip('/')
+        self.metrics = metrics if metrics is not None else ClientMetrics()
+        self.hooks: Dict[str, List[Callable]] = {'pre_request': [], 'post_request': []}
+        self.concurrency_limiter = concurrency_limiter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Requisições em andamento por chave de cache (single-flight)
+        self._em_voo: Dict[str, asyncio.Future] = {}
+        self.headers = {
+            'accept': 'application/json',
+            'content-type': 'application/json'
+        }
+
+        if self.subscription_token:
+            self.headers['X-Subscription-Token'] = self.subscription_token
+
+        # Criados sob demanda, dentro do event loop em execução
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncFipeClient":
+        self._get_session()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Retorna a sessão compartilhada, criando o pool de conexões se necessário"""
+        if self._session is None or self._session.closed:
+            # O pool de conexões acompanha o limite de concorrência
+            connector = aiohttp.TCPConnector(limit=self.max_concorrencia)
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._semaforo = asyncio.Semaphore(self.max_concorrencia)
+        return self._session
+
+    async def close(self) -> None:
+        """Fecha a sessão e libera as conexões do pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._semaforo = None
+
+    async def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict[Any, Any]:
+        """
+        Faz uma requisição GET assíncrona para a API (ver FipeClient._make_request)
+
+        Chamadas idênticas simultâneas (mesmo endpoint e parâmetros, em tarefas
+        diferentes) aguardam a mesma requisição e recebem o mesmo resultado.
+
+        Args:
+            endpoint: Endpoint da API (sem a base URL)
+            params: Parâmetros da query string
+
+        Returns:
+            Resposta da API convertida em registros (fipe_records.tipar); nos
+            acertos de cache, os mesmos registros guardados, sem cópia
+
+        Raises:
+            FipeAPIError: Em caso de erro na requisição (após as novas tentativas)
+        """
+        chave = cache_key(endpoint, params, self.base_url)
+        template = endpoint_template(endpoint)
+        reference = params.get('reference') if params else None
+
+        if self.memory_cache is not None:
+            cached = self.memory_cache.get(chave, template)
+            if cached is not None:
+                self.metrics.registrar_cache(template, 'memoria')
+                return cached
+
+        while chave in self._em_voo:
+            futuro = self._em_voo[chave]
+            self.metrics.registrar_cache(template, 'em_voo')
+            try:
+                return await asyncio.shield(futuro)
+            except asyncio.CancelledError:
+                # Tarefa líder cancelada: outra chamada assume a requisição
+                if not futuro.cancelled():
+                    raise
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._em_voo[chave] = futuro
+        try:
+            data = await self._buscar(chave, template, endpoint, params, reference)
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except BaseException as e:
+            futuro.set_exception(e)
+            # Marca a exceção como consumida, mesmo sem outras chamadas aguardando
+            futuro.exception()
+            raise
+        else:
+            futuro.set_result(data)
+        finally:
+            del self._em_voo[chave]
+        return data
+
+    async def _buscar(
+        self,
+        chave: str,
+        template: str,
+        endpoint: str,
+        params: Optional[Dict],
+        reference: Optional[Any]
+    ) -> Dict[Any, Any]:
+        """Busca no cache persistente ou na rede (executada por uma única tarefa por chave)"""
+        # O cache persistente (ex: SQLite) é consultado fora do event loop
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, chave)
+            if cached is not None:
+                cached = tipar(cached, template)
+                if self.memory_cache is not None:
+                    self.memory_cache.set(chave, template, cached, reference)
+                self.metrics.registrar_cache(template, 'persistente')
+                return cached
+
+        self.metrics.registrar_cache(template, None)
+
+        url = f"{self.base_url}/{endpoint}"
+        session = self._get_session()
+        tentativa = 0
+
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+
+            async with self._semaforo:
+                for hook in self.hooks['pre_request']:
+                    hook(template, url, params)
+
+                if self.concurrency_limiter is not None:
+                    await self.concurrency_limiter.acquire_async()
+                status = None
+                retry_after = None
+                corpo = b''
+                erro = None
+                inicio = time.perf_counter()
+                try:
+                    async with session.get(url, params=params) as response:
+                        status = response.status
+                        retry_after = interpretar_retry_after(response.headers.get('Retry-After'))
+                        corpo = await response.read()
+                        response.raise_for_status()
+                        data = loads(corpo)
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    erro = e
+                finally:
+                    if self.concurrency_limiter is not None:
+                        self.concurrency_limiter.release(
+                            time.perf_counter() - inicio, sobrecarga=self._sobrecarga(status, erro)
+                        )
+                self._registrar(template, url, params, inicio, status, len(corpo), erro)
+
+            if erro is None:
+                break
+
+            espera = self._espera_apos_falha(url, tentativa, status, erro, retry_after)
+            self.metrics.registrar_retry(template)
+            await asyncio.sleep(espera)
+            tentativa += 1
+
+        data = tipar(data, template)
+        if self.memory_cache is not None:
+            self.memory_cache.set(chave, template, data, reference)
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.set, chave, data, reference is not None)
+
+        return data
+
+    def _registrar(
+        self,
+        template: str,
+        url: str,
+        params: Optional[Dict],
+        inicio: float,
+        status: Optional[int],
+        bytes_recebidos: int,
+        erro: Optional[Exception]
+    ) -> None:
+        """Registra a requisição nas métricas e chama os hooks post_request"""
+        duracao = time.perf_counter() - inicio
+        self.metrics.registrar_requisicao(
+            template, duracao, bytes_recebidos=bytes_recebidos, status=status, erro=erro is not None
+        )
+        for hook in self.hooks['post_request']:
+            hook(template, url, params, status, duracao, erro)
+
+    def add_hook(self, evento: str, funcao: Callable) -> None:
+        """Registra uma função chamada a cada requisição que vai à rede (ver FipeClient.add_hook)"""
+        if evento not in self.hooks:
+            raise ValueError(f"Evento inválido: {evento}. Use: {', '.join(self.hooks)}")
+        self.hooks[evento].append(funcao)
+
+    def invalidate(self, reference: Optional[int] = None, latest: bool = False) -> int:
+        """Remove respostas do cache em memória (ver FipeClient.invalidate)"""
+        if self.memory_cache is None:
+            return 0
+        return self.memory_cache.invalidate(reference=reference, latest=latest)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Retorna os contadores do cache em memória (ver FipeClient.cache_stats)"""
+        if self.memory_cache is None:
+            return {}
+        return self.memory_cache.stats()
+
+    async def get_references(self) -> List[Dict[str, str]]:
+        """Retorna as referências de meses da FIPE (ver FipeClient.get_references)"""
+        return await self._make_request("references")
+
+    async def get_brands(
+        self,
+        vehicle_type: VehicleType = VehicleType.CARS,
+        reference: Optional[int] = None
+    ) -> List[Brand]:
+        """Retorna as marcas para o tipo de veículo (ver FipeClient.get_brands)"""
+        endpoint = f"{vehicle_type.value}/brands"
+        params = {"reference": reference} if reference else None
+        return await self._make_request(endpoint, params)
+
+    async def get_models(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        reference: Optional[int] = None
+    ) -> List[Model]:
+        """Retorna os modelos para a marca (ver FipeClient.get_models)"""
+        endpoint = f"{vehicle_type.value}/brands/{brand_id}/models"
+        params = {"reference": reference} if reference else None
+        return await self._make_request(endpoint, params)
+
+    async def get_years_by_brand(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        reference: Optional[int] = None
+    ) -> List[YearEntry]:
+        """Retorna os anos disponíveis para a marca (ver FipeClient.get_years_by_brand)"""
+        endpoint = f"{vehicle_type.value}/{brand_id}/years"
+        params = {"reference": reference} if reference else None
+        return await self._make_request(endpoint, params)
+
+    async def get_years_by_model(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        model_id: int,
+        reference: Optional[int] = None
+    ) -> List[YearEntry]:
+        """Retorna os anos disponíveis para o modelo (ver FipeClient.get_years_by_model)"""
+        endpoint = f"{vehicle_type.value}/brands/{brand_id}/models/{model_id}/years"
+        params = {"reference": reference} if reference else None
+        return await self._make_request(endpoint, params)
+
+    async def get_models_by_brand_and_year(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        year_id: str,
+        reference: Optional[int] = None
+    ) -> List[Model]:
+        """Retorna os modelos para marca e ano (ver FipeClient.get_models_by_brand_and_year)"""
+        endpoint = f"{vehicle_type.value}/{brand_id}/years/{year_id}/models"
+        params = {"reference": reference} if reference else None
+        return await self._make_request(endpoint, params)
+
+    async def get_years_by_fipe_code(
+        self,
+        vehicle_type: VehicleType,
+        fipe_code: str,
+        reference: Optional[int] = None
+    ) -> List[YearEntry]:
+        """Retorna os anos disponíveis por código FIPE (ver FipeClient.get_years_by_fipe_code)"""
+        endpoint = f"{vehicle_type.value}/{fipe_code}/years"
+        params = {"reference": reference} if reference else None
+        return await self._make_request(endpoint, params)
+
+    async def get_vehicle_details(
+        self,
+        vehicle_type: VehicleType,
+        fipe_code: str,
+        year_id: str,
+        reference: Optional[int] = None
+    ) -> VehicleDetails:
+        """Retorna as informações e o preço do veículo (ver FipeClient.get_vehicle_details)"""
+        endpoint = f"{vehicle_type.value}/{fipe_code}/years/{year_id}"
+        params = {"reference": reference} if reference else None
+        return await self._make_request(endpoint, params)
+
+    async def get_vehicle_details_by_model(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        model_id: int,
+        year_id: str,
+        reference: Optional[int] = None
+    ) -> VehicleDetails:
+        """Retorna as informações do veículo por marca, modelo e ano (ver FipeClient.get_vehicle_details_by_model)"""
+        endpoint = f"{vehicle_type.value}/brands/{brand_id}/models/{model_id}/years/{year_id}"
+        params = {"reference": reference} if reference else None
+        return await self._make_request(endpoint, params)
+
+    async def get_vehicle_history(
+        self,
+        vehicle_type: VehicleType,
+        fipe_code: str,
+        year_id: str,
+        reference: Optional[int] = None
+    ) -> VehicleDetails:
+        """Retorna o histórico de preços do veículo (ver FipeClient.get_vehicle_history)"""
+        endpoint = f"{vehicle_type.value}/{fipe_code}/years/{year_id}/history"
+        params = {"reference": reference} if reference else None
+        return await self._make_request(endpoint, params)
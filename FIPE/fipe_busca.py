@@ -0,0 +1,242 @@
+"""
+Busca textual por marcas e modelos FIPE
+Índice invertido sobre o catálogo offline (fipe_catalogo): cada documento é um
+ano de um modelo ("VW - VolksWagen AMAROK High.CD 2.0 16V TDI 4x4 Dies. Aut",
+"2014 Diesel"). Os textos são normalizados (sem acentos, minúsculos) e
+quebrados em tokens; os tokens do vocabulário são indexados por trigramas.
+Cada termo da consulta casa com tokens iguais, com tokens que começam com ele
+(digitação incompleta) ou, via trigramas, com tokens parecidos (erros de
+digitação), e o resultado é ordenado por relevância.
+
+Uso:
+    busca = IndiceBusca(OfflineFipeClient('catalogo_fipe'))
+    busca.buscar('amarok 2.0 diesel 2014')
+"""
+
+import bisect
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from fipe_client import VehicleType
+
+
+# Pesos de cada forma de casamento de um termo da consulta
+PESO_EXATO = 1.0
+PESO_PREFIXO = 0.8
+PESO_APROXIMADO = 0.6
+
+# Similaridade mínima (trigramas em comum / trigramas da união) para casamento aproximado
+SIMILARIDADE_MINIMA = 0.3
+
+# Máximo de tokens do vocabulário considerados por prefixo ou aproximação de um termo
+MAX_EXPANSOES = 64
+
+_TIPOS = tuple(VehicleType)
+
+_SEPARADORES = re.compile(r'[^0-9a-z.]+')
+
+
+def normalizar(texto: str) -> str:
+    """Remove acentos, passa para minúsculas e troca pontuação por espaço (mantém "2.0")"""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode().lower()
+    return _SEPARADORES.sub(' ', texto)
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Tokens normalizados do texto ("Álcool/Gasolina 1.6" -> ['alcool', 'gasolina', '1.6'])"""
+    return [token.strip('.') for token in normalizar(texto).split() if token.strip('.')]
+
+
+def trigramas(token: str) -> Set[str]:
+    """Trigramas do token com bordas (" am", "ama", ..., "ok ")"""
+    marcado = f" {token} "
+    return {marcado[i:i + 3] for i in range(len(marcado) - 2)}
+
+
+class ResultadoBusca(NamedTuple):
+    """Um ano de modelo encontrado pela busca"""
+    tipo: VehicleType
+    codigo_marca: str
+    marca: str
+    codigo_modelo: str
+    modelo: str
+    codigo_fipe: str
+    ano: str
+    ano_descricao: str
+    pontuacao: float
+
+
+class IndiceBusca:
+    """
+    Índice invertido de marcas, modelos e anos do catálogo
+
+    Construído uma vez (alguns segundos para o catálogo completo); as consultas
+    usam apenas arrays NumPy e levam poucos milissegundos.
+    """
+
+    def __init__(self, catalogo):
+        """
+        Args:
+            catalogo: OfflineFipeClient (ou objeto com iter_modelos no mesmo formato)
+        """
+        # Documentos: um por (modelo, ano); dados do modelo guardados uma única vez
+        self._modelos: List[Tuple[VehicleType, Dict[str, str], Dict[str, str], str]] = []
+        documentos_modelo: List[int] = []
+        self._anos: List[Dict[str, str]] = []
+
+        vocabulario: Dict[str, int] = {}
+        tokens_texto: Dict[str, List[int]] = {}
+        pares_token: List[int] = []
+        pares_documento: List[int] = []
+
+        def ids(texto: str) -> List[int]:
+            resultado = tokens_texto.get(texto)
+            if resultado is None:
+                resultado = tokens_texto[texto] = [
+                    vocabulario.setdefault(token, len(vocabulario)) for token in tokenizar(texto)
+                ]
+            return resultado
+
+        for vehicle_type, marca, modelo, codigo_fipe, anos in catalogo.iter_modelos():
+            indice_modelo = len(self._modelos)
+            self._modelos.append((vehicle_type, marca, modelo, codigo_fipe))
+            tokens_modelo = set(ids(marca['name'])) | set(ids(modelo['name']))
+            # Código FIPE pesquisável sem o dígito verificador ("005340")
+            tokens_modelo.add(vocabulario.setdefault(codigo_fipe.split('-')[0], len(vocabulario)))
+            for ano in anos:
+                documento = len(self._anos)
+                self._anos.append(ano)
+                documentos_modelo.append(indice_modelo)
+                for token in tokens_modelo.union(ids(ano['name'])):
+                    pares_token.append(token)
+                    pares_documento.append(documento)
+
+        self._documentos_modelo = np.array(documentos_modelo, dtype=np.int32)
+        self._tipos_documento = np.array([_TIPOS.index(m[0]) for m in self._modelos], dtype=np.uint8)[
+            self._documentos_modelo
+        ]
+        self.total_documentos = len(self._anos)
+
+        # Listas invertidas em formato CSR: documentos do token t em documentos[inicio[t]:inicio[t + 1]]
+        tokens = np.array(pares_token, dtype=np.int32)
+        ordem = np.argsort(tokens, kind='stable')
+        self._postings = np.array(pares_documento, dtype=np.int32)[ordem]
+        self._postings_inicio = np.searchsorted(tokens[ordem], np.arange(len(vocabulario) + 1)).astype(np.int64)
+        frequencias = np.diff(self._postings_inicio)
+        self._idf = np.log1p(self.total_documentos / np.maximum(frequencias, 1)).astype(np.float32)
+
+        self._vocabulario = vocabulario
+        self._tokens = sorted(vocabulario)
+        self._trigramas: Dict[str, List[int]] = {}
+        for token, token_id in vocabulario.items():
+            for trigrama in trigramas(token):
+                self._trigramas.setdefault(trigrama, []).append(token_id)
+        self._n_trigramas = {token_id: len(trigramas(token)) for token, token_id in vocabulario.items()}
+
+    def _expandir(self, termo: str) -> Dict[int, float]:
+        """Tokens do vocabulário que casam com o termo -> peso do casamento"""
+        pesos: Dict[int, float] = {}
+        exato = self._vocabulario.get(termo)
+        if exato is not None:
+            pesos[exato] = PESO_EXATO
+
+        # Prefixo: faixa do vocabulário ordenado; tokens mais curtos primeiro
+        inicio = bisect.bisect_left(self._tokens, termo)
+        fim = bisect.bisect_left(self._tokens, termo + '\uffff')
+        candidatos = sorted(self._tokens[inicio:fim], key=len)[:MAX_EXPANSOES]
+        for token in candidatos:
+            token_id = self._vocabulario[token]
+            pesos.setdefault(token_id, PESO_PREFIXO * (0.5 + 0.5 * len(termo) / len(token)))
+
+        # Aproximado: só para termos sem casamento e com tamanho suficiente
+        if not pesos and len(termo) >= 3:
+            trigramas_termo = trigramas(termo)
+            comuns = Counter()
+            for trigrama in trigramas_termo:
+                comuns.update(self._trigramas.get(trigrama, ()))
+            for token_id, n in comuns.most_common(MAX_EXPANSOES):
+                similaridade = n / (len(trigramas_termo) + self._n_trigramas[token_id] - n)
+                if similaridade >= SIMILARIDADE_MINIMA:
+                    pesos[token_id] = PESO_APROXIMADO * similaridade
+        return pesos
+
+    def buscar(
+        self,
+        consulta: str,
+        limite: int = 10,
+        vehicle_type: Optional[VehicleType] = None
+    ) -> List[ResultadoBusca]:
+        """
+        Busca anos de modelos pelo texto da consulta
+
+        Documentos que casam com mais termos vêm primeiro; entre eles, vence a
+        maior soma de pesos (exato > prefixo > aproximado, ponderados pela
+        raridade do token). Como todo termo também casa por prefixo, a busca
+        serve para sugestões enquanto o usuário digita.
+
+        Args:
+            consulta: Texto livre (ex: "amarok 2.0 diesel 2014", "gol 1.0 fle")
+            limite: Número máximo de resultados
+            vehicle_type: Restringe a um tipo de veículo (None = todos)
+
+        Returns:
+            Resultados ordenados por relevância
+        """
+        termos = list(dict.fromkeys(tokenizar(consulta)))
+        if not termos or not self.total_documentos or limite <= 0:
+            return []
+
+        pontuacao = np.zeros(self.total_documentos, dtype=np.float32)
+        termos_casados = np.zeros(self.total_documentos, dtype=np.int16)
+        for termo in termos:
+            melhor = np.zeros(self.total_documentos, dtype=np.float32)
+            for token_id, peso in self._expandir(termo).items():
+                documentos = self._postings[self._postings_inicio[token_id]:self._postings_inicio[token_id + 1]]
+                # Cada documento aparece uma vez por token: indexação direta basta
+                melhor[documentos] = np.maximum(melhor[documentos], peso * self._idf[token_id])
+            pontuacao += melhor
+            termos_casados += melhor > 0
+
+        if vehicle_type is not None:
+            termos_casados[self._tipos_documento != _TIPOS.index(vehicle_type)] = 0
+
+        candidatos = np.flatnonzero(termos_casados)
+        if not len(candidatos):
+            return []
+        # Ordem: mais termos casados, maior pontuação, ordem do catálogo
+        chave = termos_casados[candidatos].astype(np.float64) * 1e6 + pontuacao[candidatos]
+        if len(candidatos) > limite:
+            # Os `limite` melhores sem ordenar tudo; empates no corte ficam com os primeiros do catálogo
+            corte = np.partition(chave, len(chave) - limite)[len(chave) - limite]
+            acima = chave > corte
+            empatados = np.flatnonzero(chave == corte)[:limite - int(acima.sum())]
+            melhores = np.concatenate([np.flatnonzero(acima), empatados])
+            candidatos, chave = candidatos[melhores], chave[melhores]
+        ordem = np.lexsort((candidatos, -chave))[:limite]
+
+        resultados = []
+        for documento in candidatos[ordem]:
+            vehicle, marca, modelo, codigo_fipe = self._modelos[self._documentos_modelo[documento]]
+            ano = self._anos[documento]
+            resultados.append(ResultadoBusca(
+                vehicle, marca['code'], marca['name'], modelo['code'], modelo['name'],
+                codigo_fipe, ano['code'], ano['name'], round(float(pontuacao[documento]), 4)
+            ))
+        return resultados
+
+    def sugerir(self, prefixo: str, limite: int = 10, vehicle_type: Optional[VehicleType] = None) -> List[ResultadoBusca]:
+        """Sugestões para digitação (um resultado por modelo, ver buscar)"""
+        vistos: Set[Tuple[VehicleType, str, str]] = set()
+        sugestoes = []
+        for resultado in self.buscar(prefixo, limite * 5, vehicle_type):
+            chave = (resultado.tipo, resultado.codigo_marca, resultado.codigo_modelo)
+            if chave not in vistos:
+                vistos.add(chave)
+                sugestoes.append(resultado)
+                if len(sugestoes) == limite:
+                    break
+        return sugestoes
@@ -0,0 +1,329 @@
+"""
+Caches de respostas da API FIPE (em memória e persistente)
+Os dados de uma referência (mês) publicada nunca mudam, então respostas de
+consultas com referência explícita são guardadas sem expiração. Consultas sem
+referência ("mais recente") expiram após um TTL.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+from urllib.parse import urlencode
+
+from fipe_records import loads
+
+
+# TTL padrão para respostas sem referência explícita (6 horas)
+TTL_PADRAO_LATEST = 6 * 60 * 60
+
+
+def cache_key(endpoint: str, params: Optional[Dict] = None, base_url: str = '') -> str:
+    """
+    Monta a chave de cache de uma requisição
+
+    Args:
+        endpoint: Endpoint da API (sem a base URL)
+        params: Parâmetros da query string
+        base_url: URL base da API. Faz parte da chave para que um cache
+            compartilhado entre servidores (ex: fipe_mock_server e a API real)
+            não misture as respostas
+
+    Returns:
+        Chave no formato "base_url/endpoint?param=valor" com parâmetros ordenados
+    """
+    url = f"{base_url.rstrip('/')}/{endpoint}" if base_url else endpoint
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+
+def endpoint_template(endpoint: str) -> str:
+    """
+    Classifica um endpoint pelo tipo de consulta
+
+    Args:
+        endpoint: Endpoint da API (sem a base URL), ex: "cars/brands/23/models"
+
+    Returns:
+        Um de: references, brands, models, models_by_year, years, details,
+        history ou other
+    """
+    partes = endpoint.strip('/').split('/')
+    if partes[0] == 'references':
+        return 'references'
+
+    resto = partes[1:]
+    if not resto:
+        return 'other'
+    if resto[-1] == 'history':
+        return 'history'
+    if resto == ['brands']:
+        return 'brands'
+    if resto[-1] == 'models':
+        return 'models' if resto[0] == 'brands' else 'models_by_year'
+    if resto[-1] == 'years':
+        return 'years'
+    if len(resto) >= 2 and resto[-2] == 'years':
+        return 'details'
+    return 'other'
+
+
+# Capacidade (número de respostas) de cada tipo de consulta no cache em memória
+CAPACIDADES_PADRAO = {
+    'references': 4,
+    'brands': 16,
+    'models': 512,
+    'models_by_year': 2048,
+    'years': 4096,
+    'details': 4096,
+    'history': 1024,
+}
+
+
+class MemoryCache:
+    """
+    Cache LRU em memória, com capacidade separada por tipo de consulta
+
+    As respostas são devolvidas sem cópia: quem as recebe não deve modificá-las.
+    """
+
+    def __init__(
+        self,
+        capacidades: Optional[Dict[str, int]] = None,
+        capacidade_padrao: int = 256,
+        ttl_latest: Optional[float] = TTL_PADRAO_LATEST
+    ):
+        """
+        Args:
+            capacidades: Capacidade por tipo de consulta (ver endpoint_template).
+                Tipos omitidos usam CAPACIDADES_PADRAO ou capacidade_padrao
+            capacidade_padrao: Capacidade de tipos sem valor definido
+            ttl_latest: Validade (segundos) das respostas sem referência explícita.
+                None = nunca expiram
+        """
+        self.capacidades = dict(CAPACIDADES_PADRAO)
+        if capacidades:
+            self.capacidades.update(capacidades)
+        self.capacidade_padrao = capacidade_padrao
+        self.ttl_latest = ttl_latest
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self._secoes: Dict[str, OrderedDict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, chave: str, template: str) -> Optional[Any]:
+        """Retorna a resposta guardada ou None se ausente/expirada"""
+        with self._lock:
+            secao = self._secoes.get(template)
+            entrada = secao.get(chave) if secao is not None else None
+
+            if entrada is not None:
+                valor, expira_em, _ = entrada
+                if expira_em is None or expira_em >= time.time():
+                    secao.move_to_end(chave)
+                    self.hits[template] = self.hits.get(template, 0) + 1
+                    return valor
+                del secao[chave]
+
+            self.misses[template] = self.misses.get(template, 0) + 1
+            return None
+
+    def contem(self, chave: str, template: str) -> bool:
+        """True se a resposta está guardada e válida (sem contar acerto/falta nem alterar a ordem LRU)"""
+        with self._lock:
+            secao = self._secoes.get(template)
+            entrada = secao.get(chave) if secao is not None else None
+            return entrada is not None and (entrada[1] is None or entrada[1] >= time.time())
+
+    def set(self, chave: str, template: str, valor: Any, reference: Optional[int] = None) -> None:
+        """
+        Guarda uma resposta, descartando a menos usada se a seção estiver cheia
+
+        Args:
+            chave: Chave gerada por cache_key
+            template: Tipo de consulta (ver endpoint_template)
+            valor: Resposta já decodificada (os clientes guardam os registros de fipe_records)
+            reference: Referência explícita da consulta (None = mais recente, expira)
+        """
+        capacidade = self.capacidades.get(template, self.capacidade_padrao)
+        if capacidade <= 0:
+            return
+
+        if reference is not None or self.ttl_latest is None:
+            expira_em = None
+        else:
+            expira_em = time.time() + self.ttl_latest
+
+        with self._lock:
+            secao = self._secoes.setdefault(template, OrderedDict())
+            secao[chave] = (valor, expira_em, reference)
+            secao.move_to_end(chave)
+            while len(secao) > capacidade:
+                secao.popitem(last=False)
+
+    def invalidate(self, reference: Optional[int] = None, latest: bool = False) -> int:
+        """
+        Remove entradas do cache
+
+        Args:
+            reference: Remove apenas as respostas desta referência
+            latest: Remove apenas as respostas sem referência explícita (mês mais recente)
+            Sem argumentos, remove tudo.
+
+        Returns:
+            Número de entradas removidas
+        """
+        removidas = 0
+        with self._lock:
+            for secao in self._secoes.values():
+                if reference is None and not latest:
+                    removidas += len(secao)
+                    secao.clear()
+                    continue
+
+                for chave in [
+                    c for c, (_, _, ref) in secao.items()
+                    if (reference is not None and ref is not None and int(ref) == int(reference))
+                    or (latest and ref is None)
+                ]:
+                    del secao[chave]
+                    removidas += 1
+        return removidas
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Retorna contadores por tipo de consulta
+
+        Returns:
+            {template: {"hits": n, "misses": n, "size": n, "capacity": n}}
+        """
+        with self._lock:
+            templates = set(self.hits) | set(self.misses) | set(self._secoes)
+            return {
+                template: {
+                    'hits': self.hits.get(template, 0),
+                    'misses': self.misses.get(template, 0),
+                    'size': len(self._secoes.get(template, ())),
+                    'capacity': self.capacidades.get(template, self.capacidade_padrao),
+                }
+                for template in sorted(templates)
+            }
+
+
+class ResponseCache:
+    """
+    Interface de cache persistente usada por FipeClient._make_request
+
+    Implementações devem ser seguras para uso a partir de várias threads.
+    """
+
+    ttl_latest: Optional[float] = TTL_PADRAO_LATEST
+
+    def get(self, chave: str) -> Optional[Any]:
+        """Retorna a resposta guardada ou None se ausente/expirada"""
+        raise NotImplementedError
+
+    def set(self, chave: str, valor: Any, permanente: bool = False) -> None:
+        """
+        Guarda uma resposta
+
+        Args:
+            chave: Chave gerada por cache_key
+            valor: Resposta JSON já decodificada
+            permanente: True para respostas fixadas em uma referência (nunca expiram)
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Libera recursos (arquivos, conexões)"""
+
+
+class SQLiteCache(ResponseCache):
+    """Cache persistente em SQLite com valores JSON comprimidos (zlib)"""
+
+    def __init__(self, caminho: str = 'fipe_cache.sqlite', ttl_latest: Optional[float] = TTL_PADRAO_LATEST):
+        """
+        Abre (ou cria) o arquivo de cache
+
+        Args:
+            caminho: Caminho do arquivo SQLite
+            ttl_latest: Validade (segundos) das respostas sem referência explícita.
+                None = nunca expiram
+        """
+        self.caminho = caminho
+        self.ttl_latest = ttl_latest
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+        # WAL permite leitores concorrentes enquanto outro processo grava
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS respostas ("
+            " chave TEXT PRIMARY KEY,"
+            " valor BLOB NOT NULL,"
+            " expira_em REAL"
+            ")"
+        )
+        self._conn.commit()
+
+    def get(self, chave: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT valor, expira_em FROM respostas WHERE chave = ?",
+                (chave,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        valor, expira_em = row
+        if expira_em is not None and expira_em < time.time():
+            return None
+
+        return loads(zlib.decompress(valor))
+
+    def set(self, chave: str, valor: Any, permanente: bool = False) -> None:
+        if permanente or self.ttl_latest is None:
+            expira_em = None
+        else:
+            expira_em = time.time() + self.ttl_latest
+
+        dados = zlib.compress(json.dumps(valor, ensure_ascii=False).encode('utf-8'))
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas (chave, valor, expira_em) VALUES (?, ?, ?)",
+                (chave, dados, expira_em)
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM respostas")
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """
+        Remove entradas expiradas
+
+        Returns:
+            Número de entradas removidas
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM respostas WHERE expira_em IS NOT NULL AND expira_em < ?",
+                (time.time(),)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,540 @@
+"""
+Catálogo FIPE offline em arrays mapeáveis em memória
+A árvore completa (marcas -> modelos -> anos, códigos FIPE e preços da
+referência) é gravada como arquivos .npy em um diretório: colunas numéricas,
+uma tabela de textos (bytes UTF-8 + offsets) e índices hash pré-calculados por
+código FIPE e por (tipo, marca, modelo, ano). OfflineFipeClient abre o diretório
+com mmap (carga instantânea, páginas lidas sob demanda) e responde às mesmas
+consultas de FipeClient sem acessar a rede.
+
+Uso:
+    construir_catalogo('catalogo_fipe', {VehicleType.CARS: ['todos_carros_precos_330.journal.jsonl']}, 330)
+    client = OfflineFipeClient('catalogo_fipe')
+    client.get_vehicle_details(VehicleType.CARS, '005340-6', '2014-3')
+"""
+
+import json
+import os
+import shutil
+import unicodedata
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from fipe_client import FipeAPIError, VehicleType
+from fipe_journal import iter_unidades
+from fipe_records import Brand, Model, VehicleDetails, YearEntry, centavos, formatar_reais
+
+
+VERSAO_FORMATO = 1
+
+TIPOS = (VehicleType.CARS, VehicleType.MOTORCYCLES, VehicleType.TRUCKS)
+
+_MASCARA_64 = (1 << 64) - 1
+
+
+def _misturar(valor: int) -> int:
+    """Função de mistura splitmix64 (hash de inteiros de 64 bits)"""
+    valor = (valor + 0x9E3779B97F4A7C15) & _MASCARA_64
+    valor = ((valor ^ (valor >> 30)) * 0xBF58476D1CE4E5B9) & _MASCARA_64
+    valor = ((valor ^ (valor >> 27)) * 0x94D049BB133111EB) & _MASCARA_64
+    return valor ^ (valor >> 31)
+
+
+def _hash_texto(texto: str) -> int:
+    """FNV-1a de 64 bits (estável entre processos, ao contrário de hash())"""
+    valor = 0xCBF29CE484222325
+    for byte in texto.encode('utf-8'):
+        valor = ((valor ^ byte) * 0x100000001B3) & _MASCARA_64
+    return valor
+
+
+def _chave(tipo: int, marca: int, modelo: int = 0, ano: int = 0, combustivel: int = 0) -> int:
+    """Chave inteira de uma marca, modelo ou unidade (modelo/ano zerados nos níveis acima)"""
+    return (tipo << 62) | (marca << 44) | (modelo << 20) | (ano << 4) | combustivel
+
+
+def _codigo_ano(year_code: str) -> Tuple[int, int]:
+    """"2014-3" -> (2014, 3)"""
+    ano, _, combustivel = str(year_code).partition('-')
+    return int(ano), int(combustivel or 0)
+
+
+def _centavos(preco: Any) -> int:
+    """Preço ("R$ 10.000,00" ou centavos) em centavos; -1 se ausente"""
+    valor = centavos(preco)
+    return -1 if valor is None else valor
+
+
+def _tabela_hash(hashes: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tabela hash de endereçamento aberto (sondagem linear), ocupação <= 50%
+
+    Returns:
+        (hashes por posição, linha por posição; -1 = posição vazia)
+    """
+    tamanho = 1
+    while tamanho < 2 * max(len(hashes), 1):
+        tamanho *= 2
+    tabela_hashes = np.zeros(tamanho, dtype=np.uint64)
+    tabela_linhas = np.full(tamanho, -1, dtype=np.int32)
+    mascara = tamanho - 1
+    for linha, valor in enumerate(hashes):
+        posicao = valor & mascara
+        while tabela_linhas[posicao] != -1:
+            posicao = (posicao + 1) & mascara
+        tabela_hashes[posicao] = valor
+        tabela_linhas[posicao] = linha
+    return tabela_hashes, tabela_linhas
+
+
+class _Textos:
+    """Tabela de textos deduplicados (construção)"""
+
+    def __init__(self):
+        self.indices: Dict[str, int] = {}
+        self.textos: List[str] = []
+
+    def id(self, texto: Any) -> int:
+        texto = '' if texto is None else str(texto)
+        indice = self.indices.get(texto)
+        if indice is None:
+            indice = self.indices[texto] = len(self.textos)
+            self.textos.append(texto)
+        return indice
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        codificados = [texto.encode('utf-8') for texto in self.textos]
+        offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in codificados], out=offsets[1:])
+        blob = np.frombuffer(b''.join(codificados), dtype=np.uint8)
+        return blob, offsets
+
+
+def construir_catalogo(
+    destino: str,
+    journals: Mapping[VehicleType, Iterable[str]],
+    reference: Optional[int] = None
+) -> str:
+    """
+    Grava o catálogo offline a partir de journals de busca (CrawlJournal)
+
+    Os journals guardam a chave (marca, modelo, ano) de cada unidade junto com
+    a linha da tabela, que é tudo o que o catálogo precisa. O diretório é
+    montado em um temporário e substituído ao final.
+
+    Args:
+        destino: Diretório do catálogo
+        journals: {tipo de veículo: arquivos de journal} (ex: gravados por
+            iter_todos_precos ou pelos shards de fipe_shards)
+        reference: Código da referência dos journals
+
+    Returns:
+        Caminho do catálogo
+    """
+    # (tipo, marca) -> nome; (tipo, marca, modelo) -> (nome, código FIPE);
+    # (tipo, marca, modelo, ano, combustível) -> linha
+    marcas: Dict[Tuple[int, int], str] = {}
+    modelos: Dict[Tuple[int, int, int], Tuple[str, str]] = {}
+    unidades: Dict[Tuple[int, int, int, int, int], Tuple[str, Dict[str, Any]]] = {}
+    referencia_mes = None
+
+    for vehicle_type, caminhos in journals.items():
+        tipo = TIPOS.index(vehicle_type)
+        for caminho in caminhos:
+            for chave, linha in iter_unidades(caminho):
+                marca, modelo, year_code = chave.split('/')
+                marca, modelo = int(marca), int(modelo)
+                ano, combustivel = _codigo_ano(year_code)
+                marcas[(tipo, marca)] = linha.get('Marca', '')
+                modelos[(tipo, marca, modelo)] = (linha.get('Modelo', ''), linha.get('Código FIPE', ''))
+                unidades[(tipo, marca, modelo, ano, combustivel)] = (year_code, linha)
+                referencia_mes = referencia_mes or linha.get('Referência')
+
+    textos = _Textos()
+    colunas: Dict[str, Any] = {}
+
+    chaves_marcas = sorted(marcas)
+    colunas['marcas_tipo'] = np.array([t for t, _ in chaves_marcas], dtype=np.uint8)
+    colunas['marcas_codigo'] = np.array([m for _, m in chaves_marcas], dtype=np.int32)
+    colunas['marcas_nome'] = np.array([textos.id(marcas[k]) for k in chaves_marcas], dtype=np.int32)
+    linha_marca = {k: i for i, k in enumerate(chaves_marcas)}
+
+    chaves_modelos = sorted(modelos)
+    colunas['modelos_marca'] = np.array([linha_marca[k[:2]] for k in chaves_modelos], dtype=np.int32)
+    colunas['modelos_codigo'] = np.array([k[2] for k in chaves_modelos], dtype=np.int32)
+    colunas['modelos_nome'] = np.array([textos.id(modelos[k][0]) for k in chaves_modelos], dtype=np.int32)
+    colunas['modelos_fipe'] = np.array([textos.id(modelos[k][1]) for k in chaves_modelos], dtype=np.int32)
+    linha_modelo = {k: i for i, k in enumerate(chaves_modelos)}
+
+    # Anos do mais recente para o mais antigo, como na API
+    chaves_unidades = sorted(unidades, key=lambda k: (k[:3], -k[3], k[4]))
+    colunas['unidades_modelo'] = np.array([linha_modelo[k[:3]] for k in chaves_unidades], dtype=np.int32)
+    colunas['unidades_ano'] = np.array([k[3] for k in chaves_unidades], dtype=np.int32)
+    colunas['unidades_combustivel_codigo'] = np.array([k[4] for k in chaves_unidades], dtype=np.uint8)
+    colunas['unidades_codigo'] = np.array([textos.id(unidades[k][0]) for k in chaves_unidades], dtype=np.int32)
+    colunas['unidades_nome'] = np.array(
+        [textos.id(unidades[k][1].get('Ano Descrição', '')) for k in chaves_unidades], dtype=np.int32
+    )
+    colunas['unidades_combustivel'] = np.array(
+        [textos.id(unidades[k][1].get('Combustível', '')) for k in chaves_unidades], dtype=np.int32
+    )
+    colunas['unidades_ano_modelo'] = np.array(
+        [int(unidades[k][1].get('Ano') or k[3]) for k in chaves_unidades], dtype=np.int32
+    )
+    colunas['unidades_preco'] = np.array(
+        [_centavos(unidades[k][1].get('Preço')) for k in chaves_unidades], dtype=np.int64
+    )
+
+    # Faixas (CSR): modelos de cada marca, unidades de cada modelo, marcas de cada tipo
+    colunas['marcas_modelos_inicio'] = np.searchsorted(
+        colunas['modelos_marca'], np.arange(len(chaves_marcas) + 1)
+    ).astype(np.int32)
+    colunas['modelos_unidades_inicio'] = np.searchsorted(
+        colunas['unidades_modelo'], np.arange(len(chaves_modelos) + 1)
+    ).astype(np.int32)
+    colunas['tipos_marcas_inicio'] = np.searchsorted(
+        colunas['marcas_tipo'], np.arange(len(TIPOS) + 1)
+    ).astype(np.int32)
+
+    # Índice único por chave inteira: marcas, modelos e unidades (linhas deslocadas)
+    hashes_chaves = (
+        [_misturar(_chave(*k)) for k in chaves_marcas]
+        + [_misturar(_chave(*k)) for k in chaves_modelos]
+        + [_misturar(_chave(*k)) for k in chaves_unidades]
+    )
+    colunas['indice_chaves_hash'], colunas['indice_chaves_linha'] = _tabela_hash(hashes_chaves)
+    colunas['indice_fipe_hash'], colunas['indice_fipe_linha'] = _tabela_hash(
+        [_hash_texto(f"{k[0]}:{modelos[k][1]}") for k in chaves_modelos]
+    )
+
+    colunas['textos_blob'], colunas['textos_offsets'] = textos.arrays()
+
+    temporario = f"{destino}.tmp"
+    if os.path.exists(temporario):
+        shutil.rmtree(temporario)
+    os.makedirs(temporario)
+    for nome, array in colunas.items():
+        np.save(os.path.join(temporario, f'{nome}.npy'), array)
+    with open(os.path.join(temporario, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'versao': VERSAO_FORMATO,
+            'reference': reference,
+            'referencia': referencia_mes,
+            'marcas': len(chaves_marcas),
+            'modelos': len(chaves_modelos),
+            'unidades': len(chaves_unidades),
+        }, f, ensure_ascii=False)
+
+    if os.path.exists(destino):
+        shutil.rmtree(destino)
+    os.replace(temporario, destino)
+    return destino
+
+
+def construir_catalogo_da_api(
+    client: Any,
+    destino: str,
+    tipos: Sequence[VehicleType] = TIPOS,
+    reference: Optional[int] = None,
+    diretorio_journals: str = '.',
+    **kwargs: Any
+) -> str:
+    """
+    Busca o catálogo (iter_todos_precos com journal) e grava o catálogo offline
+
+    Args:
+        client: Cliente FIPE
+        destino: Diretório do catálogo
+        tipos: Tipos de veículo a incluir
+        reference: Referência (None = mais recente, fixada antes da busca)
+        diretorio_journals: Onde gravar os journals (permitem retomar a busca)
+        **kwargs: Demais argumentos de iter_todos_precos (limites, resolver)
+    """
+    from criar_tabela_carros import iter_todos_precos
+
+    if reference is None:
+        reference = int(client.get_references()[0]['code'])
+
+    journals = {}
+    for vehicle_type in tipos:
+        journal = os.path.join(diretorio_journals, f'catalogo_{vehicle_type.value}_{reference}.journal.jsonl')
+        for _ in iter_todos_precos(client, reference=reference, journal=journal, vehicle_type=vehicle_type, **kwargs):
+            pass
+        journals[vehicle_type] = [journal]
+
+    return construir_catalogo(destino, journals, reference)
+
+
+def _nao_encontrado(descricao: str) -> FipeAPIError:
+    return FipeAPIError(f"Erro ao consultar API FIPE: {descricao} não encontrado no catálogo offline", status=404)
+
+
+class OfflineFipeClient:
+    """
+    Cliente com a mesma interface de consulta de FipeClient, servido pelo catálogo offline
+
+    Os arrays são abertos com mmap: abrir o catálogo não lê os dados, e cada
+    consulta toca apenas as poucas posições necessárias.
+    """
+
+    def __init__(self, caminho: str):
+        """
+        Args:
+            caminho: Diretório gravado por construir_catalogo
+        """
+        with open(os.path.join(caminho, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('versao') != VERSAO_FORMATO:
+            raise ValueError(f"Versão de catálogo não suportada: {self.meta.get('versao')}")
+
+        self.caminho = caminho
+        self.reference = self.meta.get('reference')
+        for arquivo in os.listdir(caminho):
+            if arquivo.endswith('.npy'):
+                setattr(self, f'_{arquivo[:-4]}', np.load(os.path.join(caminho, arquivo), mmap_mode='r'))
+        self._n_marcas = int(self.meta['marcas'])
+        self._n_modelos = int(self.meta['modelos'])
+
+    # ----- acesso de baixo nível -----
+
+    def _texto(self, indice: int) -> str:
+        inicio, fim = self._textos_offsets[indice], self._textos_offsets[indice + 1]
+        return self._textos_blob[inicio:fim].tobytes().decode('utf-8')
+
+    def _buscar_chave(self, chave: int) -> int:
+        """Linha global (marcas, depois modelos, depois unidades) da chave, ou -1"""
+        hashes, linhas = self._indice_chaves_hash, self._indice_chaves_linha
+        mascara = len(linhas) - 1
+        valor = _misturar(chave)
+        posicao = valor & mascara
+        while True:
+            linha = int(linhas[posicao])
+            if linha == -1:
+                return -1
+            if int(hashes[posicao]) == valor:
+                return linha
+            posicao = (posicao + 1) & mascara
+
+    def _linha_marca(self, vehicle_type: VehicleType, brand_id: int) -> int:
+        linha = self._buscar_chave(_chave(TIPOS.index(vehicle_type), int(brand_id)))
+        if linha == -1:
+            raise _nao_encontrado(f"marca {brand_id}")
+        return linha
+
+    def _linha_modelo(self, vehicle_type: VehicleType, brand_id: int, model_id: int) -> int:
+        linha = self._buscar_chave(_chave(TIPOS.index(vehicle_type), int(brand_id), int(model_id)))
+        if linha == -1:
+            raise _nao_encontrado(f"modelo {brand_id}/{model_id}")
+        return linha - self._n_marcas
+
+    def _linha_unidade(self, vehicle_type: VehicleType, brand_id: int, model_id: int, year_id: str) -> int:
+        ano, combustivel = _codigo_ano(year_id)
+        linha = self._buscar_chave(_chave(TIPOS.index(vehicle_type), int(brand_id), int(model_id), ano, combustivel))
+        if linha == -1:
+            raise _nao_encontrado(f"ano {brand_id}/{model_id}/{year_id}")
+        return linha - self._n_marcas - self._n_modelos
+
+    def _linha_fipe(self, vehicle_type: VehicleType, fipe_code: str) -> int:
+        """Linha do modelo com o código FIPE"""
+        hashes, linhas = self._indice_fipe_hash, self._indice_fipe_linha
+        mascara = len(linhas) - 1
+        tipo = TIPOS.index(vehicle_type)
+        valor = _hash_texto(f"{tipo}:{fipe_code}")
+        posicao = valor & mascara
+        while True:
+            linha = int(linhas[posicao])
+            if linha == -1:
+                raise _nao_encontrado(f"código FIPE {fipe_code}")
+            if (
+                int(hashes[posicao]) == valor
+                and int(self._marcas_tipo[self._modelos_marca[linha]]) == tipo
+                and self._texto(self._modelos_fipe[linha]) == fipe_code
+            ):
+                return linha
+            posicao = (posicao + 1) & mascara
+
+    def _verificar_referencia(self, reference: Optional[int]) -> None:
+        if reference is not None and self.reference is not None and int(reference) != int(self.reference):
+            raise FipeAPIError(
+                f"Erro ao consultar API FIPE: referência {reference} não está no catálogo offline "
+                f"(disponível: {self.reference})",
+                status=404
+            )
+
+    def _anos(self, linha_modelo: int) -> List[Dict[str, str]]:
+        inicio = self._modelos_unidades_inicio[linha_modelo]
+        fim = self._modelos_unidades_inicio[linha_modelo + 1]
+        return [
+            {'code': self._texto(self._unidades_codigo[u]), 'name': self._texto(self._unidades_nome[u])}
+            for u in range(inicio, fim)
+        ]
+
+    def _detalhes(self, linha_unidade: int) -> Dict[str, Any]:
+        modelo = int(self._unidades_modelo[linha_unidade])
+        marca = int(self._modelos_marca[modelo])
+        combustivel = self._texto(self._unidades_combustivel[linha_unidade])
+        preco = int(self._unidades_preco[linha_unidade])
+        sigla = unicodedata.normalize('NFKD', combustivel[:1]).encode('ascii', 'ignore').decode().upper()
+        return {
+            'brand': self._texto(self._marcas_nome[marca]),
+            'codeFipe': self._texto(self._modelos_fipe[modelo]),
+            'fuel': combustivel,
+            'fuelAcronym': sigla,
+            'model': self._texto(self._modelos_nome[modelo]),
+            'modelYear': int(self._unidades_ano_modelo[linha_unidade]),
+            'price': formatar_reais(preco) if preco >= 0 else '',
+            'priceHistory': [],
+            'referenceMonth': self.meta.get('referencia'),
+            'vehicleType': int(self._marcas_tipo[marca]) + 1,
+        }
+
+    def iter_modelos(self) -> Iterator[Tuple[VehicleType, Dict[str, str], Dict[str, str], str, List[Dict[str, str]]]]:
+        """
+        Percorre o catálogo inteiro, modelo a modelo
+
+        Yields:
+            (tipo, marca {'code', 'name'}, modelo {'code', 'name'}, código FIPE, anos)
+        """
+        nomes_marcas = [self._texto(i) for i in self._marcas_nome]
+        for modelo in range(self._n_modelos):
+            marca = int(self._modelos_marca[modelo])
+            yield (
+                TIPOS[int(self._marcas_tipo[marca])],
+                {'code': str(int(self._marcas_codigo[marca])), 'name': nomes_marcas[marca]},
+                {'code': str(int(self._modelos_codigo[modelo])), 'name': self._texto(self._modelos_nome[modelo])},
+                self._texto(self._modelos_fipe[modelo]),
+                self._anos(modelo),
+            )
+
+    # ----- interface de FipeClient -----
+
+    def get_references(self) -> List[Dict[str, str]]:
+        """Referência do catálogo (única)"""
+        return [{'code': str(self.reference), 'month': self.meta.get('referencia')}]
+
+    def get_brands(
+        self,
+        vehicle_type: VehicleType = VehicleType.CARS,
+        reference: Optional[int] = None
+    ) -> List[Brand]:
+        """Marcas do tipo de veículo (ver FipeClient.get_brands)"""
+        self._verificar_referencia(reference)
+        tipo = TIPOS.index(vehicle_type)
+        inicio, fim = self._tipos_marcas_inicio[tipo], self._tipos_marcas_inicio[tipo + 1]
+        return [
+            Brand({'code': str(int(self._marcas_codigo[i])), 'name': self._texto(self._marcas_nome[i])})
+            for i in range(inicio, fim)
+        ]
+
+    def get_models(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        reference: Optional[int] = None
+    ) -> List[Model]:
+        """Modelos da marca (ver FipeClient.get_models)"""
+        self._verificar_referencia(reference)
+        marca = self._linha_marca(vehicle_type, brand_id)
+        inicio, fim = self._marcas_modelos_inicio[marca], self._marcas_modelos_inicio[marca + 1]
+        return [
+            Model({'code': str(int(self._modelos_codigo[i])), 'name': self._texto(self._modelos_nome[i])})
+            for i in range(inicio, fim)
+        ]
+
+    def get_years_by_brand(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        reference: Optional[int] = None
+    ) -> List[YearEntry]:
+        """Anos com algum modelo da marca (ver FipeClient.get_years_by_brand)"""
+        self._verificar_referencia(reference)
+        marca = self._linha_marca(vehicle_type, brand_id)
+        anos = {}
+        for modelo in range(self._marcas_modelos_inicio[marca], self._marcas_modelos_inicio[marca + 1]):
+            for ano in self._anos(modelo):
+                anos.setdefault(ano['code'], ano)
+        return [YearEntry(ano) for ano in sorted(anos.values(), key=lambda a: _codigo_ano(a['code']), reverse=True)]
+
+    def get_years_by_model(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        model_id: int,
+        reference: Optional[int] = None
+    ) -> List[YearEntry]:
+        """Anos do modelo (ver FipeClient.get_years_by_model)"""
+        self._verificar_referencia(reference)
+        return [YearEntry(ano) for ano in self._anos(self._linha_modelo(vehicle_type, brand_id, model_id))]
+
+    def get_models_by_brand_and_year(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        year_id: str,
+        reference: Optional[int] = None
+    ) -> List[Model]:
+        """Modelos da marca disponíveis no ano (ver FipeClient.get_models_by_brand_and_year)"""
+        self._verificar_referencia(reference)
+        marca = self._linha_marca(vehicle_type, brand_id)
+        ano, combustivel = _codigo_ano(year_id)
+        modelos = []
+        for modelo in range(self._marcas_modelos_inicio[marca], self._marcas_modelos_inicio[marca + 1]):
+            inicio, fim = self._modelos_unidades_inicio[modelo], self._modelos_unidades_inicio[modelo + 1]
+            if np.any(
+                (self._unidades_ano[inicio:fim] == ano) & (self._unidades_combustivel_codigo[inicio:fim] == combustivel)
+            ):
+                modelos.append(Model({
+                    'code': str(int(self._modelos_codigo[modelo])), 'name': self._texto(self._modelos_nome[modelo])
+                }))
+        return modelos
+
+    def get_years_by_fipe_code(
+        self,
+        vehicle_type: VehicleType,
+        fipe_code: str,
+        reference: Optional[int] = None
+    ) -> List[YearEntry]:
+        """Anos do modelo com o código FIPE (ver FipeClient.get_years_by_fipe_code)"""
+        self._verificar_referencia(reference)
+        return [YearEntry(ano) for ano in self._anos(self._linha_fipe(vehicle_type, fipe_code))]
+
+    def get_vehicle_details(
+        self,
+        vehicle_type: VehicleType,
+        fipe_code: str,
+        year_id: str,
+        reference: Optional[int] = None
+    ) -> VehicleDetails:
+        """Detalhes e preço pelo código FIPE (ver FipeClient.get_vehicle_details)"""
+        self._verificar_referencia(reference)
+        modelo = self._linha_fipe(vehicle_type, fipe_code)
+        marca = int(self._modelos_marca[modelo])
+        return self.get_vehicle_details_by_model(
+            vehicle_type, int(self._marcas_codigo[marca]), int(self._modelos_codigo[modelo]), year_id
+        )
+
+    def get_vehicle_details_by_model(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        model_id: int,
+        year_id: str,
+        reference: Optional[int] = None
+    ) -> VehicleDetails:
+        """Detalhes e preço por marca/modelo/ano (ver FipeClient.get_vehicle_details_by_model)"""
+        self._verificar_referencia(reference)
+        return VehicleDetails(self._detalhes(self._linha_unidade(vehicle_type, brand_id, model_id, year_id)))
+
+    def get_vehicle_history(
+        self,
+        vehicle_type: VehicleType,
+        fipe_code: str,
+        year_id: str,
+        reference: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """O catálogo guarda apenas a referência em que foi gerado"""
+        raise FipeAPIError(
+            "Erro ao consultar API FIPE: histórico de preços não disponível no catálogo offline", status=404
+        )
@@ -0,0 +1,241 @@
+"""
+Linha de comando da API FIPE
+Subcomandos:
+    crawl    busca a tabela de preços de um tipo de veículo (com journal e cache)
+    lookup   consulta um código FIPE (na API ou em um catálogo offline)
+    export   converte arquivos .jsonl gerados pelo crawl/shards em csv, excel, html, json ou parquet
+    refresh  atualiza um snapshot para a referência mais recente
+
+Os módulos pesados (pandas, openpyxl, pyarrow, numpy) são importados apenas pelos
+subcomandos que precisam deles, de modo que `lookup` inicia rapidamente em
+scripts e cron jobs.
+
+Uso:
+    python fipe_cli.py lookup 004278-1 2014-3
+    python fipe_cli.py lookup 004278-1 --catalogo catalogo_fipe --json
+    python fipe_cli.py crawl --tipo motorcycles --saida motos.jsonl
+    python fipe_cli.py export motos.jsonl --formato csv excel html --saida motos.csv
+    python fipe_cli.py refresh snapshot_carros.jsonl --delta delta.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+
+TIPOS = ('cars', 'motorcycles', 'trucks')
+
+
+def _cliente(args: argparse.Namespace, rate_limiter: bool = False):
+    """FipeClient configurado a partir das opções comuns"""
+    from fipe_client import FipeClient
+
+    cache = None
+    if args.cache:
+        from fipe_cache import SQLiteCache
+        cache = SQLiteCache(args.cache)
+
+    limitador = None
+    if rate_limiter:
+        from fipe_rate_limit import RateLimiter
+        limitador = RateLimiter.para_token(args.token, esperar_janela=True)
+
+    return FipeClient(args.token, cache=cache, rate_limiter=limitador, base_url=args.base_url)
+
+
+def _referencia(client, args: argparse.Namespace) -> int:
+    """Referência pedida ou a mais recente (fixada para o cache não expirar)"""
+    if args.reference is not None:
+        return args.reference
+    return int(client.get_references()[0]['code'])
+
+
+def comando_crawl(args: argparse.Namespace) -> int:
+    from criar_tabela_carros import EstadoBusca, LinhaPreco, iter_todos_precos
+    from fipe_client import VehicleType
+    from fipe_rate_limit import QuotaExceededError
+    from fipe_resolver import FipeCodeResolver
+    from fipe_sinks import CsvSink, JsonlSink, gravar_em_sinks
+
+    vehicle_type = VehicleType(args.tipo)
+    client = _cliente(args, rate_limiter=True)
+    reference = _referencia(client, args)
+    saida = args.saida or f'todos_{args.tipo}_precos_{reference}.jsonl'
+    journal = args.journal or f'{os.path.splitext(saida)[0]}.journal.jsonl'
+    print(f"Referência utilizada: {reference}; saída: {saida}; journal: {journal}")
+
+    if saida.endswith('.csv'):
+        sink = CsvSink(saida, LinhaPreco.COLUNAS)
+    else:
+        sink = JsonlSink(saida)
+
+    resolver = FipeCodeResolver(client, args.codigos) if args.codigos else None
+    estado = EstadoBusca()
+    try:
+        linhas = iter_todos_precos(
+            client,
+            limite_marcas=args.limite_marcas,
+            limite_modelos_por_marca=args.limite_modelos,
+            limite_anos_por_modelo=args.limite_anos,
+            max_requisicoes=args.max_requisicoes,
+            reference=reference,
+            journal=journal,
+            resolver=resolver,
+            vehicle_type=vehicle_type,
+            estado=estado
+        )
+        total = gravar_em_sinks(linhas, sink)
+    except QuotaExceededError as e:
+        print(f"Busca incompleta ({e}); execute novamente para continuar do journal {journal}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print(f"Busca interrompida; execute novamente para continuar do journal {journal}", file=sys.stderr)
+        return 130
+    finally:
+        if resolver is not None:
+            resolver.close()
+
+    if args.metricas:
+        with open(args.metricas, 'w', encoding='utf-8') as f:
+            f.write(client.metrics.to_json())
+    print(f"{total} veículos gravados em {saida}")
+    if not estado.completa:
+        print(f"Busca incompleta ({estado.motivo}); execute novamente para continuar do journal {journal}",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+def comando_lookup(args: argparse.Namespace) -> int:
+    from fipe_client import FipeAPIError, VehicleType
+
+    vehicle_type = VehicleType(args.tipo)
+    if args.catalogo:
+        from fipe_catalogo import OfflineFipeClient
+        client = OfflineFipeClient(args.catalogo)
+    else:
+        client = _cliente(args)
+
+    try:
+        if args.ano:
+            resultado = client.get_vehicle_details(vehicle_type, args.codigo_fipe, args.ano, args.reference)
+        else:
+            resultado = client.get_years_by_fipe_code(vehicle_type, args.codigo_fipe, args.reference)
+    except FipeAPIError as e:
+        print(e, file=sys.stderr)
+        return 2 if e.status == 404 else 1
+
+    if args.json:
+        dados = resultado.to_dict() if args.ano else [ano.to_dict() for ano in resultado]
+        print(json.dumps(dados, ensure_ascii=False))
+    elif args.ano:
+        print(f"{resultado.brand} {resultado.model} {resultado.model_year} {resultado.fuel}: "
+              f"{resultado.price} ({resultado.reference_month})")
+    else:
+        for ano in resultado:
+            print(f"{ano.code}\t{ano.name}")
+    return 0
+
+
+def comando_export(args: argparse.Namespace) -> int:
+    from criar_tabela_carros import FORMATOS_EM_FLUXO, exportar_tabela, precos_para_exibicao, sinks_para_formatos
+    from fipe_shards import mesclar_partes
+    from fipe_sinks import gravar_em_sinks
+
+    df = mesclar_partes(args.entradas)
+    # csv, excel e html são gravados juntos, em uma única passada pela tabela
+    em_fluxo = [formato for formato in dict.fromkeys(args.formato) if formato in FORMATOS_EM_FLUXO]
+    if em_fluxo:
+        sinks = sinks_para_formatos(em_fluxo, args.saida, list(df.columns), args.linhas_por_pagina)
+        linhas = precos_para_exibicao(df).itertuples(index=False, name=None)
+        gravar_em_sinks(linhas, *sinks)
+        for sink in sinks:
+            print(f"Tabela exportada para {sink.arquivo}")
+    for formato in dict.fromkeys(args.formato):
+        if formato not in FORMATOS_EM_FLUXO:
+            exportar_tabela(df, formato=formato, arquivo=args.saida)
+    return 0
+
+
+def comando_refresh(args: argparse.Namespace) -> int:
+    from fipe_client import VehicleType
+    from fipe_refresh import atualizar_incremental
+    from fipe_resolver import FipeCodeResolver
+
+    client = _cliente(args, rate_limiter=True)
+    resolver = FipeCodeResolver(client, args.codigos) if args.codigos else None
+    try:
+        atualizar_incremental(
+            client,
+            args.snapshot,
+            delta=args.delta,
+            vehicle_type=VehicleType(args.tipo),
+            resolver=resolver,
+            verificar_precos=args.verificar_precos,
+            limite_marcas=args.limite_marcas
+        )
+    finally:
+        if resolver is not None:
+            resolver.close()
+    return 0
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='fipe', description="Consultas e buscas na tabela FIPE")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    api = argparse.ArgumentParser(add_help=False)
+    api.add_argument('--tipo', choices=TIPOS, default='cars', help="tipo de veículo")
+    api.add_argument('--reference', type=int, help="referência (padrão: a mais recente)")
+    api.add_argument('--token', default=os.environ.get('FIPE_SUBSCRIPTION_TOKEN'),
+                     help="token de assinatura (padrão: $FIPE_SUBSCRIPTION_TOKEN)")
+    api.add_argument('--base-url', help="URL base da API (ex: servidor de fipe_mock_server)")
+    api.add_argument('--cache', default='fipe_cache.sqlite', help="cache SQLite das respostas ('' = sem cache)")
+
+    crawl = subparsers.add_parser('crawl', parents=[api], help="busca a tabela de preços completa")
+    crawl.add_argument('--saida', help="arquivo .jsonl ou .csv (padrão: todos_<tipo>_precos_<referência>.jsonl)")
+    crawl.add_argument('--journal', help="journal para retomar a busca (padrão: <saida>.journal.jsonl)")
+    crawl.add_argument('--codigos', default='fipe_codigos.sqlite', help="tabela modelo -> código FIPE")
+    crawl.add_argument('--limite-marcas', type=int)
+    crawl.add_argument('--limite-modelos', type=int)
+    crawl.add_argument('--limite-anos', type=int)
+    crawl.add_argument('--max-requisicoes', type=int)
+    crawl.add_argument('--metricas', help="grava as métricas do cliente em JSON")
+    crawl.set_defaults(funcao=comando_crawl)
+
+    lookup = subparsers.add_parser('lookup', parents=[api], help="consulta um código FIPE")
+    lookup.add_argument('codigo_fipe', help="código FIPE (ex: 004278-1)")
+    lookup.add_argument('ano', nargs='?', help="ID do ano (ex: 2014-3); sem ele, lista os anos")
+    lookup.add_argument('--catalogo', help="consulta o catálogo offline (fipe_catalogo) em vez da API")
+    lookup.add_argument('--json', action='store_true', help="saída em JSON")
+    lookup.set_defaults(funcao=comando_lookup)
+
+    export = subparsers.add_parser('export', help="converte arquivos .jsonl de preços")
+    export.add_argument('entradas', nargs='+', help="arquivos .jsonl (crawl ou partes de fipe_shards)")
+    export.add_argument('--formato', nargs='+', choices=('csv', 'excel', 'html', 'json', 'parquet'),
+                        default=['csv'], help="um ou mais formatos")
+    export.add_argument('--saida', default='carros_fipe.csv', help="nome base; a extensão segue o formato")
+    export.add_argument('--linhas-por-pagina', type=int, help="pagina o HTML (padrão: uma única página)")
+    export.set_defaults(funcao=comando_export)
+
+    refresh = subparsers.add_parser('refresh', parents=[api], help="atualiza um snapshot para a referência mais recente")
+    refresh.add_argument('snapshot', help="arquivo do snapshot (.jsonl); criado se não existir")
+    refresh.add_argument('--delta', help="grava o delta em JSON")
+    refresh.add_argument('--codigos', default='fipe_codigos.sqlite', help="tabela modelo -> código FIPE")
+    refresh.add_argument('--verificar-precos', action='store_true',
+                         help="consulta também o preço dos veículos mantidos (uma requisição por veículo)")
+    refresh.add_argument('--limite-marcas', type=int)
+    refresh.set_defaults(funcao=comando_refresh)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = criar_parser().parse_args(argv)
+    return args.funcao(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
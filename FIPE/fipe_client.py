@@ -3,10 +3,63 @@ Cliente Python para a API FIPE
 Documentação: https://deividfortuna.github.io/fipe/v2/
 """
 
+import threading
+import time
 import requests
-from typing import Optional, List, Dict, Any
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Union, Callable, Iterable, Iterator, NamedTuple, Tuple
 from enum import Enum
 
+from fipe_cache import MemoryCache, ResponseCache, cache_key, endpoint_template
+from fipe_metrics import ClientMetrics
+from fipe_prefetch import Prefetcher
+from fipe_rate_limit import (
+    STATUS_REPETIVEIS, AdaptiveConcurrencyLimiter, Ficha, QuotaExceededError, RateLimiter,
+    espera_nova_tentativa, interpretar_retry_after
+)
+from fipe_records import Brand, Model, VehicleDetails, YearEntry, loads, tipar
+
+
+class FipeAPIError(Exception):
+    """Erro em uma consulta à API FIPE"""
+    
+    def __init__(
+        self,
+        mensagem: str,
+        status: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        url: Optional[str] = None
+    ):
+        """
+        Args:
+            mensagem: Descrição do erro
+            status: Código HTTP da resposta (None = sem resposta, ex: falha de conexão)
+            retry_after: Espera pedida pelo servidor (Retry-After, em segundos)
+            url: URL consultada
+        """
+        super().__init__(mensagem)
+        self.status = status
+        self.retry_after = retry_after
+        self.url = url
+
+
+class _ChamadaEmVoo:
+    """Requisição em andamento compartilhada pelas chamadas idênticas simultâneas"""
+    
+    __slots__ = ('evento', 'resultado', 'erro')
+    
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado: Any = None
+        self.erro: Optional[BaseException] = None
+    
+    def aguardar(self) -> Any:
+        self.evento.wait()
+        if self.erro is not None:
+            raise self.erro
+        return self.resultado
+
 
 class VehicleType(Enum):
     """Tipos de veículos suportados pela API FIPE"""
@@ -15,19 +68,82 @@ class VehicleType(Enum):
     TRUCKS = "trucks"
 
 
+class DetailsResult(NamedTuple):
+    """Resultado de um item de get_vehicle_details_many"""
+    fipe_code: str
+    year_id: str
+    details: Optional[VehicleDetails]
+    error: Optional[Exception]
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 class FipeClient:
     """Cliente para consultar a API FIPE"""
     
     BASE_URL = "https://fipe.parallelum.com.br/api/v2"
     
-    def __init__(self, subscription_token: Optional[str] = None):
+    # Falhas sem resposta que indicam sobrecarga e são repetidas (ver _sobrecarga)
+    ERROS_DE_CONEXAO = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    
+    def __init__(
+        self,
+        subscription_token: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        memory_cache: Union[MemoryCache, bool] = True,
+        rate_limiter: Optional[RateLimiter] = None,
+        base_url: Optional[str] = None,
+        metrics: Optional[ClientMetrics] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 60.0,
+        prefetch: Union[Prefetcher, bool] = False
+    ):
         """
         Inicializa o cliente FIPE
         
         Args:
             subscription_token: Token de assinatura (opcional, aumenta limite de requisições)
+            cache: Cache persistente de respostas (opcional, ex: SQLiteCache)
+            memory_cache: Cache LRU em memória. True = cache com capacidades padrão,
+                False = desativado, ou uma instância de MemoryCache configurada
+            rate_limiter: Limitador de ritmo e de cota diária (opcional, ex:
+                RateLimiter.para_token(subscription_token)). Apenas requisições que
+                chegam à rede consomem cota
+            base_url: URL base da API (padrão: BASE_URL; ex: servidor local de
+                fipe_mock_server para testes e benchmarks)
+            metrics: Métricas do cliente (padrão: uma nova ClientMetrics, em client.metrics)
+            concurrency_limiter: Limite adaptativo de requisições simultâneas entre as
+                threads que compartilham o cliente (opcional)
+            max_retries: Novas tentativas após 429, 5xx ou falha de conexão
+            backoff_base: Espera base (segundos) do backoff exponencial com jitter
+            backoff_max: Maior espera (segundos); um Retry-After maior encerra as tentativas
+            prefetch: Pré-busca em segundo plano do próximo nível do catálogo (modelos
+                das marcas listadas, anos dos modelos listados). True = Prefetcher com
+                valores padrão, ou uma instância de Prefetcher configurada
         """
         self.subscription_token = subscription_token
+        self.cache = cache
+        if memory_cache is True:
+            memory_cache = MemoryCache()
+        self.memory_cache: Optional[MemoryCache] = memory_cache or None
+        self.rate_limiter = rate_limiter
+        self.base_url = (base_url or self.BASE_URL).rstrip('/')
+        self.metrics = metrics if metrics is not None else ClientMetrics()
+        self.hooks: Dict[str, List[Callable]] = {'pre_request': [], 'post_request': []}
+        self.concurrency_limiter = concurrency_limiter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        if prefetch is True:
+            prefetch = Prefetcher()
+        self.prefetch: Optional[Prefetcher] = prefetch or None
+        # Requisições em andamento por chave de cache (single-flight)
+        self._em_voo: Dict[str, _ChamadaEmVoo] = {}
+        self._lock_em_voo = threading.Lock()
         self.session = requests.Session()
         
         # Configura headers padrão
@@ -45,24 +161,358 @@ class FipeClient:
         """
         Faz uma requisição GET para a API
         
+        Respostas já guardadas no cache em memória ou no cache persistente são
+        devolvidas sem acessar a rede. Respostas com referência explícita nunca
+        expiram. Chamadas idênticas simultâneas (mesmo endpoint e parâmetros, de
+        threads diferentes) compartilham uma única requisição e o mesmo resultado.
+        Respostas 429/5xx e falhas de conexão são repetidas até max_retries
+        vezes, com backoff exponencial e respeitando Retry-After.
+        
         Args:
             endpoint: Endpoint da API (sem a base URL)
             params: Parâmetros da query string
             
         Returns:
-            Resposta JSON da API
+            Resposta da API convertida em registros (fipe_records.tipar); nos
+            acertos de cache, os mesmos registros guardados, sem cópia
             
         Raises:
-            requests.RequestException: Em caso de erro na requisição
+            FipeAPIError: Em caso de erro na requisição (após as novas tentativas)
+            QuotaExceededError: Se a cota diária estiver esgotada (rate_limiter sem esperar_janela)
         """
-        url = f"{self.BASE_URL}/{endpoint}"
+        chave = cache_key(endpoint, params, self.base_url)
+        template = endpoint_template(endpoint)
+        
+        if self.memory_cache is not None:
+            cached = self.memory_cache.get(chave, template)
+            if cached is not None:
+                self.metrics.registrar_cache(template, 'memoria')
+                return cached
+        
+        with self._lock_em_voo:
+            chamada = self._em_voo.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = self._em_voo[chave] = _ChamadaEmVoo()
+        
+        if not lider:
+            self.metrics.registrar_cache(template, 'em_voo')
+            return chamada.aguardar()
         
+        return self._liderar(chamada, chave, template, endpoint, params)
+    
+    def _liderar(
+        self,
+        chamada: "_ChamadaEmVoo",
+        chave: str,
+        template: str,
+        endpoint: str,
+        params: Optional[Dict],
+        ficha: Optional[Ficha] = None
+    ) -> Dict[Any, Any]:
+        """Busca a chave registrada em _em_voo por esta chamada e entrega o resultado às que aguardam"""
+        reference = params.get('reference') if params else None
         try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Erro ao consultar API FIPE: {str(e)}")
+            chamada.resultado = self._buscar(chave, template, endpoint, params, reference, ficha)
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock_em_voo:
+                del self._em_voo[chave]
+            chamada.evento.set()
+        return chamada.resultado
+    
+    def _buscar(
+        self,
+        chave: str,
+        template: str,
+        endpoint: str,
+        params: Optional[Dict],
+        reference: Optional[Any],
+        ficha: Optional[Ficha] = None
+    ) -> Dict[Any, Any]:
+        """
+        Busca no cache persistente ou na rede (executado por uma única chamada por chave)
+        
+        ficha: Requisição já liberada pelo rate_limiter (tentar_acquire das
+        pré-buscas), usada na primeira tentativa ou devolvida se a resposta
+        estiver no cache persistente
+        """
+        if self.cache is not None:
+            cached = self.cache.get(chave)
+            if cached is not None:
+                cached = tipar(cached, template)
+                if ficha is not None:
+                    self.rate_limiter.devolver(ficha)
+                if self.memory_cache is not None:
+                    self.memory_cache.set(chave, template, cached, reference)
+                self.metrics.registrar_cache(template, 'persistente')
+                return cached
+        
+        self.metrics.registrar_cache(template, None)
+        
+        url = f"{self.base_url}/{endpoint}"
+        tentativa = 0
+        
+        while True:
+            if self.rate_limiter is not None and not (ficha is not None and tentativa == 0):
+                self.rate_limiter.acquire()
+            
+            for hook in self.hooks['pre_request']:
+                hook(template, url, params)
+            
+            if self.concurrency_limiter is not None:
+                self.concurrency_limiter.acquire()
+            response = None
+            erro = None
+            inicio = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params)
+                response.raise_for_status()
+                data = loads(response.content)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                erro = e
+            finally:
+                status = response.status_code if response is not None else None
+                if self.concurrency_limiter is not None:
+                    self.concurrency_limiter.release(
+                        time.perf_counter() - inicio, sobrecarga=self._sobrecarga(status, erro)
+                    )
+            self._registrar(template, url, params, inicio, response, erro)
+            
+            if erro is None:
+                break
+            
+            retry_after = interpretar_retry_after(response.headers.get('Retry-After')) if response is not None else None
+            espera = self._espera_apos_falha(url, tentativa, status, erro, retry_after)
+            self.metrics.registrar_retry(template)
+            time.sleep(espera)
+            tentativa += 1
+        
+        data = tipar(data, template)
+        if self.memory_cache is not None:
+            self.memory_cache.set(chave, template, data, reference)
+        if self.cache is not None:
+            self.cache.set(chave, data, permanente=reference is not None)
+        
+        return data
+    
+    def _sobrecarga(self, status: Optional[int], erro: Optional[Exception]) -> bool:
+        """Se a falha indica sobrecarga da API (429/5xx ou falha de conexão/timeout)"""
+        if erro is None:
+            return False
+        if status is None:
+            return isinstance(erro, self.ERROS_DE_CONEXAO)
+        return status in STATUS_REPETIVEIS
+    
+    def _espera_apos_falha(
+        self,
+        url: str,
+        tentativa: int,
+        status: Optional[int],
+        erro: Exception,
+        retry_after: Optional[float]
+    ) -> float:
+        """
+        Segundos até a nova tentativa de uma requisição que falhou (também usado
+        por AsyncFipeClient, com os seus ERROS_DE_CONEXAO)
+        
+        Raises:
+            FipeAPIError: Se a falha não deve ser repetida (tentativas esgotadas, erro
+                que não é sobrecarga ou Retry-After maior que backoff_max)
+        """
+        espera = None
+        if tentativa < self.max_retries and self._sobrecarga(status, erro):
+            espera = espera_nova_tentativa(tentativa, retry_after, self.backoff_base, self.backoff_max)
+        if espera is None:
+            raise FipeAPIError(
+                f"Erro ao consultar API FIPE: {str(erro)}", status=status, retry_after=retry_after, url=url
+            ) from erro
+        return espera
+    
+    def _registrar(
+        self,
+        template: str,
+        url: str,
+        params: Optional[Dict],
+        inicio: float,
+        response: Optional[requests.Response],
+        erro: Optional[Exception]
+    ) -> None:
+        """Registra a requisição nas métricas e chama os hooks post_request"""
+        duracao = time.perf_counter() - inicio
+        status = response.status_code if response is not None else None
+        self.metrics.registrar_requisicao(
+            template,
+            duracao,
+            bytes_recebidos=len(response.content) if response is not None else 0,
+            status=status,
+            erro=erro is not None
+        )
+        for hook in self.hooks['post_request']:
+            hook(template, url, params, status, duracao, erro)
+    
+    def add_hook(self, evento: str, funcao: Callable) -> None:
+        """
+        Registra uma função chamada a cada requisição que vai à rede
+        
+        Args:
+            evento: 'pre_request' -> funcao(template, url, params), antes do envio;
+                'post_request' -> funcao(template, url, params, status, duracao, erro),
+                após a resposta (erro é a exceção ou None; status é None sem resposta)
+            funcao: Função a chamar
+        """
+        if evento not in self.hooks:
+            raise ValueError(f"Evento inválido: {evento}. Use: {', '.join(self.hooks)}")
+        self.hooks[evento].append(funcao)
+    
+    def invalidate(self, reference: Optional[int] = None, latest: bool = False) -> int:
+        """
+        Remove respostas do cache em memória
+        
+        Args:
+            reference: Remove apenas as respostas desta referência
+            latest: Remove apenas as respostas do mês mais recente (sem referência)
+            Sem argumentos, remove tudo.
+            
+        Returns:
+            Número de entradas removidas
+        """
+        if self.memory_cache is None:
+            return 0
+        return self.memory_cache.invalidate(reference=reference, latest=latest)
+    
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Retorna hits, misses, tamanho e capacidade do cache em memória por tipo de consulta
+        """
+        if self.memory_cache is None:
+            return {}
+        return self.memory_cache.stats()
+    
+    def _situacao_pre_busca(self, chave: str, template: str, params: Optional[Dict]) -> Optional[str]:
+        """'em_cache' ou 'em_voo' se a pré-busca da chave é desnecessária; None se deve ir à rede"""
+        if self.memory_cache is not None and self.memory_cache.contem(chave, template):
+            return 'em_cache'
+        with self._lock_em_voo:
+            if chave in self._em_voo:
+                return 'em_voo'
+        if self.cache is not None:
+            cached = self.cache.get(chave)
+            if cached is not None:
+                cached = tipar(cached, template)
+                if self.memory_cache is not None:
+                    reference = params.get('reference') if params else None
+                    self.memory_cache.set(chave, template, cached, reference)
+                return 'em_cache'
+        return None
+    
+    def _aquecer(self, endpoint: str, params: Optional[Dict]) -> None:
+        """
+        Pré-busca uma resposta para os caches (executado nas threads do Prefetcher)
+        
+        Respostas já em cache ou em andamento não são buscadas de novo. Requisições
+        à rede consomem o orçamento do Prefetcher e só usam fichas ociosas do
+        rate_limiter, para não atrasar as consultas do usuário. A chave é registrada
+        em _em_voo só depois de obtida a ficha; se nesse meio-tempo a consulta do
+        usuário a buscou, a reserva e a ficha são devolvidas.
+        """
+        chave = cache_key(endpoint, params, self.base_url)
+        template = endpoint_template(endpoint)
+        
+        situacao = self._situacao_pre_busca(chave, template, params)
+        if situacao is not None:
+            self.prefetch.contar(situacao)
+            return
+        
+        reserva = self.prefetch.reservar(self)
+        if reserva is None:
+            self.prefetch.contar('sem_orcamento')
+            return
+        ficha = None
+        if self.rate_limiter is not None:
+            prazo = time.monotonic() + self.prefetch.espera_ficha
+            while True:
+                # Enquanto espera a ficha, a consulta do usuário pode ter buscado a chave
+                situacao = self._situacao_pre_busca(chave, template, params)
+                if situacao is not None:
+                    self.prefetch.devolver(reserva)
+                    self.prefetch.contar(situacao)
+                    return
+                ficha = self.rate_limiter.tentar_acquire()
+                if ficha is not None:
+                    break
+                if time.monotonic() >= prazo:
+                    self.prefetch.devolver(reserva)
+                    self.prefetch.contar('sem_ficha')
+                    return
+                time.sleep(0.05)
+        
+        with self._lock_em_voo:
+            if self.memory_cache is not None and self.memory_cache.contem(chave, template):
+                situacao = 'em_cache'
+            elif chave in self._em_voo:
+                situacao = 'em_voo'
+            else:
+                chamada = self._em_voo[chave] = _ChamadaEmVoo()
+        if situacao is not None:
+            if ficha is not None:
+                self.rate_limiter.devolver(ficha)
+            self.prefetch.devolver(reserva)
+            self.prefetch.contar(situacao)
+            return
+        
+        self.prefetch.contar('enviadas')
+        self._liderar(chamada, chave, template, endpoint, params, ficha)
+    
+    def _prefetch_modelos(
+        self,
+        vehicle_type: VehicleType,
+        brands: List[Brand],
+        reference: Optional[int]
+    ) -> None:
+        """Agenda os modelos das marcas mais prováveis (após get_brands)"""
+        codigos = self.prefetch.priorizar(
+            vehicle_type.value,
+            [brand.code for brand in brands],
+            self.prefetch.limite_marcas,
+            self.prefetch.marcas_prioritarias
+        )
+        params = {"reference": reference} if reference else None
+        for brand_id in codigos:
+            self.prefetch.agendar(self._aquecer, f"{vehicle_type.value}/brands/{brand_id}/models", params)
+    
+    def _prefetch_anos(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        models: List[Model],
+        reference: Optional[int]
+    ) -> None:
+        """Agenda os anos dos modelos mais prováveis da marca (após get_models)"""
+        codigos = self.prefetch.priorizar(
+            f"{vehicle_type.value}/{brand_id}",
+            [model.code for model in models],
+            self.prefetch.limite_modelos
+        )
+        params = {"reference": reference} if reference else None
+        for model_id in codigos:
+            self.prefetch.agendar(
+                self._aquecer, f"{vehicle_type.value}/brands/{brand_id}/models/{model_id}/years", params
+            )
+    
+    def close(self) -> None:
+        """Cancela as pré-buscas pendentes e fecha a sessão HTTP"""
+        if self.prefetch is not None:
+            self.prefetch.close()
+        self.session.close()
+    
+    def __enter__(self) -> "FipeClient":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
     
     def get_references(self) -> List[Dict[str, str]]:
         """
@@ -78,7 +528,7 @@ class FipeClient:
         self, 
         vehicle_type: VehicleType = VehicleType.CARS,
         reference: Optional[int] = None
-    ) -> List[Dict[str, str]]:
+    ) -> List[Brand]:
         """
         Retorna as marcas para o tipo de veículo
         
@@ -92,14 +542,17 @@ class FipeClient:
         """
         endpoint = f"{vehicle_type.value}/brands"
         params = {"reference": reference} if reference else None
-        return self._make_request(endpoint, params)
+        brands = self._make_request(endpoint, params)
+        if self.prefetch is not None:
+            self._prefetch_modelos(vehicle_type, brands, reference)
+        return brands
     
     def get_models(
         self,
         vehicle_type: VehicleType,
         brand_id: int,
         reference: Optional[int] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Model]:
         """
         Retorna os modelos para a marca
         
@@ -113,14 +566,19 @@ class FipeClient:
         """
         endpoint = f"{vehicle_type.value}/brands/{brand_id}/models"
         params = {"reference": reference} if reference else None
-        return self._make_request(endpoint, params)
+        if self.prefetch is not None:
+            self.prefetch.registrar_acesso(vehicle_type.value, brand_id)
+        models = self._make_request(endpoint, params)
+        if self.prefetch is not None:
+            self._prefetch_anos(vehicle_type, brand_id, models, reference)
+        return models
     
     def get_years_by_brand(
         self,
         vehicle_type: VehicleType,
         brand_id: int,
         reference: Optional[int] = None
-    ) -> List[Dict[str, str]]:
+    ) -> List[YearEntry]:
         """
         Retorna os anos disponíveis para a marca
         
@@ -142,7 +600,7 @@ class FipeClient:
         brand_id: int,
         model_id: int,
         reference: Optional[int] = None
-    ) -> List[Dict[str, str]]:
+    ) -> List[YearEntry]:
         """
         Retorna os anos disponíveis para o modelo
         
@@ -158,6 +616,8 @@ class FipeClient:
         """
         endpoint = f"{vehicle_type.value}/brands/{brand_id}/models/{model_id}/years"
         params = {"reference": reference} if reference else None
+        if self.prefetch is not None:
+            self.prefetch.registrar_acesso(f"{vehicle_type.value}/{brand_id}", model_id)
         return self._make_request(endpoint, params)
     
     def get_models_by_brand_and_year(
@@ -166,7 +626,7 @@ class FipeClient:
         brand_id: int,
         year_id: str,
         reference: Optional[int] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Model]:
         """
         Retorna os modelos disponíveis para marca e ano
         
@@ -188,7 +648,7 @@ class FipeClient:
         vehicle_type: VehicleType,
         fipe_code: str,
         reference: Optional[int] = None
-    ) -> List[Dict[str, str]]:
+    ) -> List[YearEntry]:
         """
         Retorna os anos disponíveis por código FIPE
         
@@ -210,7 +670,7 @@ class FipeClient:
         fipe_code: str,
         year_id: str,
         reference: Optional[int] = None
-    ) -> Dict[str, Any]:
+    ) -> VehicleDetails:
         """
         Retorna as informações da FIPE para o veículo (estimativa de preço)
         
@@ -236,13 +696,40 @@ class FipeClient:
         params = {"reference": reference} if reference else None
         return self._make_request(endpoint, params)
     
+    def get_vehicle_details_by_model(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        model_id: int,
+        year_id: str,
+        reference: Optional[int] = None
+    ) -> VehicleDetails:
+        """
+        Retorna as informações da FIPE para o veículo a partir de marca, modelo e ano
+        
+        Não exige conhecer o código FIPE: a resposta traz o código em 'codeFipe'.
+        
+        Args:
+            vehicle_type: Tipo de veículo
+            brand_id: ID da marca
+            model_id: ID do modelo
+            year_id: ID do ano (formato: "2014-3")
+            reference: Código de referência (opcional)
+            
+        Returns:
+            Dicionário com informações do veículo (mesmo formato de get_vehicle_details)
+        """
+        endpoint = f"{vehicle_type.value}/brands/{brand_id}/models/{model_id}/years/{year_id}"
+        params = {"reference": reference} if reference else None
+        return self._make_request(endpoint, params)
+    
     def get_vehicle_history(
         self,
         vehicle_type: VehicleType,
         fipe_code: str,
         year_id: str,
         reference: Optional[int] = None
-    ) -> Dict[str, Any]:
+    ) -> VehicleDetails:
         """
         Retorna o histórico de preços do veículo
         
@@ -258,6 +745,88 @@ class FipeClient:
         endpoint = f"{vehicle_type.value}/{fipe_code}/years/{year_id}/history"
         params = {"reference": reference} if reference else None
         return self._make_request(endpoint, params)
+    
+    def _detalhes_do_lote(
+        self,
+        vehicle_type: VehicleType,
+        fipe_code: str,
+        year_id: str,
+        reference: Optional[int]
+    ) -> DetailsResult:
+        try:
+            details = self.get_vehicle_details(vehicle_type, fipe_code, year_id, reference)
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            return DetailsResult(fipe_code, year_id, None, e)
+        return DetailsResult(fipe_code, year_id, details, None)
+    
+    def iter_vehicle_details_many(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        reference: Optional[int] = None,
+        vehicle_type: VehicleType = VehicleType.CARS,
+        max_workers: int = 8
+    ) -> Iterator[DetailsResult]:
+        """
+        Consulta vários veículos em paralelo, gerando os resultados na ordem de `pairs`
+        
+        Pares repetidos geram uma única consulta. As consultas são enviadas até
+        4 x max_workers posições à frente do item consumido, de modo que listas
+        muito grandes não ficam inteiras em memória como resultados pendentes.
+        O ritmo, a cota e as novas tentativas seguem o rate_limiter, o
+        concurrency_limiter e max_retries do cliente.
+        
+        Args:
+            pairs: (código FIPE, ID do ano) de cada veículo
+            reference: Código de referência (opcional)
+            vehicle_type: Tipo de veículo
+            max_workers: Consultas simultâneas
+            
+        Yields:
+            DetailsResult de cada par, com `details` ou o erro do item em `error`
+            
+        Raises:
+            QuotaExceededError: Se a cota diária se esgotar (interrompe o lote)
+        """
+        pares = [(str(fipe_code), str(year_id)) for fipe_code, year_id in pairs]
+        pendentes = Counter(pares)
+        janela = 4 * max_workers
+        futuros: Dict[Tuple[str, str], Future] = {}
+        proximo = 0
+        
+        executor = ThreadPoolExecutor(max_workers)
+        try:
+            for indice, par in enumerate(pares):
+                while proximo < min(len(pares), indice + janela):
+                    seguinte = pares[proximo]
+                    if seguinte not in futuros:
+                        futuros[seguinte] = executor.submit(
+                            self._detalhes_do_lote, vehicle_type, seguinte[0], seguinte[1], reference
+                        )
+                    proximo += 1
+                resultado = futuros[par].result()
+                pendentes[par] -= 1
+                if not pendentes[par]:
+                    del futuros[par]
+                yield resultado
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def get_vehicle_details_many(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        reference: Optional[int] = None,
+        vehicle_type: VehicleType = VehicleType.CARS,
+        max_workers: int = 8
+    ) -> List[DetailsResult]:
+        """
+        Consulta vários veículos em paralelo (ver iter_vehicle_details_many)
+        
+        Returns:
+            Um DetailsResult por par, na ordem de `pairs`
+        """
+        return list(self.iter_vehicle_details_many(pairs, reference, vehicle_type, max_workers))
 
 
 # Funções de conveniência para uso direto
@@ -271,7 +840,7 @@ def get_brands(
     vehicle_type: VehicleType = VehicleType.CARS,
     reference: Optional[int] = None,
     subscription_token: Optional[str] = None
-) -> List[Dict[str, str]]:
+) -> List[Brand]:
     """Função de conveniência para obter marcas"""
     client = FipeClient(subscription_token)
     return client.get_brands(vehicle_type, reference)
@@ -283,7 +852,7 @@ def get_vehicle_price(
     year_id: str,
     reference: Optional[int] = None,
     subscription_token: Optional[str] = None
-) -> Dict[str, Any]:
+) -> VehicleDetails:
     """Função de conveniência para obter preço do veículo"""
     client = FipeClient(subscription_token)
     return client.get_vehicle_details(vehicle_type, fipe_code, year_id, reference)
@@ -0,0 +1,318 @@
+"""
+Histórico de preços FIPE em arrays
+Os históricos (get_vehicle_history) de muitos veículos são buscados em lote e
+guardados em uma matriz veículos x meses de centavos (int64, SEM_PRECO = mês
+sem preço), com as colunas de identificação (tipo, código FIPE, ano, marca,
+modelo) em arrays paralelos. As análises (variação mensal, taxa de depreciação,
+faixas de percentis por marca/modelo) são operações vetorizadas sobre a frota
+inteira, com os meses sem preço mascarados como NaN; a conversão para reais
+fica para a exibição (fipe_records.formatar_reais).
+
+Uso:
+    historico = buscar_historicos(client, veiculos_do_catalogo(OfflineFipeClient('catalogo_fipe')))
+    historico.salvar('historico_fipe.npz')
+    historico.depreciacao_por_grupo('marca')
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from fipe_client import FipeAPIError, FipeClient, VehicleType
+from fipe_rate_limit import QuotaExceededError
+from fipe_records import centavos
+
+
+# Valor da matriz de preços nos meses sem preço (como em fipe_catalogo)
+SEM_PRECO = -1
+
+# Colunas de identificação de cada linha (veículo)
+COLUNAS_VEICULO = ('tipo', 'codigo_fipe', 'ano', 'marca', 'modelo')
+
+# Agrupamentos aceitos pelas análises por grupo
+GRUPOS = {
+    'tipo': ('tipo',),
+    'marca': ('tipo', 'marca'),
+    'modelo': ('tipo', 'marca', 'modelo'),
+}
+
+
+def veiculos_do_catalogo(
+    catalogo: Any,
+    tipos: Optional[Sequence[VehicleType]] = None
+) -> Iterator[Tuple[VehicleType, str, str]]:
+    """
+    Todos os (tipo, código FIPE, ano) de um catálogo offline (fipe_catalogo)
+
+    Args:
+        catalogo: OfflineFipeClient
+        tipos: Tipos de veículo a incluir (None = todos)
+    """
+    for vehicle_type, _, _, codigo_fipe, anos in catalogo.iter_modelos():
+        if tipos is None or vehicle_type in tipos:
+            for ano in anos:
+                yield vehicle_type, codigo_fipe, ano['code']
+
+
+class HistoricoPrecos:
+    """
+    Séries de preço de uma frota: uma linha por veículo, uma coluna por mês
+
+    Attributes:
+        referencias: Códigos de referência (meses) em ordem crescente
+        meses: Nome de cada mês ("outubro de 2026")
+        precos: Matriz (veículos x meses) em centavos (int64); SEM_PRECO onde não há preço
+        colunas: {coluna de COLUNAS_VEICULO: array com um valor por veículo}
+    """
+
+    def __init__(
+        self,
+        referencias: Sequence[int],
+        meses: Sequence[str],
+        precos: np.ndarray,
+        colunas: Dict[str, Sequence[str]]
+    ):
+        self.referencias = np.asarray(referencias, dtype=np.int32)
+        self.meses = np.asarray(meses, dtype=str)
+        self.precos = np.asarray(precos, dtype=np.int64)
+        self.colunas = {coluna: np.asarray(colunas[coluna], dtype=str) for coluna in COLUNAS_VEICULO}
+        if self.precos.shape != (len(self.colunas['codigo_fipe']), len(self.referencias)):
+            raise ValueError(
+                f"Matriz de preços {self.precos.shape} incompatível com "
+                f"{len(self.colunas['codigo_fipe'])} veículos x {len(self.referencias)} meses"
+            )
+
+    def __len__(self) -> int:
+        return self.precos.shape[0]
+
+    @classmethod
+    def de_respostas(cls, respostas: Iterable[Tuple[VehicleType, str, Dict[str, Any]]]) -> "HistoricoPrecos":
+        """
+        Monta a matriz a partir de respostas de get_vehicle_history
+
+        Args:
+            respostas: (tipo, id do ano, resposta) de cada veículo
+        """
+        linhas: List[Dict[str, Any]] = []
+        meses: Dict[int, str] = {}
+        for vehicle_type, year_id, resposta in respostas:
+            serie = {}
+            for entrada in resposta.get('priceHistory') or ():
+                referencia = int(entrada['reference'])
+                meses.setdefault(referencia, entrada.get('month', ''))
+                preco = centavos(entrada.get('price'))
+                if preco is not None:
+                    serie[referencia] = preco
+            linhas.append({
+                'tipo': vehicle_type.value,
+                'codigo_fipe': resposta.get('codeFipe', ''),
+                'ano': year_id,
+                'marca': resposta.get('brand', ''),
+                'modelo': resposta.get('model', ''),
+                'serie': serie,
+            })
+
+        referencias = sorted(meses)
+        coluna = {referencia: i for i, referencia in enumerate(referencias)}
+        precos = np.full((len(linhas), len(referencias)), SEM_PRECO, dtype=np.int64)
+        for i, linha in enumerate(linhas):
+            if linha['serie']:
+                indices = [coluna[r] for r in linha['serie']]
+                precos[i, indices] = list(linha['serie'].values())
+
+        return cls(
+            referencias,
+            [meses[r] for r in referencias],
+            precos,
+            {c: [linha[c] for linha in linhas] for c in COLUNAS_VEICULO}
+        )
+
+    # ----- persistência -----
+
+    def salvar(self, caminho: str) -> None:
+        """Grava os arrays em um arquivo .npz"""
+        np.savez(
+            caminho,
+            referencias=self.referencias,
+            meses=self.meses,
+            precos=self.precos,
+            **{f'coluna_{c}': v for c, v in self.colunas.items()}
+        )
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "HistoricoPrecos":
+        """Lê um arquivo gravado por salvar"""
+        with np.load(caminho) as dados:
+            return cls(
+                dados['referencias'],
+                dados['meses'],
+                dados['precos'],
+                {c: dados[f'coluna_{c}'] for c in COLUNAS_VEICULO}
+            )
+
+    def para_dataframe(self):
+        """Tabela larga (uma coluna por mês, preços em centavos Int64), para exportação"""
+        import pandas as pd
+
+        df = pd.DataFrame(self.colunas)
+        meses = pd.DataFrame(self.precos, columns=[str(r) for r in self.referencias]).astype('Int64')
+        meses = meses.mask(self.precos == SEM_PRECO)
+        return pd.concat([df, meses], axis=1)
+
+    # ----- análises -----
+
+    def _mascarados(self) -> np.ndarray:
+        """Preços em centavos como float64, com NaN nos meses sem preço"""
+        return np.where(self.precos == SEM_PRECO, np.nan, self.precos.astype(np.float64))
+
+    def _extremos(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Índice do primeiro e do último mês com preço de cada veículo (-1 se nenhum)"""
+        validos = self.precos != SEM_PRECO
+        tem_preco = validos.any(axis=1)
+        primeiro = np.where(tem_preco, validos.argmax(axis=1), -1)
+        ultimo = np.where(tem_preco, validos.shape[1] - 1 - validos[:, ::-1].argmax(axis=1), -1)
+        return primeiro, ultimo
+
+    def variacao_mensal(self) -> np.ndarray:
+        """
+        Variação relativa de cada coluna para a seguinte, por mês (veículos x meses-1)
+
+        Os códigos de referência avançam um por mês; quando há meses faltando entre
+        duas colunas, a variação é a taxa mensal composta equivalente:
+        (seguinte / anterior) ** (1 / meses) - 1. NaN sem os dois preços.
+        """
+        precos = self._mascarados()
+        intervalo = np.diff(self.referencias).astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.power(precos[:, 1:] / precos[:, :-1], 1 / intervalo) - 1
+
+    def taxa_depreciacao(self, anualizada: bool = True) -> np.ndarray:
+        """
+        Taxa de depreciação de cada veículo entre o primeiro e o último mês com preço
+
+        Taxa composta (positiva quando o preço cai): 1 - (último / primeiro) ** (1 / meses),
+        com os meses contados pelos códigos de referência, por mês ou anualizada
+        (12 meses). NaN para veículos com menos de dois preços.
+        """
+        if not self.precos.shape[1]:
+            return np.full(len(self), np.nan)
+        primeiro, ultimo = self._extremos()
+        linhas = np.arange(len(self))
+        meses = (self.referencias[ultimo] - self.referencias[primeiro]).astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            razao = self.precos[linhas, ultimo] / self.precos[linhas, primeiro].astype(np.float64)
+            periodos = (12.0 if anualizada else 1.0) / meses
+            taxa = 1 - np.power(razao, periodos)
+        taxa[(meses <= 0) | (primeiro < 0)] = np.nan
+        return taxa
+
+    def _grupos(self, por: str) -> Tuple[List[Tuple[str, ...]], np.ndarray]:
+        """Chaves distintas do agrupamento e o grupo de cada veículo"""
+        if por not in GRUPOS:
+            raise ValueError(f"Agrupamento inválido: {por!r} (use {', '.join(GRUPOS)})")
+        colunas = [self.colunas[c] for c in GRUPOS[por]]
+        combinadas = np.char.add(colunas[0], '')
+        for coluna in colunas[1:]:
+            combinadas = np.char.add(np.char.add(combinadas, '\x1f'), coluna)
+        chaves, grupo = np.unique(combinadas, return_inverse=True)
+        return [tuple(chave.split('\x1f')) for chave in chaves], grupo.ravel()
+
+    def depreciacao_por_grupo(self, por: str = 'modelo', anualizada: bool = True) -> Dict[Tuple[str, ...], Dict[str, float]]:
+        """
+        Depreciação média e número de veículos por marca ou modelo
+
+        Args:
+            por: 'tipo', 'marca' ou 'modelo'
+            anualizada: Taxa anual (True) ou mensal
+
+        Returns:
+            {(tipo, marca[, modelo]): {'depreciacao_media', 'veiculos'}}
+        """
+        chaves, grupo = self._grupos(por)
+        taxa = self.taxa_depreciacao(anualizada)
+        validos = ~np.isnan(taxa)
+        quantidade = np.bincount(grupo[validos], minlength=len(chaves))
+        soma = np.bincount(grupo[validos], weights=taxa[validos], minlength=len(chaves))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = soma / quantidade
+        return {
+            chave: {'depreciacao_media': float(media[i]), 'veiculos': int(quantidade[i])}
+            for i, chave in enumerate(chaves)
+        }
+
+    def faixas_percentis(
+        self,
+        por: str = 'modelo',
+        percentis: Sequence[float] = (10, 50, 90)
+    ) -> Tuple[List[Tuple[str, ...]], np.ndarray]:
+        """
+        Faixas de preço de cada grupo, mês a mês
+
+        Args:
+            por: 'tipo', 'marca' ou 'modelo'
+            percentis: Percentis calculados sobre os veículos do grupo
+
+        Returns:
+            (chaves dos grupos, array grupos x percentis x meses em centavos,
+            interpolados; NaN sem preços)
+        """
+        chaves, grupo = self._grupos(por)
+        precos = self._mascarados()
+        # Início de cada grupo na ordem (grupo, preço); preços NaN ficam no fim do grupo
+        inicio = np.searchsorted(np.sort(grupo), np.arange(len(chaves)))
+        fracoes = np.asarray(percentis, dtype=np.float64)[:, None] / 100
+        faixas = np.full((len(chaves), len(percentis), len(self.referencias)), np.nan)
+        for mes in range(len(self.referencias)):
+            coluna = precos[:, mes]
+            ordenada = coluna[np.lexsort((coluna, grupo))]
+            contagem = np.bincount(grupo, weights=~np.isnan(coluna), minlength=len(chaves))
+            # Interpolação linear entre as posições vizinhas (como np.percentile)
+            posicao = np.maximum(contagem - 1, 0) * fracoes
+            abaixo = np.floor(posicao).astype(np.int64)
+            acima = np.ceil(posicao).astype(np.int64)
+            inferior = ordenada[inicio + abaixo]
+            superior = ordenada[inicio + acima]
+            valores = inferior + (superior - inferior) * (posicao - abaixo)
+            valores[:, contagem == 0] = np.nan
+            faixas[:, :, mes] = valores.T
+        return chaves, faixas
+
+
+def buscar_historicos(
+    client: FipeClient,
+    veiculos: Iterable[Tuple[VehicleType, str, str]],
+    reference: Optional[int] = None,
+    max_workers: int = 8
+) -> HistoricoPrecos:
+    """
+    Busca os históricos de vários veículos em paralelo e monta a matriz de preços
+
+    O ritmo e a cota continuam controlados pelo rate_limiter e pelo limitador
+    de concorrência do cliente; veículos sem histórico são ignorados.
+
+    Args:
+        client: Cliente FIPE (compartilhado entre as threads)
+        veiculos: (tipo, código FIPE, id do ano) de cada veículo
+        reference: Referência final dos históricos (None = mais recente)
+        max_workers: Requisições simultâneas
+
+    Returns:
+        HistoricoPrecos com um veículo por item de `veiculos` encontrado
+    """
+    veiculos = list(dict.fromkeys(veiculos))
+
+    def buscar(veiculo: Tuple[VehicleType, str, str]) -> Optional[Tuple[VehicleType, str, Dict[str, Any]]]:
+        vehicle_type, codigo_fipe, year_id = veiculo
+        try:
+            resposta = client.get_vehicle_history(vehicle_type, codigo_fipe, year_id, reference)
+        except QuotaExceededError:
+            raise
+        except FipeAPIError as e:
+            print(f"  ⚠ Histórico indisponível para {codigo_fipe} {year_id}: {e}")
+            return None
+        return vehicle_type, year_id, resposta
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        resultados = [r for r in executor.map(buscar, veiculos) if r is not None]
+    return HistoricoPrecos.de_respostas(resultados)
@@ -0,0 +1,166 @@
+"""
+Journal (write-ahead log) de buscas longas na API FIPE
+Cada unidade concluída (marca, modelo, ano) é gravada em disco assim que termina,
+permitindo retomar uma busca interrompida exatamente de onde parou.
+"""
+
+import json
+import os
+from typing import Optional, Dict, Any, Iterator, Set, Tuple
+
+
+class CrawlJournal:
+    """
+    Journal de progresso em formato JSON Lines
+
+    Tipos de registro:
+        - cabecalho: parâmetros da busca (referência e tipo de veículo), sempre a
+          primeira linha
+        - unidade: (marca, modelo, ano) concluída, com a linha da tabela (ou sem
+          linha, se o veículo não existe na referência)
+        - modelo: todos os anos do modelo foram obtidos
+        - marca: todos os modelos da marca foram obtidos
+
+    As linhas não são mantidas em memória: ao retomar, iter_linhas as relê do arquivo.
+    """
+
+    def __init__(self, caminho: str, reference: Optional[int] = None,
+                 vehicle_type: Optional[str] = None):
+        """
+        Abre o journal, carregando o progresso de execuções anteriores
+
+        Args:
+            caminho: Arquivo do journal (.jsonl)
+            reference: Referência da busca. Um journal só pode ser retomado
+                com a mesma referência
+            vehicle_type: Tipo de veículo da busca. As chaves não incluem o tipo,
+                então um journal só pode ser retomado com o mesmo tipo
+
+        Raises:
+            ValueError: Se o journal existente for de outra referência ou de outro tipo
+        """
+        self.caminho = caminho
+        self.reference = reference
+        self.vehicle_type = vehicle_type
+        self.total_linhas = 0
+        self._concluidos: Dict[str, Set[str]] = {'unidade': set(), 'modelo': set(), 'marca': set()}
+
+        existe = os.path.exists(caminho) and os.path.getsize(caminho) > 0
+        if existe:
+            self._carregar()
+            completo = self._termina_com_nova_linha()
+
+        self._arquivo = open(caminho, 'a', encoding='utf-8')
+        if not existe:
+            self._gravar({'tipo': 'cabecalho', 'reference': reference,
+                          'vehicle_type': vehicle_type})
+        elif not completo:
+            # Última linha incompleta (interrupção durante a gravação): termina-a
+            # para que o próximo registro não seja colado a ela
+            self._arquivo.write('\n')
+            self._arquivo.flush()
+
+    def _termina_com_nova_linha(self) -> bool:
+        with open(self.caminho, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _carregar(self) -> None:
+        with open(self.caminho, encoding='utf-8') as f:
+            for numero, texto in enumerate(f):
+                try:
+                    registro = json.loads(texto)
+                except json.JSONDecodeError:
+                    # Última linha incompleta (interrupção durante a gravação)
+                    continue
+
+                tipo = registro.get('tipo')
+                if tipo == 'cabecalho':
+                    if numero == 0:
+                        self._verificar_cabecalho(registro)
+                    continue
+
+                if tipo in self._concluidos:
+                    self._concluidos[tipo].add(registro['chave'])
+                if tipo == 'unidade' and registro.get('linha') is not None:
+                    self.total_linhas += 1
+
+    def _verificar_cabecalho(self, cabecalho: Dict[str, Any]) -> None:
+        if cabecalho.get('reference') != self.reference:
+            raise ValueError(
+                f"Journal {self.caminho} pertence à referência "
+                f"{cabecalho.get('reference')}, não a {self.reference}"
+            )
+        if cabecalho.get('vehicle_type') != self.vehicle_type:
+            raise ValueError(
+                f"Journal {self.caminho} pertence ao tipo "
+                f"{cabecalho.get('vehicle_type')}, não a {self.vehicle_type}"
+            )
+
+    def _gravar(self, registro: Dict[str, Any]) -> None:
+        self._arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+    @staticmethod
+    def chave(*partes) -> str:
+        """Monta a chave de uma marca, modelo ou unidade, ex: chave(23, 5580, '2014-3')"""
+        return '/'.join(str(p) for p in partes)
+
+    def concluido(self, tipo: str, chave: str) -> bool:
+        """Verifica se a marca/modelo/unidade já foi processada"""
+        return chave in self._concluidos[tipo]
+
+    def registrar_unidade(self, chave: str, linha: Optional[Dict[str, Any]]) -> None:
+        """
+        Grava uma unidade (marca, modelo, ano) concluída
+
+        Args:
+            chave: Chave da unidade (ver CrawlJournal.chave)
+            linha: Linha da tabela obtida para a unidade (None = veículo inexistente)
+        """
+        self._gravar({'tipo': 'unidade', 'chave': chave, 'linha': linha})
+        self._concluidos['unidade'].add(chave)
+        if linha is not None:
+            self.total_linhas += 1
+
+    def iter_linhas(self) -> Iterator[Dict[str, Any]]:
+        """Relê do arquivo as linhas já gravadas (para gerá-las de novo ao retomar)"""
+        self._arquivo.flush()
+        for _, linha in iter_unidades(self.caminho):
+            yield linha
+
+    def marcar(self, tipo: str, chave: str) -> None:
+        """Marca um modelo ou marca como totalmente obtido (todas as unidades concluídas)"""
+        self._gravar({'tipo': tipo, 'chave': chave})
+        self._concluidos[tipo].add(chave)
+
+    def close(self) -> None:
+        if not self._arquivo.closed:
+            self._arquivo.close()
+
+    def __enter__(self) -> "CrawlJournal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def iter_unidades(caminho: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Lê as unidades concluídas de um journal, sem abri-lo para escrita
+
+    Args:
+        caminho: Arquivo do journal (.jsonl)
+
+    Yields:
+        (chave "marca/modelo/ano", linha da tabela) de cada unidade com linha
+    """
+    with open(caminho, encoding='utf-8') as f:
+        for texto in f:
+            try:
+                registro = json.loads(texto)
+            except json.JSONDecodeError:
+                continue
+            if registro.get('tipo') == 'unidade' and registro.get('linha') is not None:
+                yield registro['chave'], registro['linha']
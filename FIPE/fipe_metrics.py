@@ -0,0 +1,223 @@
+"""
+Métricas dos clientes FIPE
+Contadores por tipo de consulta (endpoint_template: brands, models, years,
+details, history, ...): requisições, erros, histograma de latência, bytes
+recebidos, acertos de cache e novas tentativas. Exportáveis como snapshot JSON
+ou no formato de texto do Prometheus.
+"""
+
+import json
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+
+# Limites superiores (segundos) dos intervalos do histograma de latência
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 'em_voo' = chamada atendida por uma requisição idêntica já em andamento (single-flight)
+CAMADAS_CACHE = ('memoria', 'persistente', 'em_voo')
+
+
+class _MetricasTemplate:
+    """Contadores de um tipo de consulta"""
+
+    __slots__ = ('requisicoes', 'erros', 'bytes', 'retries', 'hits', 'misses', 'intervalos', 'soma_latencia')
+
+    def __init__(self, n_intervalos: int):
+        self.requisicoes = 0
+        self.erros: Dict[str, int] = {}
+        self.bytes = 0
+        self.retries = 0
+        self.hits = dict.fromkeys(CAMADAS_CACHE, 0)
+        self.misses = 0
+        # Último intervalo = acima do maior limite (+Inf)
+        self.intervalos = [0] * (n_intervalos + 1)
+        self.soma_latencia = 0.0
+
+
+class ClientMetrics:
+    """Métricas de um cliente FIPE (seguro para uso a partir de várias threads)"""
+
+    def __init__(self, limites_latencia: Sequence[float] = LIMITES_LATENCIA):
+        """
+        Args:
+            limites_latencia: Limites superiores (segundos) dos intervalos do histograma
+        """
+        self.limites_latencia = tuple(sorted(limites_latencia))
+        self._templates: Dict[str, _MetricasTemplate] = {}
+        self._lock = threading.Lock()
+
+    def _template(self, template: str) -> _MetricasTemplate:
+        metricas = self._templates.get(template)
+        if metricas is None:
+            metricas = self._templates[template] = _MetricasTemplate(len(self.limites_latencia))
+        return metricas
+
+    def registrar_cache(self, template: str, camada: Optional[str]) -> None:
+        """Registra uma consulta ao cache: camada do acerto ou None (foi à rede)"""
+        with self._lock:
+            metricas = self._template(template)
+            if camada is None:
+                metricas.misses += 1
+            else:
+                metricas.hits[camada] += 1
+
+    def registrar_requisicao(
+        self,
+        template: str,
+        duracao: float,
+        bytes_recebidos: int = 0,
+        status: Optional[int] = None,
+        erro: bool = False
+    ) -> None:
+        """
+        Registra uma requisição HTTP
+
+        Args:
+            template: Tipo de consulta (endpoint_template)
+            duracao: Tempo da requisição (segundos)
+            bytes_recebidos: Tamanho do corpo da resposta
+            status: Código HTTP (None = sem resposta, ex: falha de conexão)
+            erro: Se a requisição falhou
+        """
+        with self._lock:
+            metricas = self._template(template)
+            metricas.requisicoes += 1
+            metricas.bytes += bytes_recebidos
+            metricas.soma_latencia += duracao
+            indice = len(self.limites_latencia)
+            for i, limite in enumerate(self.limites_latencia):
+                if duracao <= limite:
+                    indice = i
+                    break
+            metricas.intervalos[indice] += 1
+            if erro:
+                chave = str(status) if status is not None else 'conexao'
+                metricas.erros[chave] = metricas.erros.get(chave, 0) + 1
+
+    def registrar_retry(self, template: str) -> None:
+        """Registra uma nova tentativa de requisição"""
+        with self._lock:
+            self._template(template).retries += 1
+
+    def reset(self) -> None:
+        """Zera todas as métricas"""
+        with self._lock:
+            self._templates.clear()
+
+    def _percentil(self, metricas: _MetricasTemplate, p: float) -> Optional[float]:
+        """Percentil aproximado pelo limite superior do intervalo do histograma"""
+        if not metricas.requisicoes:
+            return None
+        alvo = metricas.requisicoes * p / 100
+        acumulado = 0
+        for limite, quantidade in zip(self.limites_latencia, metricas.intervalos):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return limite
+        return float('inf')
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Retorna as métricas atuais
+
+        Returns:
+            {"templates": {template: {...}}, "total": {...}} com requisições, erros,
+            bytes, retries, acertos de cache por camada, taxa de acerto, latência
+            média, percentis aproximados e o histograma
+        """
+        with self._lock:
+            templates = {}
+            for template in sorted(self._templates):
+                m = self._templates[template]
+                hits = sum(m.hits.values())
+                consultas = hits + m.misses
+                templates[template] = {
+                    'requisicoes': m.requisicoes,
+                    'erros': dict(m.erros),
+                    'bytes_recebidos': m.bytes,
+                    'retries': m.retries,
+                    'cache_hits': dict(m.hits),
+                    'cache_misses': m.misses,
+                    'taxa_acerto_cache': hits / consultas if consultas else None,
+                    'latencia_media': m.soma_latencia / m.requisicoes if m.requisicoes else None,
+                    'latencia_total': m.soma_latencia,
+                    'latencia_p50': self._percentil(m, 50),
+                    'latencia_p95': self._percentil(m, 95),
+                    'latencia_p99': self._percentil(m, 99),
+                    'histograma': {
+                        **{str(limite): n for limite, n in zip(self.limites_latencia, m.intervalos)},
+                        '+Inf': m.intervalos[-1],
+                    },
+                }
+
+        total = {
+            campo: sum(t[campo] for t in templates.values())
+            for campo in ('requisicoes', 'bytes_recebidos', 'retries', 'cache_misses', 'latencia_total')
+        }
+        total['erros'] = sum(sum(t['erros'].values()) for t in templates.values())
+        total['cache_hits'] = sum(sum(t['cache_hits'].values()) for t in templates.values())
+        consultas = total['cache_hits'] + total['cache_misses']
+        total['taxa_acerto_cache'] = total['cache_hits'] / consultas if consultas else None
+        return {'templates': templates, 'total': total}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        """Snapshot das métricas em JSON"""
+        return json.dumps(self.snapshot(), indent=indent, ensure_ascii=False)
+
+    def to_prometheus(self, prefixo: str = 'fipe_client') -> str:
+        """
+        Métricas no formato de texto do Prometheus
+
+        Args:
+            prefixo: Prefixo dos nomes das métricas
+        """
+        with self._lock:
+            templates = sorted(self._templates.items())
+            linhas = []
+
+            def metrica(nome: str, tipo: str, descricao: str) -> None:
+                linhas.append(f"# HELP {prefixo}_{nome} {descricao}")
+                linhas.append(f"# TYPE {prefixo}_{nome} {tipo}")
+
+            metrica('requests_total', 'counter', 'Requisições HTTP enviadas à API')
+            for template, m in templates:
+                linhas.append(f'{prefixo}_requests_total{{endpoint="{template}"}} {m.requisicoes}')
+
+            metrica('request_errors_total', 'counter', 'Requisições HTTP com erro, por status')
+            for template, m in templates:
+                for status, n in sorted(m.erros.items()):
+                    linhas.append(f'{prefixo}_request_errors_total{{endpoint="{template}",status="{status}"}} {n}')
+
+            metrica('request_duration_seconds', 'histogram', 'Latência das requisições HTTP')
+            for template, m in templates:
+                acumulado = 0
+                for limite, n in zip(self.limites_latencia, m.intervalos):
+                    acumulado += n
+                    linhas.append(
+                        f'{prefixo}_request_duration_seconds_bucket{{endpoint="{template}",le="{limite}"}} {acumulado}'
+                    )
+                linhas.append(
+                    f'{prefixo}_request_duration_seconds_bucket{{endpoint="{template}",le="+Inf"}} {m.requisicoes}'
+                )
+                linhas.append(f'{prefixo}_request_duration_seconds_sum{{endpoint="{template}"}} {m.soma_latencia}')
+                linhas.append(f'{prefixo}_request_duration_seconds_count{{endpoint="{template}"}} {m.requisicoes}')
+
+            metrica('response_bytes_total', 'counter', 'Bytes recebidos nas respostas')
+            for template, m in templates:
+                linhas.append(f'{prefixo}_response_bytes_total{{endpoint="{template}"}} {m.bytes}')
+
+            metrica('cache_hits_total', 'counter', 'Consultas respondidas pelo cache, por camada')
+            for template, m in templates:
+                for camada, n in m.hits.items():
+                    linhas.append(f'{prefixo}_cache_hits_total{{endpoint="{template}",layer="{camada}"}} {n}')
+
+            metrica('cache_misses_total', 'counter', 'Consultas que foram à rede')
+            for template, m in templates:
+                linhas.append(f'{prefixo}_cache_misses_total{{endpoint="{template}"}} {m.misses}')
+
+            metrica('retries_total', 'counter', 'Novas tentativas de requisição')
+            for template, m in templates:
+                linhas.append(f'{prefixo}_retries_total{{endpoint="{template}"}} {m.retries}')
+
+        return '\n'.join(linhas) + '\n'
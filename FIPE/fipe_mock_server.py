@@ -0,0 +1,378 @@
+"""
+Servidor local que imita a API FIPE (https://fipe.parallelum.com.br/api/v2)
+Serve um catálogo gerado (determinístico pela semente) com tamanho, latência,
+taxa de erros e comportamento de 429 configuráveis, para medir buscas e
+exportações sem consumir a cota real da API.
+
+Uso:
+    with MockFipeServer(marcas=20, modelos_por_marca=10, latencia=0.01) as servidor:
+        client = FipeClient(base_url=servidor.url)
+        ...
+
+    python fipe_mock_server.py --marcas 50 --porta 8000
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from fipe_cache import endpoint_template
+from fipe_records import formatar_reais
+
+
+TIPOS = ('cars', 'motorcycles', 'trucks')
+
+COMBUSTIVEIS = ((1, 'Gasolina', 'G'), (2, 'Álcool', 'A'), (3, 'Diesel', 'D'))
+
+MESES = (
+    'janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
+    'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro'
+)
+
+# Referência mais recente do catálogo e o mês correspondente (outubro de 2026)
+REFERENCIA_ATUAL = 330
+_MES_ATUAL = 2026 * 12 + 9
+
+
+def mes_da_referencia(reference: int) -> str:
+    """Mês por extenso de um código de referência, ex: 330 -> "outubro de 2026" """
+    indice = _MES_ATUAL - (REFERENCIA_ATUAL - int(reference))
+    return f"{MESES[indice % 12]} de {indice // 12}"
+
+
+class CatalogoMock:
+    """Catálogo gerado de marcas, modelos e anos de um tipo de veículo"""
+
+    def __init__(
+        self,
+        tipo: str,
+        marcas: int = 20,
+        modelos_por_marca: int = 10,
+        anos_por_modelo: int = 5,
+        semente: int = 42
+    ):
+        self.tipo = tipo
+        rnd = random.Random(semente * 10 + TIPOS.index(tipo))
+
+        self.marcas: List[Dict[str, str]] = []
+        self.modelos: Dict[int, List[Dict[str, str]]] = {}
+        self.anos: Dict[Tuple[int, int], List[Dict[str, str]]] = {}
+        self.modelos_por_ano: Dict[Tuple[int, str], List[Dict[str, str]]] = {}
+        self.por_fipe: Dict[str, Tuple[int, int]] = {}
+        # (marca, modelo) -> (nome da marca, nome do modelo, código FIPE, preço base em centavos)
+        self.info: Dict[Tuple[int, int], Tuple[str, str, str, int]] = {}
+
+        for b in range(1, marcas + 1):
+            nome_marca = f"Marca {b:03d} ({tipo})"
+            self.marcas.append({'code': str(b), 'name': nome_marca})
+            self.modelos[b] = []
+
+            for i in range(1, modelos_por_marca + 1):
+                m = b * 1000 + i
+                nome_modelo = f"Modelo {m} {rnd.choice(('1.0', '1.6', '2.0', '3.0'))} {rnd.choice(('Flex', 'Aut.', 'Mec.', 'Turbo'))}"
+                codigo_fipe = f"{m:06d}-{m % 10}"
+                self.modelos[b].append({'code': str(m), 'name': nome_modelo})
+                self.por_fipe[codigo_fipe] = (b, m)
+                self.info[(b, m)] = (nome_marca, nome_modelo, codigo_fipe, rnd.randint(2_000_000, 30_000_000))
+
+                combustivel = rnd.choice(COMBUSTIVEIS)[0]
+                inicio = 2026 - anos_por_modelo + 1 - rnd.randint(0, 10)
+                anos = []
+                for ano in range(inicio + anos_por_modelo - 1, inicio - 1, -1):
+                    nome_ano = f"{ano} {COMBUSTIVEIS[combustivel - 1][1]}"
+                    entrada = {'code': f"{ano}-{combustivel}", 'name': nome_ano}
+                    anos.append(entrada)
+                    self.modelos_por_ano.setdefault((b, entrada['code']), []).append(
+                        {'code': str(m), 'name': nome_modelo}
+                    )
+                self.anos[(b, m)] = anos
+
+    def anos_da_marca(self, b: int) -> List[Dict[str, str]]:
+        """Anos com algum modelo da marca"""
+        anos = {codigo: modelos for (marca, codigo), modelos in self.modelos_por_ano.items() if marca == b}
+        return [
+            {'code': codigo, 'name': f"{codigo[:4]} {COMBUSTIVEIS[int(codigo[5:]) - 1][1]}"}
+            for codigo in sorted(anos, reverse=True)
+        ]
+
+    def preco(self, b: int, m: int, year_code: str, reference: int) -> int:
+        """Preço em centavos: deprecia com a idade e varia levemente a cada mês"""
+        base = self.info[(b, m)][3]
+        idade = 2026 - int(year_code[:4])
+        fator = 0.88 ** idade * (1 + 0.003 * (reference - REFERENCIA_ATUAL))
+        return int(base * fator) // 100 * 100
+
+    def detalhes(self, b: int, m: int, year_code: str, reference: int) -> Optional[Dict[str, Any]]:
+        """Detalhes do veículo no formato da API (None se o ano não existe)"""
+        if not any(a['code'] == year_code for a in self.anos.get((b, m), ())):
+            return None
+        nome_marca, nome_modelo, codigo_fipe, _ = self.info[(b, m)]
+        _, combustivel, sigla = COMBUSTIVEIS[int(year_code[5:]) - 1]
+        return {
+            'brand': nome_marca,
+            'codeFipe': codigo_fipe,
+            'fuel': combustivel,
+            'fuelAcronym': sigla,
+            'model': nome_modelo,
+            'modelYear': int(year_code[:4]),
+            'price': formatar_reais(self.preco(b, m, year_code, reference)),
+            'priceHistory': [],
+            'referenceMonth': mes_da_referencia(reference),
+            'vehicleType': TIPOS.index(self.tipo) + 1,
+        }
+
+
+class MockFipeServer:
+    """Servidor HTTP local com os endpoints da API FIPE usados por FipeClient"""
+
+    def __init__(
+        self,
+        marcas: int = 20,
+        modelos_por_marca: int = 10,
+        anos_por_modelo: int = 5,
+        latencia: Union[float, Tuple[float, float]] = 0.0,
+        taxa_erro: float = 0.0,
+        taxa_429: float = 0.0,
+        retry_after: int = 1,
+        cota: Optional[int] = None,
+        referencias: int = 12,
+        semente: int = 42,
+        host: str = '127.0.0.1',
+        porta: int = 0
+    ):
+        """
+        Args:
+            marcas: Número de marcas por tipo de veículo
+            modelos_por_marca: Número de modelos de cada marca
+            anos_por_modelo: Número de anos de cada modelo
+            latencia: Atraso (segundos) de cada resposta, ou (mínimo, máximo) sorteado
+            taxa_erro: Fração das requisições respondidas com 500
+            taxa_429: Fração das requisições respondidas com 429 (com Retry-After)
+            retry_after: Valor do cabeçalho Retry-After (segundos) nas respostas 429
+            cota: Número de requisições atendidas antes de responder sempre 429
+                (simula a cota diária esgotada; None = sem cota)
+            referencias: Número de meses de referência disponíveis
+            semente: Semente do catálogo e do sorteio de falhas
+            host: Endereço de escuta
+            porta: Porta de escuta (0 = porta livre escolhida pelo sistema)
+        """
+        self.catalogos = {
+            tipo: CatalogoMock(tipo, marcas, modelos_por_marca, anos_por_modelo, semente)
+            for tipo in TIPOS
+        }
+        self.latencia = latencia
+        self.taxa_erro = taxa_erro
+        self.taxa_429 = taxa_429
+        self.retry_after = retry_after
+        self.cota = cota
+        self.referencias = [
+            {'code': str(REFERENCIA_ATUAL - i), 'month': mes_da_referencia(REFERENCIA_ATUAL - i)}
+            for i in range(referencias)
+        ]
+
+        self.requisicoes: Counter = Counter()
+        self.status: Counter = Counter()
+        self._random = random.Random(semente)
+        self._lock = threading.Lock()
+        self._total = 0
+        self._thread: Optional[threading.Thread] = None
+
+        servidor = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Cabeçalhos e corpo são enviados separadamente; sem isso o Nagle
+            # atrasaria cada resposta em ~40 ms nas conexões keep-alive
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, corpo, headers = servidor._responder(self.path)
+                dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(dados)))
+                for nome, valor in headers.items():
+                    self.send_header(nome, valor)
+                self.end_headers()
+                try:
+                    self.wfile.write(dados)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Cliente desistiu da requisição (ex: tarefa cancelada)
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, porta), _Handler)
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """URL base para FipeClient(base_url=...)"""
+        host, porta = self._httpd.server_address[:2]
+        return f"http://{host}:{porta}/api/v2"
+
+    @property
+    def total(self) -> int:
+        """Total de requisições recebidas"""
+        return self._total
+
+    def start(self) -> "MockFipeServer":
+        """Inicia o servidor em uma thread em segundo plano"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Encerra o servidor"""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockFipeServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _responder(self, caminho: str) -> Tuple[int, Any, Dict[str, str]]:
+        """Decide status, corpo e cabeçalhos da resposta a um GET"""
+        partes = urlsplit(caminho)
+        endpoint = partes.path.split('/api/v2/', 1)[-1].strip('/')
+        query = parse_qs(partes.query)
+
+        with self._lock:
+            self._total += 1
+            total = self._total
+            sorteio = self._random.random()
+            if isinstance(self.latencia, tuple):
+                atraso = self._random.uniform(*self.latencia)
+            else:
+                atraso = self.latencia
+            self.requisicoes[endpoint_template(endpoint)] += 1
+
+        if atraso:
+            time.sleep(atraso)
+
+        if self.cota is not None and total > self.cota:
+            status, corpo, headers = 429, {'error': 'Too Many Requests'}, {'Retry-After': str(self.retry_after)}
+        elif sorteio < self.taxa_429:
+            status, corpo, headers = 429, {'error': 'Too Many Requests'}, {'Retry-After': str(self.retry_after)}
+        elif sorteio < self.taxa_429 + self.taxa_erro:
+            status, corpo, headers = 500, {'error': 'Internal Server Error'}, {}
+        else:
+            try:
+                reference = int(query['reference'][0]) if 'reference' in query else REFERENCIA_ATUAL
+            except ValueError:
+                reference = None
+            corpo = self._rota(endpoint, reference) if reference is not None else None
+            if corpo is None:
+                status, corpo, headers = 404, {'error': 'Not Found'}, {}
+            else:
+                status, headers = 200, {}
+
+        with self._lock:
+            self.status[status] += 1
+        return status, corpo, headers
+
+    def _rota(self, endpoint: str, reference: int) -> Any:
+        """Corpo da resposta de um endpoint (None = não encontrado)"""
+        partes = endpoint.split('/')
+        if partes == ['references']:
+            return self.referencias
+        if partes[0] not in self.catalogos or len(partes) < 2:
+            return None
+
+        catalogo = self.catalogos[partes[0]]
+        resto = partes[1:]
+        try:
+            if resto == ['brands']:
+                return catalogo.marcas
+            if resto[0] == 'brands':
+                b = int(resto[1])
+                if resto[2:] == ['models']:
+                    return catalogo.modelos.get(b)
+                m = int(resto[3])
+                if (b, m) not in catalogo.anos or resto[2] != 'models' or resto[4] != 'years':
+                    return None
+                if len(resto) == 5:
+                    return catalogo.anos[(b, m)]
+                if len(resto) == 6:
+                    return catalogo.detalhes(b, m, resto[5], reference)
+                return None
+
+            if resto[1] != 'years':
+                return None
+            if '-' in resto[0]:
+                # {tipo}/{código FIPE}/years[/{ano}[/history]]
+                if resto[0] not in catalogo.por_fipe:
+                    return None
+                b, m = catalogo.por_fipe[resto[0]]
+                if len(resto) == 2:
+                    return catalogo.anos[(b, m)]
+                detalhes = catalogo.detalhes(b, m, resto[2], reference)
+                if len(resto) == 3 or detalhes is None:
+                    return detalhes
+                if resto[3:] == ['history']:
+                    detalhes['priceHistory'] = [
+                        {
+                            'month': mes_da_referencia(ref),
+                            'price': formatar_reais(catalogo.preco(b, m, resto[2], ref)),
+                            'reference': str(ref),
+                        }
+                        for ref in range(reference, max(reference - len(self.referencias), 0), -1)
+                    ]
+                    return detalhes
+                return None
+
+            # {tipo}/{marca}/years[/{ano}/models]
+            b = int(resto[0])
+            if b not in catalogo.modelos:
+                return None
+            if len(resto) == 2:
+                return catalogo.anos_da_marca(b)
+            if resto[3:] == ['models']:
+                return catalogo.modelos_por_ano.get((b, resto[2]))
+        except (IndexError, ValueError):
+            return None
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API FIPE")
+    parser.add_argument('--marcas', type=int, default=20)
+    parser.add_argument('--modelos-por-marca', type=int, default=10)
+    parser.add_argument('--anos-por-modelo', type=int, default=5)
+    parser.add_argument('--latencia', type=float, default=0.0, help="segundos por resposta")
+    parser.add_argument('--taxa-erro', type=float, default=0.0)
+    parser.add_argument('--taxa-429', type=float, default=0.0)
+    parser.add_argument('--cota', type=int, default=None)
+    parser.add_argument('--porta', type=int, default=8000)
+    args = parser.parse_args()
+
+    servidor = MockFipeServer(
+        marcas=args.marcas,
+        modelos_por_marca=args.modelos_por_marca,
+        anos_por_modelo=args.anos_por_modelo,
+        latencia=args.latencia,
+        taxa_erro=args.taxa_erro,
+        taxa_429=args.taxa_429,
+        cota=args.cota,
+        porta=args.porta
+    )
+    print(f"API FIPE simulada em {servidor.url} (Ctrl+C para encerrar)")
+    try:
+        servidor._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor._httpd.server_close()
@@ -0,0 +1,236 @@
+"""
+Pré-busca especulativa do próximo nível do catálogo
+Na navegação marcas -> modelos -> anos -> preço, cada nível listado permite
+prever as próximas consultas: ao listar as marcas, os modelos das marcas mais
+prováveis; ao listar os modelos de uma marca, os anos desses modelos. O
+Prefetcher faz essas consultas em segundo plano, alimentando o cache do
+FipeClient, para que o próximo passo do usuário seja um acerto de cache. Os
+preços não são pré-buscados: cada ano custaria uma requisição, e o preço costuma
+ser consultado pelo código FIPE (get_vehicle_details), uma chave de cache que a
+navegação por marca e modelo não permite prever.
+
+As pré-buscas têm um orçamento próprio por janela de 24h (uma fração da cota
+diária), usam apenas fichas ociosas do rate_limiter (nunca atrasam as consultas
+do usuário; sem ficha dentro de espera_ficha, a pré-busca é descartada) e deixam
+de acontecer quando a cota restante chega à reserva das consultas do usuário.
+
+Uso:
+    client = FipeClient(prefetch=Prefetcher(limite_marcas=5, fracao_cota=0.1))
+    brands = client.get_brands(VehicleType.CARS)   # modelos das 5 marcas em segundo plano
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from fipe_rate_limit import JANELA_COTA, LIMITE_DIARIO_COM_TOKEN, LIMITE_DIARIO_SEM_TOKEN
+
+
+class _Reserva:
+    """Requisição reservada no orçamento das pré-buscas (comparada por identidade)"""
+
+    __slots__ = ('instante',)
+
+    def __init__(self, instante: float):
+        self.instante = instante
+
+
+class Prefetcher:
+    """Política, orçamento e pool de threads das pré-buscas de um FipeClient"""
+
+    def __init__(
+        self,
+        limite_marcas: int = 5,
+        limite_modelos: int = 10,
+        fracao_cota: float = 0.1,
+        max_requisicoes: Optional[int] = None,
+        marcas_prioritarias: Iterable[Any] = (),
+        max_workers: int = 4,
+        max_pendentes: int = 64,
+        espera_ficha: float = 5.0,
+        janela: float = JANELA_COTA
+    ):
+        """
+        Args:
+            limite_marcas: Marcas cujos modelos são pré-buscados ao listar as marcas
+                (as prioritárias, depois as mais consultadas, depois a ordem da lista)
+            limite_modelos: Modelos cujos anos são pré-buscados ao listar os modelos
+            fracao_cota: Fração da cota diária que as pré-buscas podem consumir por
+                janela; a mesma fração da cota fica reservada às consultas do usuário
+            max_requisicoes: Orçamento por janela em requisições (substitui fracao_cota)
+            marcas_prioritarias: Códigos de marcas pré-buscadas primeiro
+            max_workers: Threads de pré-busca
+            max_pendentes: Pré-buscas na fila; as excedentes são descartadas
+            espera_ficha: Segundos que uma pré-busca aguarda uma ficha livre do
+                rate_limiter (só usa fichas ociosas) antes de ser descartada
+            janela: Duração da janela do orçamento em segundos
+        """
+        self.limite_marcas = limite_marcas
+        self.limite_modelos = limite_modelos
+        self.fracao_cota = fracao_cota
+        self.max_requisicoes = max_requisicoes
+        self.marcas_prioritarias = [str(codigo) for codigo in marcas_prioritarias]
+        self.max_workers = max_workers
+        self.max_pendentes = max_pendentes
+        self.espera_ficha = espera_ficha
+        self.janela = janela
+        self.contadores: Counter = Counter()
+        self._acessos: Dict[str, Counter] = {}
+        self._gastas: deque = deque()
+        self._pendentes: Dict[Future, None] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def orcamento(self, client: Any) -> int:
+        """Requisições que as pré-buscas podem fazer por janela"""
+        if self.max_requisicoes is not None:
+            return self.max_requisicoes
+        quota = getattr(client.rate_limiter, 'quota', None)
+        if quota is not None:
+            limite = quota.limite_diario
+        elif client.subscription_token:
+            limite = LIMITE_DIARIO_COM_TOKEN
+        else:
+            limite = LIMITE_DIARIO_SEM_TOKEN
+        return int(limite * self.fracao_cota)
+
+    def reservar(self, client: Any) -> Optional[_Reserva]:
+        """
+        Reserva uma requisição do orçamento (chamado antes de uma pré-busca ir à rede)
+
+        Returns:
+            A reserva (ver devolver), ou None se o orçamento da janela acabou ou se
+            a cota restante chegou à reserva das consultas do usuário
+        """
+        orcamento = self.orcamento(client)
+        quota = getattr(client.rate_limiter, 'quota', None)
+        if quota is not None and quota.restantes() <= orcamento:
+            return None
+        with self._lock:
+            agora = time.monotonic()
+            while self._gastas and self._gastas[0].instante <= agora - self.janela:
+                self._gastas.popleft()
+            if len(self._gastas) >= orcamento:
+                return None
+            reserva = _Reserva(agora)
+            self._gastas.append(reserva)
+            return reserva
+
+    def devolver(self, reserva: _Reserva) -> None:
+        """Devolve uma reserva de uma pré-busca que não chegou a ser feita"""
+        with self._lock:
+            try:
+                self._gastas.remove(reserva)
+            except ValueError:
+                # A reserva já saiu da janela
+                pass
+
+    def restantes(self, client: Any) -> int:
+        """Requisições ainda disponíveis às pré-buscas na janela atual"""
+        with self._lock:
+            limite = time.monotonic() - self.janela
+            gastas = sum(1 for reserva in self._gastas if reserva.instante > limite)
+        return max(0, self.orcamento(client) - gastas)
+
+    def registrar_acesso(self, chave: str, codigo: Any) -> None:
+        """Conta uma consulta do usuário (ex: modelos de uma marca) para priorizar as pré-buscas"""
+        with self._lock:
+            self._acessos.setdefault(chave, Counter())[str(codigo)] += 1
+
+    def priorizar(
+        self,
+        chave: str,
+        codigos: Sequence[Any],
+        limite: int,
+        prioritarios: Sequence[str] = ()
+    ) -> List[str]:
+        """
+        Escolhe os `limite` códigos mais prováveis de serem consultados
+
+        Ordem: `prioritarios`, depois os mais consultados (registrar_acesso),
+        depois a ordem original da lista.
+        """
+        disponiveis = [str(codigo) for codigo in codigos]
+        existentes = set(disponiveis)
+        with self._lock:
+            acessos = self._acessos.get(chave, Counter())
+            mais_consultados = [codigo for codigo, _ in acessos.most_common() if codigo in existentes]
+
+        escolhidos: Dict[str, None] = {}
+        for codigo in (c for c in prioritarios if c in existentes):
+            escolhidos.setdefault(codigo)
+        for codigo in mais_consultados + disponiveis:
+            if len(escolhidos) >= limite:
+                break
+            escolhidos.setdefault(codigo)
+        return list(escolhidos)[:limite]
+
+    def agendar(self, funcao: Callable, *args: Any) -> bool:
+        """
+        Executa funcao(*args) em segundo plano
+
+        Returns:
+            False se a fila de pré-buscas está cheia (a tarefa é descartada)
+        """
+        with self._lock:
+            if len(self._pendentes) >= self.max_pendentes:
+                self.contadores['descartadas'] += 1
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='fipe-prefetch')
+            futuro = self._executor.submit(self._executar, funcao, *args)
+            self._pendentes[futuro] = None
+        futuro.add_done_callback(self._concluida)
+        return True
+
+    def _executar(self, funcao: Callable, *args: Any) -> None:
+        try:
+            funcao(*args)
+        except Exception:
+            # Falhas de pré-busca não afetam o usuário: a consulta real repete a requisição
+            with self._lock:
+                self.contadores['erros'] += 1
+
+    def _concluida(self, futuro: Future) -> None:
+        with self._lock:
+            self._pendentes.pop(futuro, None)
+
+    def aguardar(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera as pré-buscas agendadas terminarem (útil em testes e benchmarks)
+
+        Returns:
+            True se todas terminaram dentro do timeout
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                pendentes = list(self._pendentes)
+            if not pendentes:
+                return True
+            restante = None if limite is None else limite - time.monotonic()
+            if restante is not None and restante <= 0:
+                return False
+            try:
+                pendentes[0].result(restante)
+            except Exception:
+                pass
+
+    def contar(self, evento: str) -> None:
+        """Incrementa um contador de stats()"""
+        with self._lock:
+            self.contadores[evento] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores das pré-buscas: enviadas, em_cache, em_voo, sem_orcamento, sem_ficha, descartadas, erros"""
+        with self._lock:
+            return dict(self.contadores, pendentes=len(self._pendentes))
+
+    def close(self) -> None:
+        """Cancela as pré-buscas na fila e libera as threads"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,494 @@
+"""
+Controle de taxa e de cota diária para a API FIPE
+Limites da API: 500 requisições/dia sem token e 1000/dia com token.
+
+- TokenBucket: limita o ritmo de requisições por segundo dentro do processo
+- DailyQuota: registro em disco (SQLite) das requisições das últimas 24h,
+  compartilhado por todos os clientes e processos da máquina
+- RateLimiter: combina os dois e é usado por FipeClient._make_request
+- AdaptiveConcurrencyLimiter: ajusta (AIMD) o número de requisições simultâneas
+  conforme a latência e as respostas 429/5xx
+- espera_nova_tentativa: backoff exponencial com jitter, respeitando Retry-After
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+
+LIMITE_DIARIO_SEM_TOKEN = 500
+LIMITE_DIARIO_COM_TOKEN = 1000
+JANELA_COTA = 24 * 60 * 60
+
+CAMINHO_LEDGER_PADRAO = os.path.join(os.path.expanduser('~'), '.fipe_quota.sqlite')
+
+
+class QuotaExceededError(Exception):
+    """Cota diária da API esgotada"""
+
+    def __init__(self, liberacao_em: float):
+        """
+        Args:
+            liberacao_em: Timestamp (epoch) em que a próxima requisição será liberada
+        """
+        self.liberacao_em = liberacao_em
+        quando = time.strftime('%d/%m/%Y %H:%M:%S', time.localtime(liberacao_em))
+        super().__init__(f"Cota diária da API FIPE esgotada. Próxima requisição liberada em {quando}")
+
+
+class TokenBucket:
+    """Balde de fichas: permite rajadas curtas e mantém uma taxa média por segundo"""
+
+    def __init__(self, taxa_por_segundo: float, capacidade: Optional[float] = None):
+        """
+        Args:
+            taxa_por_segundo: Fichas repostas por segundo (requisições/s em regime)
+            capacidade: Tamanho máximo da rajada (padrão: igual à taxa, mínimo 1)
+        """
+        if taxa_por_segundo <= 0:
+            raise ValueError("taxa_por_segundo deve ser maior que zero")
+
+        self.taxa = taxa_por_segundo
+        self.capacidade = capacidade if capacidade is not None else max(1.0, taxa_por_segundo)
+        self._fichas = self.capacidade
+        self._atualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self) -> float:
+        """
+        Reserva uma ficha
+
+        Returns:
+            Segundos que o chamador deve esperar antes de fazer a requisição
+        """
+        with self._lock:
+            agora = time.monotonic()
+            self._fichas = min(self.capacidade, self._fichas + (agora - self._atualizado) * self.taxa)
+            self._atualizado = agora
+            self._fichas -= 1
+            if self._fichas >= 0:
+                return 0.0
+            return -self._fichas / self.taxa
+
+    def tentar_reservar(self) -> bool:
+        """Reserva uma ficha apenas se houver uma disponível agora (não gera espera)"""
+        with self._lock:
+            agora = time.monotonic()
+            self._fichas = min(self.capacidade, self._fichas + (agora - self._atualizado) * self.taxa)
+            self._atualizado = agora
+            if self._fichas < 1:
+                return False
+            self._fichas -= 1
+            return True
+
+    def devolver(self) -> None:
+        """Devolve uma ficha reservada e não usada"""
+        with self._lock:
+            self._fichas = min(self.capacidade, self._fichas + 1)
+
+
+class DailyQuota:
+    """
+    Registro de cota diária em disco, compartilhado entre processos
+
+    Cada requisição liberada é gravada com seu horário; a cota é contada em uma
+    janela deslizante de 24h, o que nunca excede um limite diário do servidor.
+    """
+
+    def __init__(
+        self,
+        limite_diario: int,
+        caminho: str = CAMINHO_LEDGER_PADRAO,
+        conta: str = 'anonimo',
+        janela: float = JANELA_COTA
+    ):
+        """
+        Args:
+            limite_diario: Número máximo de requisições por janela
+            caminho: Arquivo SQLite do registro
+            conta: Identificador da conta (requisições de contas diferentes não se somam)
+            janela: Duração da janela em segundos
+        """
+        self.limite_diario = limite_diario
+        self.caminho = caminho
+        self.conta = conta
+        self.janela = janela
+        self._lock = threading.Lock()
+        # isolation_level=None: as transações são controladas manualmente
+        self._conn = sqlite3.connect(caminho, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS requisicoes ("
+            " conta TEXT NOT NULL,"
+            " horario REAL NOT NULL"
+            ")"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_requisicoes_conta_horario ON requisicoes (conta, horario)"
+        )
+
+    def consumir(self) -> Tuple[bool, float]:
+        """
+        Tenta consumir uma requisição da cota
+
+        Returns:
+            (True, horario) se liberada, com o horário do registro (ver devolver),
+            ou (False, liberacao_em) com o timestamp em que a requisição mais
+            antiga da janela deixa de contar
+        """
+        with self._lock:
+            agora = time.time()
+            inicio = agora - self.janela
+            # BEGIN IMMEDIATE trava a escrita entre processos durante a contagem
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "DELETE FROM requisicoes WHERE conta = ? AND horario <= ?",
+                    (self.conta, inicio)
+                )
+                usadas, mais_antiga = self._conn.execute(
+                    "SELECT COUNT(*), MIN(horario) FROM requisicoes WHERE conta = ?",
+                    (self.conta,)
+                ).fetchone()
+
+                if usadas >= self.limite_diario:
+                    self._conn.execute("COMMIT")
+                    return False, mais_antiga + self.janela
+
+                self._conn.execute(
+                    "INSERT INTO requisicoes (conta, horario) VALUES (?, ?)",
+                    (self.conta, agora)
+                )
+                self._conn.execute("COMMIT")
+                return True, agora
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def devolver(self, horario: float) -> None:
+        """Remove da cota a requisição registrada em `horario` (liberada e não feita)"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM requisicoes WHERE rowid = ("
+                " SELECT rowid FROM requisicoes WHERE conta = ? AND horario = ? LIMIT 1"
+                ")",
+                (self.conta, horario)
+            )
+
+    def restantes(self) -> int:
+        """Retorna quantas requisições ainda cabem na janela atual"""
+        with self._lock:
+            usadas, = self._conn.execute(
+                "SELECT COUNT(*) FROM requisicoes WHERE conta = ? AND horario > ?",
+                (self.conta, time.time() - self.janela)
+            ).fetchone()
+        return max(0, self.limite_diario - usadas)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class Ficha(NamedTuple):
+    """Requisição liberada por RateLimiter.tentar_acquire, para devolvê-la se não for feita"""
+    horario: Optional[float]  # registro na cota (None sem controle de cota)
+
+
+class RateLimiter:
+    """Limitador usado pelo cliente: ritmo por segundo + cota diária compartilhada"""
+
+    def __init__(
+        self,
+        por_segundo: float = 2.0,
+        rajada: Optional[float] = None,
+        quota: Optional[DailyQuota] = None,
+        esperar_janela: bool = False
+    ):
+        """
+        Args:
+            por_segundo: Requisições por segundo em regime
+            rajada: Tamanho máximo de rajada (padrão: igual a por_segundo)
+            quota: Registro de cota diária (None = sem controle de cota)
+            esperar_janela: Se True, ao esgotar a cota espera a próxima liberação
+                em vez de levantar QuotaExceededError
+        """
+        self.bucket = TokenBucket(por_segundo, rajada)
+        self.quota = quota
+        self.esperar_janela = esperar_janela
+
+    @classmethod
+    def para_token(
+        cls,
+        subscription_token: Optional[str] = None,
+        caminho: str = CAMINHO_LEDGER_PADRAO,
+        **kwargs
+    ) -> "RateLimiter":
+        """
+        Cria um limitador com a cota diária correspondente ao token
+
+        Args:
+            subscription_token: Token de assinatura (None = 500/dia, com token = 1000/dia)
+            caminho: Arquivo SQLite do registro de cota
+            **kwargs: Demais argumentos de RateLimiter
+        """
+        if subscription_token:
+            limite = LIMITE_DIARIO_COM_TOKEN
+            # Não grava o token em disco, apenas um identificador derivado dele
+            conta = hashlib.sha256(subscription_token.encode('utf-8')).hexdigest()[:16]
+        else:
+            limite = LIMITE_DIARIO_SEM_TOKEN
+            conta = 'anonimo'
+        return cls(quota=DailyQuota(limite, caminho=caminho, conta=conta), **kwargs)
+
+    def _consumir_cota(self) -> Optional[float]:
+        """
+        Consome a cota
+
+        Returns:
+            None se a requisição foi registrada na cota, ou os segundos até a próxima
+            liberação (podem ser 0: a cota deve ser consultada de novo, nunca
+            considerada liberada sem um consumir() bem-sucedido)
+        """
+        if self.quota is None:
+            return None
+        liberada, liberacao_em = self.quota.consumir()
+        if liberada:
+            return None
+        if not self.esperar_janela:
+            raise QuotaExceededError(liberacao_em)
+        return max(0.0, liberacao_em - time.time())
+
+    def acquire(self) -> None:
+        """Bloqueia até que uma requisição possa ser feita"""
+        while True:
+            espera = self._consumir_cota()
+            if espera is None:
+                break
+            time.sleep(espera)
+
+        espera = self.bucket.reservar()
+        if espera > 0:
+            time.sleep(espera)
+
+    def tentar_acquire(self) -> Optional[Ficha]:
+        """
+        Libera uma requisição apenas se for possível sem esperar (usado pelas pré-buscas)
+
+        A cota é verificada antes de tomar a ficha, e a ficha é devolvida se a
+        cota recusar o registro: pré-buscas recusadas não atrasam o usuário.
+
+        Returns:
+            A ficha liberada (ver devolver), ou None se não há ficha disponível
+            agora ou se a cota está esgotada
+        """
+        if self.quota is not None and self.quota.restantes() <= 0:
+            return None
+        if not self.bucket.tentar_reservar():
+            return None
+        if self.quota is None:
+            return Ficha(None)
+        liberada, horario = self.quota.consumir()
+        if not liberada:
+            # Outro processo esgotou a cota entre a verificação e o registro
+            self.bucket.devolver()
+            return None
+        return Ficha(horario)
+
+    def devolver(self, ficha: Ficha) -> None:
+        """Devolve a ficha e o registro na cota de uma requisição liberada e não feita"""
+        self.bucket.devolver()
+        if ficha.horario is not None:
+            self.quota.devolver(ficha.horario)
+
+    async def acquire_async(self) -> None:
+        """
+        Versão assíncrona de acquire (não bloqueia o event loop)
+
+        As esperas usam asyncio.sleep e o registro na cota (SQLite, que pode
+        aguardar o lock de outro processo) roda em uma thread (asyncio.to_thread).
+        """
+        while True:
+            espera = await asyncio.to_thread(self._consumir_cota)
+            if espera is None:
+                break
+            await asyncio.sleep(espera)
+
+        espera = self.bucket.reservar()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+# Respostas que indicam sobrecarga/falha temporária e justificam nova tentativa
+STATUS_REPETIVEIS = frozenset({429, 500, 502, 503, 504})
+
+
+def interpretar_retry_after(valor: Optional[str]) -> Optional[float]:
+    """
+    Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos de espera
+
+    Returns:
+        Segundos a esperar (>= 0) ou None se ausente/inválido
+    """
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def espera_nova_tentativa(
+    tentativa: int,
+    retry_after: Optional[float] = None,
+    base: float = 0.5,
+    maximo: float = 60.0
+) -> Optional[float]:
+    """
+    Tempo de espera antes de uma nova tentativa
+
+    Backoff exponencial com jitter completo (sorteado entre 0 e base * 2^tentativa,
+    limitado a `maximo`). Se o servidor informou Retry-After, espera pelo menos
+    esse tempo.
+
+    Args:
+        tentativa: Número de tentativas já falhas (0 = primeira falha)
+        retry_after: Espera pedida pelo servidor (segundos), se houver
+        base: Espera base (segundos)
+        maximo: Maior espera aceita (segundos)
+
+    Returns:
+        Segundos a esperar, ou None se o servidor pediu mais que `maximo`
+    """
+    espera = random.uniform(0, min(maximo, base * 2 ** tentativa))
+    if retry_after is not None:
+        if retry_after > maximo:
+            return None
+        espera = retry_after + random.uniform(0, base)
+    return espera
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limite adaptativo (AIMD) de requisições simultâneas
+
+    Cresce aditivamente (cerca de +1 a cada `limite` respostas) enquanto a
+    latência se mantém próxima da mínima observada, e é reduzido
+    multiplicativamente em respostas 429/5xx, falhas de conexão ou quando a
+    latência média sobe acima de `tolerancia_latencia` vezes a mínima. Cada
+    redução só ocorre uma vez por intervalo de latência, para que as respostas
+    já em andamento não derrubem o limite em cascata.
+    """
+
+    def __init__(
+        self,
+        inicial: int = 4,
+        minimo: int = 1,
+        maximo: int = 64,
+        reducao: float = 0.5,
+        tolerancia_latencia: float = 2.0,
+        amostras_base: int = 200
+    ):
+        """
+        Args:
+            inicial: Limite inicial de requisições simultâneas
+            minimo: Menor limite
+            maximo: Maior limite
+            reducao: Fator aplicado ao limite a cada redução
+            tolerancia_latencia: Quantas vezes a latência média pode superar a
+                mínima recente antes de reduzir o limite
+            amostras_base: Número de latências recentes usadas para a mínima
+        """
+        if not 1 <= minimo <= inicial <= maximo:
+            raise ValueError("Use 1 <= minimo <= inicial <= maximo")
+
+        self.minimo = minimo
+        self.maximo = maximo
+        self.reducao = reducao
+        self.tolerancia_latencia = tolerancia_latencia
+        self.limite = float(inicial)
+        self.em_andamento = 0
+        self.reducoes = 0
+        self.latencia_media: Optional[float] = None
+
+        self._latencias = deque(maxlen=amostras_base)
+        self._ultima_reducao = 0.0
+        self._cond = threading.Condition()
+        self._esperando_async: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def _reservar(self) -> bool:
+        if self.em_andamento < int(self.limite):
+            self.em_andamento += 1
+            return True
+        return False
+
+    def acquire(self) -> None:
+        """Bloqueia até haver vaga para mais uma requisição"""
+        with self._cond:
+            while not self._reservar():
+                self._cond.wait()
+
+    async def acquire_async(self) -> None:
+        """Versão assíncrona de acquire"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._reservar():
+                    return
+                futuro = loop.create_future()
+                self._esperando_async.append((loop, futuro))
+            await futuro
+
+    def release(self, latencia: Optional[float] = None, sobrecarga: bool = False) -> None:
+        """
+        Libera a vaga e ajusta o limite
+
+        Args:
+            latencia: Duração da requisição (segundos; None = não medida)
+            sobrecarga: Se a resposta indicou sobrecarga (429/5xx, falha de conexão)
+        """
+        with self._cond:
+            self.em_andamento -= 1
+            self._ajustar(latencia, sobrecarga)
+            self._cond.notify_all()
+            esperando, self._esperando_async = self._esperando_async, []
+
+        for loop, futuro in esperando:
+            loop.call_soon_threadsafe(_acordar, futuro)
+
+    def _ajustar(self, latencia: Optional[float], sobrecarga: bool) -> None:
+        if latencia is not None and not sobrecarga:
+            self._latencias.append(latencia)
+            if self.latencia_media is None:
+                self.latencia_media = latencia
+            else:
+                self.latencia_media = 0.8 * self.latencia_media + 0.2 * latencia
+
+        latencia_subindo = (
+            len(self._latencias) >= 10
+            and self.latencia_media > min(self._latencias) * self.tolerancia_latencia
+        )
+
+        if sobrecarga or latencia_subindo:
+            agora = time.monotonic()
+            if agora - self._ultima_reducao >= (self.latencia_media or 0.0):
+                self.limite = max(float(self.minimo), self.limite * self.reducao)
+                self._ultima_reducao = agora
+                self.reducoes += 1
+        else:
+            self.limite = min(float(self.maximo), self.limite + 1.0 / self.limite)
+
+
+def _acordar(futuro: asyncio.Future) -> None:
+    if not futuro.done():
+        futuro.set_result(None)
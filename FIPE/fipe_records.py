@@ -0,0 +1,211 @@
+"""
+Registros tipados das respostas da API FIPE
+Cada registro é um dict (subclasse) com a resposta decodificada e expõe os
+campos como atributos tipados (Brand.code, VehicleDetails.price_cents, ...). Por
+continuarem sendo dicts, os registros funcionam com o código existente: acesso
+de dicionário, json.dumps, cópia e alteração. Campos que exigem conversão (preço
+em centavos, ano do modelo, histórico) são convertidos a cada acesso, refletindo
+alterações no dict. Os clientes convertem cada resposta uma única vez (tipar),
+ao guardá-la no cache em memória, e devolvem os mesmos registros nos acertos.
+
+A decodificação usa orjson quando instalado (pip install orjson) e o módulo
+json da biblioteca padrão caso contrário.
+"""
+
+import json
+import numbers
+import re
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+# Preço no formato da API ("R$ 10.000,00"): grupos com os reais e os centavos.
+# Única definição do formato: centavos(), formatar_reais() e a versão vetorizada
+# de criar_tabela_carros.preco_em_centavos usam este padrão
+PADRAO_PRECO = r'^\s*R\$\s*([\d.]+),(\d{2})\s*$'
+
+_PRECO = re.compile(PADRAO_PRECO)
+
+
+def loads(dados: Union[bytes, str]) -> Any:
+    """Decodifica JSON com orjson, se disponível"""
+    if orjson is not None:
+        return orjson.loads(dados)
+    return json.loads(dados)
+
+
+def centavos(preco: Any) -> Optional[int]:
+    """Converte "R$ 10.000,00" em 1000000 (None se ausente ou inválido); inteiros já são centavos"""
+    if isinstance(preco, numbers.Integral) and not isinstance(preco, bool):
+        return int(preco)
+    match = _PRECO.match(str(preco or ''))
+    if not match:
+        return None
+    return int(match.group(1).replace('.', '') + match.group(2))
+
+
+def formatar_reais(centavos: Any) -> str:
+    """Formata centavos como a API, ex: 1234550 -> "R$ 12.345,50" ('' se ausente ou nulo)"""
+    try:
+        reais, resto = divmod(int(centavos), 100)
+    except (TypeError, ValueError):
+        # None, NaN e pd.NA
+        return ''
+    return f"R$ {reais:,}".replace(',', '.') + f",{resto:02d}"
+
+
+class _Registro(dict):
+    """Base dos registros: um dict da resposta com os campos também como atributos"""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict.__repr__(self)})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Cópia como dict comum"""
+        return dict(self)
+
+
+class Brand(_Registro):
+    """Marca ({"code": "23", "name": "VW - VolksWagen"})"""
+
+    __slots__ = ()
+
+    @property
+    def code(self) -> str:
+        return self['code']
+
+    @property
+    def name(self) -> str:
+        return self['name']
+
+
+class Model(Brand):
+    """Modelo ({"code": "5580", "name": "AMAROK High.CD 2.0 16V TDI 4x4 Dies. Aut"})"""
+
+    __slots__ = ()
+
+
+class YearEntry(Brand):
+    """Ano de um modelo ({"code": "2014-3", "name": "2014 Diesel"})"""
+
+    __slots__ = ()
+
+    @property
+    def year(self) -> int:
+        """Ano do modelo (32000 = zero km)"""
+        return int(self['code'].partition('-')[0])
+
+    @property
+    def fuel_code(self) -> int:
+        """Código do combustível (1 = gasolina, 2 = álcool, 3 = diesel, ...)"""
+        return int(self['code'].partition('-')[2] or 0)
+
+
+class PricePoint(_Registro):
+    """Preço de um mês do histórico ({"month", "price", "reference"})"""
+
+    __slots__ = ()
+
+    @property
+    def month(self) -> str:
+        return self.get('month', '')
+
+    @property
+    def price(self) -> str:
+        return self.get('price', '')
+
+    @property
+    def reference(self) -> int:
+        return int(self['reference'])
+
+    @property
+    def price_cents(self) -> Optional[int]:
+        return centavos(self.get('price'))
+
+
+class VehicleDetails(_Registro):
+    """Detalhes e preço de um veículo (get_vehicle_details e get_vehicle_history)"""
+
+    __slots__ = ()
+
+    @property
+    def brand(self) -> str:
+        return self.get('brand', '')
+
+    @property
+    def model(self) -> str:
+        return self.get('model', '')
+
+    @property
+    def code_fipe(self) -> str:
+        return self.get('codeFipe', '')
+
+    @property
+    def fuel(self) -> str:
+        return self.get('fuel', '')
+
+    @property
+    def fuel_acronym(self) -> str:
+        return self.get('fuelAcronym', '')
+
+    @property
+    def model_year(self) -> Optional[int]:
+        ano = self.get('modelYear')
+        return int(ano) if ano not in (None, '') else None
+
+    @property
+    def price(self) -> str:
+        return self.get('price', '')
+
+    @property
+    def price_cents(self) -> Optional[int]:
+        return centavos(self.get('price'))
+
+    @property
+    def reference_month(self) -> str:
+        return self.get('referenceMonth', '')
+
+    @property
+    def vehicle_type(self) -> Optional[int]:
+        return self.get('vehicleType')
+
+    @property
+    def price_history(self) -> List[PricePoint]:
+        """Histórico de preços (vazio fora de get_vehicle_history)"""
+        return [PricePoint(ponto) for ponto in self.get('priceHistory') or ()]
+
+
+# Registro de cada tipo de consulta (ver fipe_cache.endpoint_template)
+REGISTROS_POR_CONSULTA = {
+    'brands': Brand,
+    'models': Model,
+    'models_by_year': Model,
+    'years': YearEntry,
+    'details': VehicleDetails,
+    'history': VehicleDetails,
+}
+
+
+def tipar(dados: Any, template: str) -> Any:
+    """
+    Converte uma resposta decodificada nos registros do seu tipo de consulta
+
+    Listas são convertidas item a item; consultas sem registro (references) e
+    respostas já convertidas são devolvidas como estão.
+    """
+    registro = REGISTROS_POR_CONSULTA.get(template)
+    if registro is None:
+        return dados
+    if isinstance(dados, list):
+        if dados and isinstance(dados[0], registro):
+            return dados
+        return [registro(item) for item in dados]
+    if isinstance(dados, registro):
+        return dados
+    return registro(dados)
@@ -0,0 +1,309 @@
+"""
+Atualização mensal incremental da tabela de preços FIPE
+Compara a referência mais recente (get_references) com a do último snapshot,
+lista o catálogo da nova referência e só consulta detalhes onde é necessário,
+gerando um delta compacto (novos, removidos, preços alterados) que pode ser
+aplicado sobre o snapshot anterior.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from criar_tabela_carros import LinhaPreco
+from fipe_client import FipeClient, VehicleType
+from fipe_journal import CrawlJournal
+from fipe_rate_limit import QuotaExceededError
+from fipe_resolver import FipeCodeResolver
+
+
+def carregar_snapshot(caminho: str) -> Tuple[Optional[int], Dict[str, Dict[str, Any]]]:
+    """
+    Lê um snapshot gravado por salvar_snapshot
+
+    Args:
+        caminho: Arquivo do snapshot (.jsonl)
+
+    Returns:
+        (referência, {chave marca/modelo/ano: linha}). Snapshot inexistente = (None, {})
+    """
+    if not os.path.exists(caminho):
+        return None, {}
+
+    with open(caminho, encoding='utf-8') as f:
+        cabecalho = json.loads(f.readline())
+        linhas = {}
+        for texto in f:
+            registro = json.loads(texto)
+            linhas[registro.pop('Chave')] = registro
+    return cabecalho.get('reference'), linhas
+
+
+def carregar_pendentes(caminho: str) -> List[str]:
+    """
+    Chaves do snapshot que ainda não foram verificadas na sua referência
+
+    São as chaves cuja consulta falhou ou cujo catálogo não pôde ser listado na
+    última atualização; atualizar_incremental as repete na próxima execução,
+    mesmo que a referência não tenha mudado.
+    """
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, encoding='utf-8') as f:
+        return json.loads(f.readline()).get('pendentes', [])
+
+
+def salvar_snapshot(
+    caminho: str,
+    reference: int,
+    linhas: Dict[str, Dict[str, Any]],
+    pendentes: Iterable[str] = ()
+) -> None:
+    """
+    Grava o snapshot de forma atômica (arquivo temporário + rename)
+
+    Args:
+        caminho: Arquivo do snapshot (.jsonl)
+        reference: Referência dos dados
+        linhas: {chave marca/modelo/ano: linha com as colunas de LinhaPreco}
+        pendentes: Chaves a verificar novamente na próxima atualização
+    """
+    temporario = f"{caminho}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'reference': reference, 'pendentes': sorted(pendentes)}) + '\n')
+        for chave in sorted(linhas):
+            f.write(json.dumps({'Chave': chave, **linhas[chave]}, ensure_ascii=False) + '\n')
+    os.replace(temporario, caminho)
+
+
+def aplicar_delta(linhas: Dict[str, Dict[str, Any]], delta: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Aplica um delta sobre as linhas de um snapshot
+
+    Args:
+        linhas: {chave: linha} do snapshot anterior
+        delta: Delta gerado por atualizar_incremental
+
+    Returns:
+        Novo {chave: linha}, correspondente à referência do delta
+    """
+    removidos = set(delta['removidos'])
+    # Chaves mantidas cujo preço não foi confirmado continuam com a referência antiga
+    nao_verificados = set(delta.get('nao_verificados', ()))
+    reetiquetar = delta.get('precos_verificados', True) and delta.get('mes_referencia')
+
+    novas = {}
+    for chave, linha in linhas.items():
+        if chave in removidos:
+            continue
+        linha = dict(linha)
+        if reetiquetar and chave not in nao_verificados:
+            linha['Referência'] = delta['mes_referencia']
+        novas[chave] = linha
+
+    for alteracao in delta['precos_alterados']:
+        if alteracao['Chave'] in novas:
+            novas[alteracao['Chave']]['Preço'] = alteracao['Preço']
+
+    for linha in delta['novos']:
+        linha = dict(linha)
+        novas[linha.pop('Chave')] = linha
+
+    return novas
+
+
+def _listar_catalogo(
+    client: FipeClient,
+    vehicle_type: VehicleType,
+    reference: int,
+    limite_marcas: Optional[int] = None
+) -> Tuple[Dict[str, Tuple[int, int, str, str, str, str]], Set[str], Set[str]]:
+    """
+    Lista todas as chaves (marca, modelo, ano) da referência
+
+    Falhas ao listar os modelos de uma marca ou os anos de um modelo não
+    interrompem a listagem: a marca ou o modelo entra em `falhas`.
+
+    Returns:
+        ({chave: (marca, modelo, ano, nome da marca, nome do modelo, descrição do ano)},
+        fora_do_limite, falhas), em que fora_do_limite tem as chaves das marcas além
+        de limite_marcas e falhas as chaves de marcas ('marca') e modelos
+        ('marca/modelo') que não puderam ser listados
+
+    Raises:
+        Exception: Se a lista de marcas não puder ser obtida
+    """
+    catalogo = {}
+    fora_do_limite = set()
+    falhas = set()
+    brands = client.get_brands(vehicle_type, reference=reference)
+    if limite_marcas is not None:
+        fora_do_limite.update(CrawlJournal.chave(int(brand['code'])) for brand in brands[limite_marcas:])
+        brands = brands[:limite_marcas]
+
+    for brand in brands:
+        brand_code = int(brand['code'])
+        try:
+            models = client.get_models(vehicle_type, brand_code, reference=reference)
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            print(f"Erro ao listar modelos da marca {brand['name']}: {e}")
+            falhas.add(CrawlJournal.chave(brand_code))
+            continue
+
+        for model in models:
+            model_code = int(model['code'])
+            try:
+                years = client.get_years_by_model(vehicle_type, brand_code, model_code, reference=reference)
+            except QuotaExceededError:
+                raise
+            except Exception as e:
+                print(f"  Erro ao listar anos do modelo {model['name']}: {e}")
+                falhas.add(CrawlJournal.chave(brand_code, model_code))
+                continue
+
+            for year in years:
+                chave = CrawlJournal.chave(brand_code, model_code, year['code'])
+                catalogo[chave] = (
+                    brand_code, model_code, year['code'], brand['name'], model['name'], year['name']
+                )
+    return catalogo, fora_do_limite, falhas
+
+
+def _listada(chave: str, incompletos: Set[str]) -> bool:
+    """Se a marca e o modelo da chave foram listados (a ausência no catálogo é confirmada)"""
+    marca, modelo, _ = chave.split('/', 2)
+    return marca not in incompletos and f'{marca}/{modelo}' not in incompletos
+
+
+def atualizar_incremental(
+    client: FipeClient,
+    snapshot: str,
+    delta: Optional[str] = None,
+    vehicle_type: VehicleType = VehicleType.CARS,
+    resolver: Optional[FipeCodeResolver] = None,
+    verificar_precos: bool = False,
+    limite_marcas: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Atualiza o snapshot para a referência mais recente, consultando apenas o necessário
+
+    1. Se o snapshot já está na referência mais recente e não tem chaves
+       pendentes, nada é consultado
+    2. As listas do catálogo (marcas, modelos, anos) da nova referência são obtidas
+    3. Chaves (marca, modelo, ano) novas, removidas e mantidas são separadas; só
+       são removidas as chaves cuja marca e modelo foram listados
+    4. Detalhes (preço) são consultados para as chaves novas e, se verificar_precos,
+       para as mantidas (uma requisição por chave mantida, quase todo o catálogo);
+       chaves removidas não geram requisições
+    5. Chaves com falha (consulta ou listagem) ficam em nao_verificados e, com as
+       marcas e modelos que não puderam ser listados, são gravadas como pendentes
+       no snapshot, para serem repetidas na próxima execução
+
+    Args:
+        client: Cliente FIPE (com cache, as listas da referência fixa não são repetidas)
+        snapshot: Arquivo do snapshot (.jsonl); criado se não existir
+        delta: Arquivo onde gravar o delta em JSON (opcional)
+        vehicle_type: Tipo de veículo
+        resolver: Tabela modelo -> código FIPE (uma requisição por preço)
+        verificar_precos: Se True, consulta também o preço de cada chave mantida para
+            detectar alterações (custa uma requisição por chave mantida). Padrão:
+            só as chaves novas; as mantidas conservam o preço e a referência
+            anteriores no snapshot
+        limite_marcas: Número máximo de marcas (None = todas)
+
+    Returns:
+        Delta aplicado ({referencia_anterior, reference, mes_referencia, novos,
+        removidos, precos_alterados, precos_verificados, nao_verificados}) ou
+        None se já estava atualizado
+    """
+    referencia_anterior, linhas = carregar_snapshot(snapshot)
+    pendentes = set(carregar_pendentes(snapshot))
+    reference = int(client.get_references()[0]['code'])
+
+    if referencia_anterior == reference and not pendentes:
+        print(f"Snapshot já está na referência mais recente ({reference})")
+        return None
+
+    if referencia_anterior == reference:
+        print(f"Repetindo {len(pendentes)} chaves pendentes da referência {reference}")
+    else:
+        print(f"Atualizando snapshot: referência {referencia_anterior} -> {reference}")
+
+    if resolver is None:
+        resolver = FipeCodeResolver(client)
+
+    catalogo, fora_do_limite, falhas = _listar_catalogo(client, vehicle_type, reference, limite_marcas)
+    incompletos = fora_do_limite | falhas
+    ausentes = set(linhas) - set(catalogo)
+    novas_chaves = sorted(set(catalogo) - set(linhas))
+    removidas = sorted(chave for chave in ausentes if _listada(chave, incompletos))
+    # Chaves de marcas/modelos não listados: mantidas, mas sem confirmação
+    nao_listadas = sorted(chave for chave in ausentes if not _listada(chave, incompletos))
+    mantidas = sorted(set(catalogo) & set(linhas))
+    if referencia_anterior == reference:
+        # Mesma referência: só as mantidas que ainda não foram verificadas
+        mantidas = [chave for chave in mantidas if chave in pendentes]
+    elif not verificar_precos:
+        mantidas = []
+
+    print(f"Chaves novas: {len(novas_chaves)}, removidas: {len(removidas)}, "
+          f"mantidas: {len(set(catalogo) & set(linhas))}, não listadas: {len(nao_listadas)}")
+
+    novos: List[Dict[str, Any]] = []
+    precos_alterados: List[Dict[str, Any]] = []
+    nao_verificados: List[str] = list(nao_listadas)
+    mes_referencia = None
+
+    for chave in novas_chaves + mantidas:
+        brand_code, model_code, year_code, brand_name, model_name, year_name = catalogo[chave]
+        try:
+            details = resolver.get_vehicle_details(
+                vehicle_type, brand_code, model_code, year_code, reference=reference
+            )
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            print(f"  Erro ao buscar preço de {model_name} {year_name}: {e}")
+            # Chaves novas com falha também: repetidas na próxima execução
+            nao_verificados.append(chave)
+            continue
+
+        linha = LinhaPreco.de_detalhes(details, brand_name, model_name, year_name, vehicle_type).como_dict()
+        mes_referencia = mes_referencia or linha['Referência']
+
+        if chave in linhas:
+            if linha['Preço'] != linhas[chave].get('Preço'):
+                precos_alterados.append({
+                    'Chave': chave,
+                    'Preço Anterior': linhas[chave].get('Preço'),
+                    'Preço': linha['Preço'],
+                })
+        else:
+            novos.append({'Chave': chave, **linha})
+
+    resultado = {
+        'referencia_anterior': referencia_anterior,
+        'reference': reference,
+        'mes_referencia': mes_referencia,
+        'novos': novos,
+        'removidos': removidas,
+        'precos_alterados': precos_alterados,
+        'precos_verificados': verificar_precos,
+        'nao_verificados': nao_verificados,
+    }
+
+    if delta:
+        with open(delta, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False)
+
+    # Marcas e modelos que falharam na listagem também são pendentes: suas chaves
+    # podem nem estar no snapshot ainda
+    salvar_snapshot(
+        snapshot, reference, aplicar_delta(linhas, resultado), pendentes=nao_verificados + sorted(falhas)
+    )
+
+    print(f"Novos: {len(novos)}, removidos: {len(removidas)}, preços alterados: {len(precos_alterados)}, "
+          f"pendentes: {len(nao_verificados)}")
+    return resultado
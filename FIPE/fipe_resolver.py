@@ -0,0 +1,112 @@
+"""
+Resolução de códigos FIPE a partir de marca e modelo
+O código FIPE de um modelo vem nas próprias respostas da API ('codeFipe') e não
+muda entre referências. O mapeamento (tipo, marca, modelo) -> código FIPE é
+guardado em uma tabela SQLite e reaproveitado entre buscas, de modo que cada
+consulta de preço seja uma única requisição que sabidamente existe.
+"""
+
+import sqlite3
+import threading
+from typing import Optional, Dict, Any
+
+from fipe_client import FipeClient, VehicleType
+from fipe_rate_limit import QuotaExceededError
+
+
+class FipeCodeResolver:
+    """Tabela persistente modelo -> código FIPE, alimentada pelas respostas da API"""
+
+    def __init__(self, client: FipeClient, caminho: str = ':memory:'):
+        """
+        Args:
+            client: Cliente FIPE usado nas consultas
+            caminho: Arquivo SQLite da tabela (':memory:' = apenas durante o processo)
+        """
+        self.client = client
+        self.caminho = caminho
+        # Requisições feitas por get_vehicle_details (inclui as repetidas por código desatualizado)
+        self.requisicoes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS codigos_fipe ("
+            " tipo TEXT NOT NULL,"
+            " marca INTEGER NOT NULL,"
+            " modelo INTEGER NOT NULL,"
+            " codigo_fipe TEXT NOT NULL,"
+            " PRIMARY KEY (tipo, marca, modelo)"
+            ")"
+        )
+        self._conn.commit()
+
+    def lookup(self, vehicle_type: VehicleType, brand_id: int, model_id: int) -> Optional[str]:
+        """Retorna o código FIPE conhecido do modelo ou None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT codigo_fipe FROM codigos_fipe WHERE tipo = ? AND marca = ? AND modelo = ?",
+                (vehicle_type.value, int(brand_id), int(model_id))
+            ).fetchone()
+        return row[0] if row else None
+
+    def registrar(self, vehicle_type: VehicleType, brand_id: int, model_id: int, fipe_code: str) -> None:
+        """Grava (ou atualiza) o código FIPE de um modelo"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO codigos_fipe (tipo, marca, modelo, codigo_fipe) VALUES (?, ?, ?, ?)",
+                (vehicle_type.value, int(brand_id), int(model_id), fipe_code)
+            )
+            self._conn.commit()
+
+    def get_vehicle_details(
+        self,
+        vehicle_type: VehicleType,
+        brand_id: int,
+        model_id: int,
+        year_id: str,
+        reference: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Retorna os detalhes (preço) do veículo, normalmente com uma única requisição
+
+        Se o código FIPE do modelo já é conhecido, consulta por código FIPE;
+        senão consulta por marca/modelo/ano e grava o código da resposta. Se o
+        código gravado estiver desatualizado, a consulta por marca/modelo/ano é
+        uma segunda requisição; ambas são contadas em self.requisicoes.
+
+        Args:
+            vehicle_type: Tipo de veículo
+            brand_id: ID da marca
+            model_id: ID do modelo
+            year_id: ID do ano (formato: "2014-3")
+            reference: Código de referência (opcional)
+
+        Returns:
+            Dicionário com informações do veículo incluindo preço
+        """
+        fipe_code = self.lookup(vehicle_type, brand_id, model_id)
+        if fipe_code:
+            self._contar()
+            try:
+                return self.client.get_vehicle_details(vehicle_type, fipe_code, year_id, reference)
+            except QuotaExceededError:
+                raise
+            except Exception:
+                # Código desatualizado: resolver novamente pela marca/modelo
+                pass
+
+        self._contar()
+        details = self.client.get_vehicle_details_by_model(
+            vehicle_type, brand_id, model_id, year_id, reference
+        )
+        if details.get('codeFipe'):
+            self.registrar(vehicle_type, brand_id, model_id, details['codeFipe'])
+        return details
+
+    def _contar(self) -> None:
+        with self._lock:
+            self.requisicoes += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,289 @@
+"""
+Busca da tabela de preços FIPE dividida em shards
+As marcas de cada tipo de veículo (carros, motos e caminhões) são divididas
+entre N shards pelo código da marca. Cada shard roda em um processo próprio
+(ou em outra máquina, com --shard i/N), grava sua parte em um arquivo JSONL e
+mantém journals próprios para retomada. A etapa de mesclagem junta as partes,
+remove duplicatas e ordena as linhas de forma determinística.
+
+Uso:
+    python fipe_shards.py --processos 4                 # 4 processos locais + mesclagem
+    python fipe_shards.py --shard 0/3 --reference 330   # um shard (ex: em cada máquina)
+    python fipe_shards.py --mesclar partes_fipe         # junta as partes já gravadas
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from criar_tabela_carros import (
+    SCHEMA_PRECOS, EstadoBusca, LinhaPreco, aplicar_schema, exportar_tabela, iter_todos_precos
+)
+from fipe_cache import SQLiteCache
+from fipe_client import FipeClient, VehicleType
+from fipe_rate_limit import RateLimiter
+from fipe_resolver import FipeCodeResolver
+from fipe_sinks import JsonlSink, gravar_em_sinks
+
+# pandas só é importado na mesclagem: os processos dos shards não precisam dele
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+TODOS_TIPOS = (VehicleType.CARS, VehicleType.MOTORCYCLES, VehicleType.TRUCKS)
+
+DIRETORIO_PADRAO = 'partes_fipe'
+
+# Colunas que identificam um veículo em uma referência (chave da deduplicação)
+CHAVE_LINHA = ('Tipo', 'Código FIPE', 'Ano', 'Combustível', 'Referência')
+
+# Ordem final das linhas da tabela mesclada
+ORDEM_LINHAS = ('Tipo', 'Marca', 'Modelo', 'Ano', 'Combustível', 'Código FIPE', 'Referência')
+
+
+def interpretar_shard(texto: str) -> Tuple[int, int]:
+    """Converte "i/N" em (i, N), com 0 <= i < N"""
+    try:
+        indice, total = (int(parte) for parte in texto.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard inválido: {texto!r} (use i/N, ex: 0/4)")
+    if not 0 <= indice < total:
+        raise ValueError(f"Shard inválido: {texto!r} (use 0 <= i < N)")
+    return indice, total
+
+
+def caminho_parte(diretorio: str, indice: int, total: int) -> str:
+    """Arquivo da parte gravada por um shard"""
+    return os.path.join(diretorio, f'parte_{indice:03d}_de_{total:03d}.jsonl')
+
+
+def executar_shard(
+    indice: int,
+    total: int,
+    reference: int,
+    diretorio: str = DIRETORIO_PADRAO,
+    tipos: Sequence[VehicleType] = TODOS_TIPOS,
+    subscription_token: Optional[str] = None,
+    por_segundo: Optional[float] = 2.0,
+    base_url: Optional[str] = None,
+    **limites: Any
+) -> Optional[str]:
+    """
+    Busca as marcas de um shard, para todos os tipos de veículo, e grava sua parte
+
+    A parte é gravada em um arquivo temporário e renomeada apenas se a busca de
+    todos os tipos terminar (EstadoBusca.completa), de modo que a mesclagem nunca
+    veja uma parte incompleta. Os journals (um por tipo) ficam no diretório e
+    permitem retomar o shard após uma interrupção.
+
+    Args:
+        indice: Shard a executar (0 <= indice < total)
+        total: Número de shards
+        reference: Referência fixa (a mesma para todos os shards)
+        diretorio: Diretório das partes, journals e caches
+        tipos: Tipos de veículo a buscar
+        subscription_token: Token de assinatura (opcional)
+        por_segundo: Requisições por segundo deste shard; a cota diária é
+            compartilhada por todos os processos da máquina (None = sem limitador)
+        base_url: URL base da API (ex: servidor de fipe_mock_server)
+        **limites: limite_marcas, limite_modelos_por_marca, limite_anos_por_modelo
+            e max_requisicoes de iter_todos_precos
+
+    Returns:
+        Caminho da parte gravada, ou None se a busca parou antes do fim (limite de
+        requisições, falhas ou interrupção); execute o shard novamente para continuar
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    rate_limiter = None
+    if por_segundo is not None:
+        rate_limiter = RateLimiter.para_token(subscription_token, por_segundo=por_segundo, esperar_janela=True)
+
+    client = FipeClient(
+        subscription_token,
+        cache=SQLiteCache(os.path.join(diretorio, f'cache_{indice:03d}.sqlite')),
+        rate_limiter=rate_limiter,
+        base_url=base_url
+    )
+    resolver = FipeCodeResolver(client, os.path.join(diretorio, 'fipe_codigos.sqlite'))
+    estados = []
+
+    def linhas():
+        for vehicle_type in tipos:
+            estado = EstadoBusca()
+            estados.append(estado)
+            journal = os.path.join(
+                diretorio, f'journal_{vehicle_type.value}_{indice:03d}_de_{total:03d}.jsonl'
+            )
+            yield from iter_todos_precos(
+                client,
+                reference=reference,
+                journal=journal,
+                resolver=resolver,
+                vehicle_type=vehicle_type,
+                shard=(indice, total),
+                estado=estado,
+                **limites
+            )
+
+    destino = caminho_parte(diretorio, indice, total)
+    temporario = f"{destino}.tmp"
+    try:
+        gravar_em_sinks(linhas(), JsonlSink(temporario))
+    finally:
+        resolver.close()
+        client.cache.close()
+        client.close()
+
+    incompletos = [estado.motivo for estado in estados if not estado.completa]
+    if incompletos:
+        print(f"Shard {indice}/{total} incompleto ({', '.join(incompletos)}); parte mantida em {temporario}")
+        return None
+    os.replace(temporario, destino)
+    return destino
+
+
+def mesclar_partes(partes: Sequence[str]) -> pd.DataFrame:
+    """
+    Junta as partes dos shards em uma única tabela
+
+    O resultado não depende da ordem das partes nem de quantos shards foram
+    usados: linhas repetidas (mesmo tipo, código FIPE, ano, combustível e
+    referência) são mantidas uma única vez e as linhas são ordenadas por tipo,
+    marca, modelo e ano.
+
+    Args:
+        partes: Arquivos .jsonl gravados por executar_shard
+
+    Returns:
+        DataFrame tipado conforme SCHEMA_PRECOS
+    """
+    import pandas as pd
+
+    linhas: Dict[Tuple, Dict[str, Any]] = {}
+    for parte in sorted(partes):
+        for linha in ler_parte(parte):
+            chave = tuple(str(linha.get(coluna, '')) for coluna in CHAVE_LINHA)
+            anterior = linhas.get(chave)
+            # Entre duplicatas, fica a menor linha (independe da ordem de leitura)
+            if anterior is None or _ordenacao(linha) < _ordenacao(anterior):
+                linhas[chave] = linha
+
+    ordenadas = sorted(linhas.values(), key=_ordenacao)
+    df = pd.DataFrame(ordenadas, columns=list(LinhaPreco.COLUNAS))
+    df = aplicar_schema(df, SCHEMA_PRECOS)
+
+    referencias = df['Referência'].dropna().unique()
+    if len(referencias) > 1:
+        print(f"Aviso: as partes têm mais de uma referência: {', '.join(map(str, referencias))}")
+    return df
+
+
+def _ordenacao(linha: Dict[str, Any]) -> Tuple:
+    return tuple(str(linha.get(coluna, '')) for coluna in ORDEM_LINHAS) + (str(linha.get('Preço', '')),)
+
+
+def ler_parte(caminho: str) -> List[Dict[str, Any]]:
+    """Lê as linhas de uma parte (.jsonl gravado por JsonlSink)"""
+    with open(caminho, encoding='utf-8') as f:
+        return [json.loads(texto) for texto in f if texto.strip()]
+
+
+def buscar_em_paralelo(
+    processos: int,
+    reference: Optional[int] = None,
+    diretorio: str = DIRETORIO_PADRAO,
+    tipos: Sequence[VehicleType] = TODOS_TIPOS,
+    subscription_token: Optional[str] = None,
+    **kwargs: Any
+) -> pd.DataFrame:
+    """
+    Executa a busca em `processos` shards locais (um processo cada) e mescla as partes
+
+    Args:
+        processos: Número de shards/processos
+        reference: Referência (None = mais recente, fixada antes de iniciar os shards)
+        diretorio: Diretório das partes, journals e caches
+        tipos: Tipos de veículo a buscar
+        subscription_token: Token de assinatura (opcional)
+        **kwargs: Demais argumentos de executar_shard (por_segundo, base_url, limites)
+
+    Returns:
+        Tabela mesclada (ver mesclar_partes)
+
+    Raises:
+        RuntimeError: Se algum shard não terminou (as partes concluídas e os
+            journals ficam no diretório; execute novamente para continuar)
+    """
+    if reference is None:
+        with FipeClient(subscription_token, base_url=kwargs.get('base_url')) as client:
+            reference = int(client.get_references()[0]['code'])
+    print(f"Referência utilizada: {reference}; {processos} shards")
+
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(processos, mp_context=contexto) as executor:
+        futuros = [
+            executor.submit(
+                executar_shard, indice, processos, reference, diretorio, tipos, subscription_token, **kwargs
+            )
+            for indice in range(processos)
+        ]
+        partes = [futuro.result() for futuro in futuros]
+
+    incompletos = [str(indice) for indice, parte in enumerate(partes) if parte is None]
+    if incompletos:
+        raise RuntimeError(
+            f"Shards incompletos: {', '.join(incompletos)} de {processos}; "
+            "execute novamente para continuar dos journals"
+        )
+    return mesclar_partes(partes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca da tabela FIPE dividida em shards")
+    modo = parser.add_mutually_exclusive_group(required=True)
+    modo.add_argument('--processos', type=int, help="executa N shards locais e mescla as partes")
+    modo.add_argument('--shard', help="executa apenas o shard i/N (0 <= i < N)")
+    modo.add_argument('--mesclar', metavar='DIRETORIO', help="mescla as partes gravadas no diretório")
+    parser.add_argument('--reference', type=int, help="referência fixa (obrigatória com --shard em várias máquinas)")
+    parser.add_argument('--tipos', nargs='+', choices=[t.value for t in TODOS_TIPOS], default=[t.value for t in TODOS_TIPOS])
+    parser.add_argument('--diretorio', default=DIRETORIO_PADRAO)
+    parser.add_argument('--por-segundo', type=float, default=2.0, help="requisições por segundo de cada shard")
+    parser.add_argument('--saida', default='todos_veiculos_precos.csv', help="tabela mesclada (.csv)")
+    args = parser.parse_args()
+
+    tipos = [VehicleType(t) for t in args.tipos]
+
+    if args.shard:
+        indice, total = interpretar_shard(args.shard)
+        reference = args.reference
+        if reference is None:
+            with FipeClient() as client:
+                reference = int(client.get_references()[0]['code'])
+            print(f"Aviso: sem --reference; usando a mais recente ({reference}). "
+                  "Todos os shards devem usar a mesma referência.")
+        parte = executar_shard(indice, total, reference, args.diretorio, tipos, por_segundo=args.por_segundo)
+        if parte is None:
+            sys.exit("Shard incompleto: execute novamente para continuar dos journals")
+        print(f"Parte gravada em {parte}")
+        return
+
+    if args.mesclar:
+        df = mesclar_partes(glob.glob(os.path.join(args.mesclar, 'parte_*.jsonl')))
+    else:
+        df = buscar_em_paralelo(
+            args.processos, args.reference, args.diretorio, tipos, por_segundo=args.por_segundo
+        )
+
+    print(f"Tabela mesclada: {len(df)} veículos")
+    exportar_tabela(df, formato='csv', arquivo=args.saida)
+
+
+if __name__ == "__main__":
+    main()
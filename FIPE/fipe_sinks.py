@@ -0,0 +1,378 @@
+"""
+Destinos (sinks) para gravar resultados de buscas à medida que chegam
+Usados com os geradores iter_* de criar_tabela_carros: cada registro é gravado
+assim que é obtido, com memória constante, sem montar a tabela inteira antes.
+
+Registros são NamedTuples com o atributo de classe COLUNAS (nomes das colunas
+da tabela, na ordem dos campos) ou dicionários com os nomes das colunas.
+"""
+
+import csv
+import html
+import json
+import math
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+# Linhas de uma planilha do Excel (incluindo o cabeçalho)
+LIMITE_LINHAS_EXCEL = 1048576
+
+
+def registro_para_dict(registro: Any) -> Dict[str, Any]:
+    """Converte um registro (NamedTuple com COLUNAS ou dict) em dicionário coluna -> valor"""
+    if isinstance(registro, dict):
+        return registro
+    return dict(zip(registro.COLUNAS, registro))
+
+
+def colunas_do_registro(registro: Any) -> Sequence[str]:
+    """Retorna os nomes das colunas de um registro"""
+    if isinstance(registro, dict):
+        return list(registro.keys())
+    return registro.COLUNAS
+
+
+def _sem_valor(valor: Any) -> bool:
+    """True para None, NaN e os nulos do pandas (pd.NA, pd.NaT)"""
+    if valor is None or type(valor).__name__ in ('NAType', 'NaTType'):
+        return True
+    return isinstance(valor, float) and math.isnan(valor)
+
+
+def _valores(registro: Any, colunas: Sequence[str]) -> Sequence[Any]:
+    """Valores de um registro na ordem das colunas"""
+    if isinstance(registro, dict):
+        return [registro.get(c, '') for c in colunas]
+    return registro
+
+
+class Sink:
+    """Interface dos destinos: write(registro) para cada registro e close() ao final"""
+
+    def write(self, registro: Any) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class CsvSink(Sink):
+    """Grava registros em CSV (UTF-8 com BOM, como exportar_tabela)"""
+
+    def __init__(self, arquivo: str, colunas: Optional[Sequence[str]] = None):
+        """
+        Args:
+            arquivo: Caminho do arquivo CSV
+            colunas: Cabeçalho (padrão: colunas do primeiro registro)
+        """
+        self.arquivo = arquivo
+        self.colunas = colunas
+        self.total = 0
+        self._f = open(arquivo, 'w', newline='', encoding='utf-8-sig')
+        self._writer = None
+
+    def write(self, registro: Any) -> None:
+        if self._writer is None:
+            if self.colunas is None:
+                self.colunas = colunas_do_registro(registro)
+            self._writer = csv.writer(self._f)
+            self._writer.writerow(self.colunas)
+
+        self._writer.writerow(['' if _sem_valor(v) else v for v in _valores(registro, self.colunas)])
+        self.total += 1
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+
+
+class JsonlSink(Sink):
+    """Grava um objeto JSON por linha (JSON Lines)"""
+
+    def __init__(self, arquivo: str, flush: bool = False):
+        """
+        Args:
+            arquivo: Caminho do arquivo .jsonl
+            flush: Se True, descarrega o buffer a cada registro
+        """
+        self.arquivo = arquivo
+        self.flush = flush
+        self.total = 0
+        self._f = open(arquivo, 'w', encoding='utf-8')
+
+    def write(self, registro: Any) -> None:
+        self._f.write(json.dumps(registro_para_dict(registro), ensure_ascii=False) + '\n')
+        if self.flush:
+            self._f.flush()
+        self.total += 1
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+
+
+class XlsxSink(Sink):
+    """
+    Grava registros em XLSX com memória constante (openpyxl em modo write-only)
+
+    As linhas são gravadas em disco à medida que chegam, sem montar a planilha em
+    memória. Ao atingir o limite de linhas do Excel, a gravação continua em uma
+    nova aba ("Tabela", "Tabela 2", ...), com o cabeçalho repetido.
+    """
+
+    def __init__(
+        self,
+        arquivo: str,
+        colunas: Optional[Sequence[str]] = None,
+        linhas_por_aba: int = LIMITE_LINHAS_EXCEL - 1,
+        nome_aba: str = 'Tabela'
+    ):
+        """
+        Args:
+            arquivo: Caminho do arquivo .xlsx
+            colunas: Cabeçalho (padrão: colunas do primeiro registro)
+            linhas_por_aba: Linhas de dados por aba (padrão: limite do Excel menos o cabeçalho)
+            nome_aba: Nome da primeira aba; as seguintes recebem um número
+        """
+        from openpyxl import Workbook
+
+        self.arquivo = arquivo
+        self.colunas = colunas
+        self.linhas_por_aba = linhas_por_aba
+        self.nome_aba = nome_aba
+        self.total = 0
+        self.abas = 0
+        self._workbook = Workbook(write_only=True)
+        self._aba = None
+        self._linhas_na_aba = 0
+
+    def _nova_aba(self) -> None:
+        self.abas += 1
+        nome = self.nome_aba if self.abas == 1 else f"{self.nome_aba} {self.abas}"
+        self._aba = self._workbook.create_sheet(nome[:31])
+        self._aba.append(list(self.colunas))
+        self._linhas_na_aba = 0
+
+    def write(self, registro: Any) -> None:
+        if self.colunas is None:
+            self.colunas = colunas_do_registro(registro)
+        if self._aba is None or self._linhas_na_aba >= self.linhas_por_aba:
+            self._nova_aba()
+
+        self._aba.append([None if _sem_valor(v) else v for v in _valores(registro, self.colunas)])
+        self._linhas_na_aba += 1
+        self.total += 1
+
+    def close(self) -> None:
+        if self._workbook is None:
+            return
+        if self._aba is None:
+            # Tabela vazia: uma aba só com o cabeçalho (ou vazia, sem colunas)
+            self.colunas = self.colunas or ()
+            self._nova_aba()
+        self._workbook.save(self.arquivo)
+        self._workbook = None
+
+
+class HtmlSink(Sink):
+    """
+    Grava registros como tabela HTML, em pedaços e com memória constante
+
+    Com linhas_por_pagina, a tabela é dividida em páginas (arquivo.html,
+    arquivo_2.html, ...) ligadas por links "anterior"/"próxima", para que
+    navegadores abram tabelas com centenas de milhares de linhas.
+    """
+
+    def __init__(
+        self,
+        arquivo: str,
+        colunas: Optional[Sequence[str]] = None,
+        linhas_por_pagina: Optional[int] = None,
+        classes: str = 'table table-striped',
+        table_id: str = 'tabela-carros'
+    ):
+        """
+        Args:
+            arquivo: Caminho do arquivo .html (primeira página)
+            colunas: Cabeçalho (padrão: colunas do primeiro registro)
+            linhas_por_pagina: Linhas por página (None = uma única página)
+            classes: Classes CSS da tabela (como em DataFrame.to_html)
+            table_id: id da tabela
+        """
+        self.arquivo = arquivo
+        self.colunas = colunas
+        self.linhas_por_pagina = linhas_por_pagina
+        self.classes = classes
+        self.table_id = table_id
+        self.total = 0
+        self.paginas: List[str] = []
+        self._f = None
+        self._linhas_na_pagina = 0
+        self._fechado = False
+
+    def _caminho_pagina(self, numero: int) -> str:
+        if numero == 1:
+            return self.arquivo
+        base, extensao = os.path.splitext(self.arquivo)
+        return f"{base}_{numero}{extensao or '.html'}"
+
+    def _abrir_pagina(self) -> None:
+        numero = len(self.paginas) + 1
+        caminho = self._caminho_pagina(numero)
+        self.paginas.append(caminho)
+        self._f = open(caminho, 'w', encoding='utf-8')
+        self._linhas_na_pagina = 0
+
+        titulo = os.path.splitext(os.path.basename(self.arquivo))[0]
+        if numero > 1:
+            titulo += f" ({numero})"
+        self._f.write(
+            '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+            f'<title>{html.escape(titulo)}</title>\n</head>\n<body>\n'
+        )
+        if numero > 1:
+            anterior = os.path.basename(self._caminho_pagina(numero - 1))
+            self._f.write(f'<p><a href="{html.escape(anterior)}">&laquo; anterior</a></p>\n')
+        self._f.write(
+            f'<table border="1" class="dataframe {html.escape(self.classes)}" id="{html.escape(self.table_id)}">\n'
+            '  <thead>\n    <tr style="text-align: right;">\n'
+            + ''.join(f'      <th>{html.escape(str(c))}</th>\n' for c in self.colunas)
+            + '    </tr>\n  </thead>\n  <tbody>\n'
+        )
+
+    def _fechar_pagina(self, tem_proxima: bool) -> None:
+        self._f.write('  </tbody>\n</table>\n')
+        if tem_proxima:
+            proxima = os.path.basename(self._caminho_pagina(len(self.paginas) + 1))
+            self._f.write(f'<p><a href="{html.escape(proxima)}">próxima &raquo;</a></p>\n')
+        self._f.write('</body>\n</html>\n')
+        self._f.close()
+
+    def write(self, registro: Any) -> None:
+        if self.colunas is None:
+            self.colunas = colunas_do_registro(registro)
+        if self._f is None:
+            self._abrir_pagina()
+        elif self.linhas_por_pagina and self._linhas_na_pagina >= self.linhas_por_pagina:
+            self._fechar_pagina(tem_proxima=True)
+            self._abrir_pagina()
+
+        celulas = ''.join(
+            f'      <td>{"" if _sem_valor(v) else html.escape(str(v))}</td>\n'
+            for v in _valores(registro, self.colunas)
+        )
+        self._f.write(f'    <tr>\n{celulas}    </tr>\n')
+        self._linhas_na_pagina += 1
+        self.total += 1
+
+    def close(self) -> None:
+        if self._fechado:
+            return
+        self._fechado = True
+        if self._f is None:
+            self.colunas = self.colunas or ()
+            self._abrir_pagina()
+        self._fechar_pagina(tem_proxima=False)
+
+
+class DataFrameChunkSink(Sink):
+    """Agrupa registros em DataFrames de tamanho fixo e os entrega a um callback"""
+
+    def __init__(self, ao_completar: Callable[[Any], None], tamanho: int = 10000):
+        """
+        Args:
+            ao_completar: Função chamada com cada DataFrame (pedaço) completo
+            tamanho: Número de linhas por pedaço
+        """
+        self.ao_completar = ao_completar
+        self.tamanho = tamanho
+        self.total = 0
+        self._buffer: List[Any] = []
+
+    def write(self, registro: Any) -> None:
+        self._buffer.append(registro)
+        self.total += 1
+        if len(self._buffer) >= self.tamanho:
+            self._descarregar()
+
+    def _descarregar(self) -> None:
+        if self._buffer:
+            chunk = registros_para_dataframe(self._buffer)
+            self._buffer = []
+            self.ao_completar(chunk)
+
+    def close(self) -> None:
+        self._descarregar()
+
+
+def registros_para_dataframe(registros: List[Any], colunas: Optional[Sequence[str]] = None):
+    """
+    Monta um DataFrame a partir de uma lista de registros
+
+    Args:
+        registros: Lista de registros (NamedTuples com COLUNAS ou dicts)
+        colunas: Colunas do DataFrame (necessário para uma lista vazia ter colunas)
+
+    Returns:
+        DataFrame pandas
+    """
+    import pandas as pd
+
+    if registros and colunas is None:
+        colunas = colunas_do_registro(registros[0])
+    if registros and isinstance(registros[0], dict):
+        return pd.DataFrame(registros, columns=colunas)
+    return pd.DataFrame.from_records(registros, columns=colunas)
+
+
+def iter_dataframes(registros: Iterable[Any], tamanho: int = 10000) -> Iterator[Any]:
+    """
+    Agrupa um fluxo de registros em DataFrames de até `tamanho` linhas
+
+    Args:
+        registros: Iterável de registros (ex: iter_todos_precos(...))
+        tamanho: Número de linhas por DataFrame
+
+    Yields:
+        DataFrames pandas
+    """
+    buffer: List[Any] = []
+    for registro in registros:
+        buffer.append(registro)
+        if len(buffer) >= tamanho:
+            yield registros_para_dataframe(buffer)
+            buffer = []
+    if buffer:
+        yield registros_para_dataframe(buffer)
+
+
+def gravar_em_sinks(registros: Iterable[Any], *sinks: Sink) -> int:
+    """
+    Consome um fluxo de registros gravando cada um em todos os destinos
+
+    Os destinos são fechados ao final, mesmo em caso de erro ou interrupção.
+
+    Args:
+        registros: Iterável de registros
+        *sinks: Destinos (CsvSink, JsonlSink, XlsxSink, HtmlSink, DataFrameChunkSink, ...)
+
+    Returns:
+        Número de registros consumidos
+    """
+    total = 0
+    try:
+        for registro in registros:
+            for sink in sinks:
+                sink.write(registro)
+            total += 1
+    finally:
+        for sink in sinks:
+            sink.close()
+    return total
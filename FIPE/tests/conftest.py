@@ -0,0 +1,20 @@
+"""
+Configuração dos testes: os módulos do projeto ficam na pasta FIPE (sem pacote)
+e a API é simulada por fipe_mock_server.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fipe_mock_server import MockFipeServer  # noqa: E402
+
+
+@pytest.fixture
+def servidor():
+    """API simulada pequena: 3 marcas x 3 modelos x 2 anos por tipo de veículo"""
+    with MockFipeServer(marcas=3, modelos_por_marca=3, anos_por_modelo=2) as s:
+        yield s
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+import pytest
+
+from fipe_async_client import AsyncFipeClient
+from fipe_cache import SQLiteCache
+from fipe_client import FipeAPIError, FipeClient, VehicleType
+from fipe_mock_server import MockFipeServer
+from fipe_rate_limit import DailyQuota, RateLimiter
+
+
+def test_mesmas_respostas_do_cliente_sincrono(servidor):
+    sincrono = FipeClient(base_url=servidor.url)
+    brands = sincrono.get_brands(VehicleType.CARS)
+    models = sincrono.get_models(VehicleType.CARS, int(brands[0]['code']))
+
+    async def buscar():
+        async with AsyncFipeClient(base_url=servidor.url, max_concorrencia=4) as client:
+            return await asyncio.gather(
+                client.get_brands(VehicleType.CARS),
+                client.get_models(VehicleType.CARS, int(brands[0]['code'])),
+            )
+
+    assert asyncio.run(buscar()) == [brands, models]
+
+
+def test_chamadas_simultaneas_iguais_geram_uma_requisicao(servidor):
+    async def buscar():
+        async with AsyncFipeClient(base_url=servidor.url, memory_cache=False) as client:
+            return await asyncio.gather(*[client.get_brands(VehicleType.CARS) for _ in range(10)])
+
+    respostas = asyncio.run(buscar())
+    assert all(r == respostas[0] for r in respostas)
+    assert servidor.total == 1
+
+
+def test_erro_404_levanta_fipe_api_error(servidor):
+    async def buscar():
+        async with AsyncFipeClient(base_url=servidor.url) as client:
+            await client.get_vehicle_details(VehicleType.CARS, '999999-9', '2020-1')
+
+    with pytest.raises(FipeAPIError) as erro:
+        asyncio.run(buscar())
+    assert erro.value.status == 404
+
+
+class _CacheComThreads(SQLiteCache):
+    """SQLiteCache que anota em qual thread cada operação rodou"""
+
+    def __init__(self, caminho):
+        super().__init__(caminho)
+        self.threads = set()
+
+    def get(self, chave):
+        self.threads.add(threading.get_ident())
+        return super().get(chave)
+
+    def set(self, chave, valor, permanente=False):
+        self.threads.add(threading.get_ident())
+        super().set(chave, valor, permanente)
+
+
+def test_cache_e_cota_em_disco_nao_rodam_no_event_loop(servidor, tmp_path):
+    cache = _CacheComThreads(str(tmp_path / 'cache.sqlite'))
+    quota = DailyQuota(100, caminho=str(tmp_path / 'quota.sqlite'))
+
+    async def buscar():
+        async with AsyncFipeClient(base_url=servidor.url, cache=cache,
+                                   rate_limiter=RateLimiter(por_segundo=100, quota=quota)) as client:
+            return await client.get_brands(VehicleType.CARS, reference=330), threading.get_ident()
+
+    brands, thread_do_loop = asyncio.run(buscar())
+    assert brands and quota.restantes() == 99
+    assert cache.threads and thread_do_loop not in cache.threads
+    cache.close()
+
+
+def test_429_e_repetido_com_a_politica_do_cliente_sincrono():
+    with MockFipeServer(marcas=2, taxa_429=0.5, retry_after=0, semente=3) as instavel:
+        async def buscar(max_retries):
+            async with AsyncFipeClient(base_url=instavel.url, memory_cache=False, max_retries=max_retries,
+                                       backoff_base=0.01) as client:
+                return await asyncio.gather(
+                    *[client.get_models(VehicleType.CARS, codigo) for codigo in (1, 2)] * 5,
+                    return_exceptions=True
+                )
+
+        assert not [r for r in asyncio.run(buscar(10)) if isinstance(r, Exception)]
+        assert any(isinstance(r, FipeAPIError) and r.status == 429 for r in asyncio.run(buscar(0)))
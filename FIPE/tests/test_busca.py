@@ -0,0 +1,50 @@
+from fipe_busca import IndiceBusca, tokenizar
+from fipe_client import VehicleType
+
+
+class _Catalogo:
+    """Catálogo mínimo no formato de OfflineFipeClient.iter_modelos"""
+
+    MODELOS = [
+        (VehicleType.CARS, ('59', 'VW - VolksWagen'), ('5580', 'AMAROK High.CD 2.0 16V TDI 4x4 Dies. Aut'),
+         '005340-6', [('2014-3', '2014 Diesel'), ('2013-3', '2013 Diesel')]),
+        (VehicleType.CARS, ('59', 'VW - VolksWagen'), ('4010', 'Gol 1.0 Flex 8V 4p'),
+         '005228-0', [('2014-1', '2014 Gasolina'), ('2012-1', '2012 Álcool/Gasolina')]),
+        (VehicleType.CARS, ('21', 'Fiat'), ('2030', 'Palio 1.0 Fire Flex'),
+         '001267-0', [('2014-1', '2014 Gasolina')]),
+        (VehicleType.MOTORCYCLES, ('80', 'HONDA'), ('3000', 'CG 160 FAN'),
+         '811120-3', [('2020-1', '2020 Gasolina')]),
+    ]
+
+    def iter_modelos(self):
+        for tipo, (bc, bn), (mc, mn), fipe, anos in self.MODELOS:
+            yield tipo, {'code': bc, 'name': bn}, {'code': mc, 'name': mn}, fipe, [
+                {'code': c, 'name': n} for c, n in anos
+            ]
+
+
+def test_tokenizar_remove_acentos_e_mantem_cilindrada():
+    assert tokenizar('Álcool/Gasolina 1.6') == ['alcool', 'gasolina', '1.6']
+
+
+def test_todos_os_termos_casados_vem_primeiro():
+    busca = IndiceBusca(_Catalogo())
+    resultados = busca.buscar('amarok 2.0 diesel 2014')
+    assert (resultados[0].modelo.startswith('AMAROK'), resultados[0].ano) == (True, '2014-3')
+    assert resultados[0].pontuacao > resultados[1].pontuacao
+
+
+def test_prefixo_erro_de_digitacao_e_codigo_fipe():
+    busca = IndiceBusca(_Catalogo())
+    assert busca.buscar('gol 1.0 fle', limite=1)[0].codigo_modelo == '4010'
+    assert busca.buscar('pallio', limite=1)[0].codigo_modelo == '2030'
+    assert busca.buscar('005340', limite=1)[0].codigo_fipe == '005340-6'
+
+
+def test_filtro_por_tipo_limite_e_sugestoes():
+    busca = IndiceBusca(_Catalogo())
+    assert busca.buscar('gasolina', vehicle_type=VehicleType.MOTORCYCLES)[0].marca == 'HONDA'
+    assert len(busca.buscar('gasolina', limite=2)) == 2
+    assert busca.buscar('xyzw') == []
+    sugestoes = busca.sugerir('vw', limite=5)
+    assert [s.codigo_modelo for s in sugestoes] == ['5580', '4010']
@@ -0,0 +1,79 @@
+import time
+
+from fipe_cache import MemoryCache, SQLiteCache, cache_key
+from fipe_client import FipeClient, VehicleType
+from fipe_mock_server import MockFipeServer
+
+
+def test_lru_descarta_a_menos_usada_de_cada_tipo():
+    cache = MemoryCache(capacidades={'models': 2, 'years': 1})
+    cache.set('m1', 'models', 1, 330)
+    cache.set('m2', 'models', 2, 330)
+    cache.set('a1', 'years', 'a', 330)
+    assert cache.get('m1', 'models') == 1  # m2 passa a ser a menos usada
+    cache.set('m3', 'models', 3, 330)
+
+    assert cache.get('m2', 'models') is None
+    assert cache.get('m1', 'models') == 1 and cache.get('m3', 'models') == 3
+    assert cache.get('a1', 'years') == 'a'  # outra seção, não afetada
+    assert cache.stats()['models'] == {'hits': 3, 'misses': 1, 'size': 2, 'capacity': 2}
+
+
+def test_so_respostas_sem_referencia_expiram():
+    cache = MemoryCache(ttl_latest=0.1)
+    cache.set('fixa', 'brands', [1], 330)
+    cache.set('recente', 'brands', [2])
+    assert cache.contem('recente', 'brands')
+    time.sleep(0.15)
+
+    assert not cache.contem('recente', 'brands')
+    assert cache.get('recente', 'brands') is None
+    assert cache.get('fixa', 'brands') == [1]
+
+
+def test_invalidate_por_referencia_recentes_ou_tudo():
+    cache = MemoryCache()
+    cache.set('a', 'brands', 1, 329)
+    cache.set('b', 'models', 2, 330)
+    cache.set('c', 'models', 3)
+
+    assert cache.invalidate(reference=329) == 1
+    assert cache.get('a', 'brands') is None and cache.get('b', 'models') == 2
+    assert cache.invalidate(latest=True) == 1
+    assert cache.get('c', 'models') is None
+    assert cache.invalidate() == 1
+    assert cache.get('b', 'models') is None
+
+
+def test_sqlite_cache_guarda_e_expira_respostas(tmp_path):
+    caminho = str(tmp_path / 'cache.sqlite')
+    cache = SQLiteCache(caminho, ttl_latest=0.1)
+    resposta = [{'code': '1', 'name': 'Marca Ç'}]
+    cache.set('fixa', resposta, permanente=True)
+    cache.set('recente', resposta)
+    cache.close()
+
+    cache = SQLiteCache(caminho, ttl_latest=0.1)
+    assert cache.get('fixa') == resposta and cache.get('recente') == resposta
+    time.sleep(0.15)
+    assert cache.get('recente') is None
+    assert cache.purge_expired() == 1
+    assert cache.get('fixa') == resposta
+    cache.clear()
+    assert cache.get('fixa') is None
+    cache.close()
+
+
+def test_chave_inclui_o_servidor(tmp_path):
+    assert cache_key('cars/brands', {'reference': 330}, 'http://a/') == 'http://a/cars/brands?reference=330'
+    assert cache_key('cars/brands', None, 'http://a') != cache_key('cars/brands', None, 'http://b')
+
+    cache = SQLiteCache(str(tmp_path / 'cache.sqlite'))
+    with MockFipeServer(marcas=2, semente=1) as primeiro, MockFipeServer(marcas=3, semente=2) as segundo:
+        marcas = [
+            FipeClient(base_url=servidor.url, cache=cache).get_brands(VehicleType.CARS, reference=330)
+            for servidor in (primeiro, segundo)
+        ]
+        assert segundo.total == 1
+    assert [len(m) for m in marcas] == [2, 3]
+    cache.close()
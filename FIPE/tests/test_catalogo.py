@@ -0,0 +1,42 @@
+import pytest
+
+from criar_tabela_carros import iter_todos_precos
+from fipe_catalogo import OfflineFipeClient, construir_catalogo
+from fipe_client import FipeAPIError, FipeClient, VehicleType
+from fipe_journal import iter_unidades
+
+
+@pytest.fixture
+def catalogo(servidor, tmp_path):
+    journal = str(tmp_path / 'carros.journal.jsonl')
+    list(iter_todos_precos(FipeClient(base_url=servidor.url), reference=330, journal=journal))
+    destino = construir_catalogo(str(tmp_path / 'catalogo'), {VehicleType.CARS: [journal]}, 330)
+    return OfflineFipeClient(destino), journal
+
+
+def test_indice_hash_encontra_todas_as_unidades(servidor, catalogo):
+    offline, journal = catalogo
+    online = FipeClient(base_url=servidor.url)
+    unidades = list(iter_unidades(journal))
+    assert len(unidades) == 18
+
+    for chave, _ in unidades:
+        marca, modelo, ano = chave.split('/')
+        esperado = online.get_vehicle_details_by_model(VehicleType.CARS, marca, modelo, ano, 330)
+        por_modelo = offline.get_vehicle_details_by_model(VehicleType.CARS, marca, modelo, ano, 330)
+        por_codigo = offline.get_vehicle_details(VehicleType.CARS, esperado['codeFipe'], ano, 330)
+        for detalhes in (por_modelo, por_codigo):
+            assert detalhes['price'] == esperado['price']
+            assert detalhes['codeFipe'] == esperado['codeFipe']
+            assert detalhes['modelYear'] == esperado['modelYear']
+
+
+def test_chaves_ausentes_sao_404(catalogo):
+    offline, _ = catalogo
+    with pytest.raises(FipeAPIError) as erro:
+        offline.get_vehicle_details(VehicleType.CARS, '999999-9', '2020-1')
+    assert erro.value.status == 404
+    with pytest.raises(FipeAPIError):
+        offline.get_models(VehicleType.CARS, 999)
+    with pytest.raises(FipeAPIError):
+        offline.get_brands(VehicleType.CARS, reference=329)
@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+from criar_tabela_carros import iter_todos_precos
+from fipe_cli import TIPOS, criar_parser, main
+from fipe_client import FipeClient
+from fipe_rate_limit import RateLimiter
+
+REFERENCIA = 330
+PASTA_FIPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_parser_aceita_os_subcomandos():
+    parser = criar_parser()
+    args = parser.parse_args(['crawl', '--tipo', 'motorcycles', '--limite-marcas', '2'])
+    assert args.tipo == 'motorcycles'
+    assert args.limite_marcas == 2
+    assert args.saida is None
+
+    args = parser.parse_args(['lookup', '004278-1', '2014-3', '--json'])
+    assert (args.codigo_fipe, args.ano, args.json, args.tipo) == ('004278-1', '2014-3', True, TIPOS[0])
+
+    args = parser.parse_args(['export', 'a.jsonl', 'b.jsonl', '--formato', 'csv', 'parquet'])
+    assert args.entradas == ['a.jsonl', 'b.jsonl']
+    assert args.formato == ['csv', 'parquet']
+
+
+def test_lookup_consulta_a_api(servidor, capsys):
+    linha = next(iter_todos_precos(FipeClient(base_url=servidor.url), reference=REFERENCIA))
+    capsys.readouterr()
+    api = ['--reference', str(REFERENCIA), '--base-url', servidor.url, '--cache', '']
+
+    assert main(['lookup', linha.codigo_fipe] + api) == 0
+    anos = [texto.split('\t') for texto in capsys.readouterr().out.splitlines()]
+    ano_id = next(codigo for codigo, nome in anos if nome == linha.ano_descricao)
+
+    assert main(['lookup', linha.codigo_fipe, ano_id, '--json'] + api) == 0
+    detalhes = json.loads(capsys.readouterr().out)
+    assert detalhes['codeFipe'] == linha.codigo_fipe
+    assert detalhes['price'] == linha.preco
+
+    assert main(['lookup', '999999-9', '--base-url', servidor.url, '--cache', '']) == 2
+
+
+def test_crawl_incompleto_termina_com_erro(servidor, tmp_path, monkeypatch):
+    # Sem gastar a cota registrada em ~/.fipe_quota.sqlite nem esperar o ritmo da API real
+    monkeypatch.setattr(RateLimiter, 'para_token', classmethod(lambda cls, *a, **kw: cls(por_segundo=1000)))
+    saida = str(tmp_path / 'carros.jsonl')
+    comum = ['crawl', '--reference', str(REFERENCIA), '--base-url', servidor.url,
+             '--cache', '', '--codigos', '', '--saida', saida]
+
+    assert main(comum + ['--max-requisicoes', '5']) == 1
+    assert main(comum) == 0
+    with open(saida, encoding='utf-8') as f:
+        assert sum(1 for _ in f) == 18
+
+
+def test_importar_a_cli_nao_carrega_modulos_pesados():
+    codigo = (
+        "import sys, fipe_cli\n"
+        "print(sorted(m for m in ('pandas', 'numpy', 'pyarrow') if m in sys.modules))"
+    )
+    resultado = subprocess.run([sys.executable, '-c', codigo], cwd=PASTA_FIPE,
+                               capture_output=True, text=True, check=True)
+    assert resultado.stdout.strip() == '[]'
@@ -0,0 +1,41 @@
+import threading
+
+from fipe_client import FipeAPIError, FipeClient, VehicleType
+from fipe_mock_server import MockFipeServer
+
+
+def _em_threads(funcao, quantidade=8):
+    """Executa funcao() em várias threads liberadas juntas; devolve resultados ou exceções"""
+    barreira = threading.Barrier(quantidade)
+    resultados = [None] * quantidade
+
+    def executar(i):
+        barreira.wait()
+        try:
+            resultados[i] = funcao()
+        except Exception as e:
+            resultados[i] = e
+
+    threads = [threading.Thread(target=executar, args=(i,)) for i in range(quantidade)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return resultados
+
+
+def test_chamadas_simultaneas_iguais_geram_uma_requisicao():
+    with MockFipeServer(marcas=3, latencia=0.3) as lento:
+        client = FipeClient(base_url=lento.url, memory_cache=False)
+        respostas = _em_threads(lambda: client.get_brands(VehicleType.CARS))
+        assert lento.total == 1
+    assert all(r == respostas[0] for r in respostas)
+    assert client.metrics.snapshot()['templates']['brands']['requisicoes'] == 1
+
+
+def test_erro_da_requisicao_compartilhada_chega_a_todas_as_chamadas():
+    with MockFipeServer(marcas=3, latencia=0.3) as lento:
+        client = FipeClient(base_url=lento.url, memory_cache=False)
+        respostas = _em_threads(lambda: client.get_vehicle_details(VehicleType.CARS, '999999-9', '2020-1'))
+        assert lento.total == 1
+    assert all(isinstance(r, FipeAPIError) and r.status == 404 for r in respostas)
@@ -0,0 +1,34 @@
+import pytest
+
+from criar_tabela_carros import criar_tabela_todos_precos, iter_todos_precos
+from fipe_client import FipeClient, VehicleType
+from fipe_rate_limit import DailyQuota, QuotaExceededError, RateLimiter
+
+
+def _cliente_com_cota(servidor, tmp_path, limite):
+    quota = DailyQuota(limite, caminho=str(tmp_path / 'quota.sqlite'))
+    return FipeClient(base_url=servidor.url, rate_limiter=RateLimiter(por_segundo=1000, quota=quota))
+
+
+def test_cota_esgotada_nao_devolve_tabela_parcial(servidor, tmp_path):
+    client = _cliente_com_cota(servidor, tmp_path, 10)
+    with pytest.raises(QuotaExceededError):
+        criar_tabela_todos_precos(client, reference=330)
+
+
+def test_cota_esgotada_com_journal_retoma_na_proxima_execucao(servidor, tmp_path):
+    journal = str(tmp_path / 'busca.journal.jsonl')
+    with pytest.raises(QuotaExceededError):
+        criar_tabela_todos_precos(_cliente_com_cota(servidor, tmp_path, 10), reference=330, journal=journal)
+
+    df = criar_tabela_todos_precos(FipeClient(base_url=servidor.url), reference=330, journal=journal)
+    assert len(df) == 18
+
+
+def test_mensagens_citam_o_tipo_de_veiculo(servidor, capsys):
+    list(iter_todos_precos(
+        FipeClient(base_url=servidor.url), limite_marcas=1, reference=330, vehicle_type=VehicleType.MOTORCYCLES
+    ))
+    saida = capsys.readouterr().out
+    assert 'preços de motos' in saida
+    assert 'carros' not in saida
@@ -0,0 +1,74 @@
+import csv
+import json
+
+import openpyxl
+
+from criar_tabela_carros import SCHEMA_PRECOS, LinhaPreco, aplicar_schema, exportar_tabela, sinks_para_formatos
+from fipe_cli import main
+from fipe_sinks import gravar_em_sinks, registros_para_dataframe
+
+
+def _linhas(n):
+    return [
+        LinhaPreco('Marca', f'Modelo {i}', 2020, '2020 Gasolina', 'Gasolina', f'R$ {i},00', f'{i:06d}-1',
+                   'outubro de 2026', 'cars')
+        for i in range(n)
+    ]
+
+
+def test_todos_os_formatos_em_uma_passada(tmp_path):
+    consumidas = []
+
+    def gerar():
+        for linha in _linhas(25):
+            consumidas.append(linha)
+            yield linha
+
+    sinks = sinks_para_formatos(['csv', 'excel', 'html'], str(tmp_path / 'precos.csv'), LinhaPreco.COLUNAS,
+                                linhas_por_pagina=10)
+    assert gravar_em_sinks(gerar(), *sinks) == 25
+    assert len(consumidas) == 25
+
+    with open(tmp_path / 'precos.csv', encoding='utf-8') as f:
+        assert len(list(csv.reader(f))) == 26
+    planilha = openpyxl.load_workbook(tmp_path / 'precos.xlsx', read_only=True)
+    assert sum(1 for aba in planilha.worksheets for _ in aba.iter_rows()) == 26
+    planilha.close()
+    assert len(sinks[2].paginas) == 3
+    with open(sinks[2].paginas[-1], encoding='utf-8') as f:
+        assert 'Modelo 24' in f.read()
+
+
+def _precos_csv(caminho):
+    with open(caminho, encoding='utf-8-sig') as f:
+        return [linha['Preço'] for linha in csv.DictReader(f)]
+
+
+def test_exportar_tabela_grava_precos_como_a_api(tmp_path):
+    df = aplicar_schema(registros_para_dataframe(_linhas(3), LinhaPreco.COLUNAS), SCHEMA_PRECOS)
+    assert str(df['Preço'].dtype) == 'Int64'
+    df.loc[2, 'Preço'] = None
+    arquivo = str(tmp_path / 'precos.csv')
+
+    for formato in ('csv', 'json', 'excel'):
+        exportar_tabela(df, formato=formato, arquivo=arquivo)
+    assert _precos_csv(arquivo) == ['R$ 0,00', 'R$ 1,00', '']
+    with open(tmp_path / 'precos.json', encoding='utf-8') as f:
+        assert [linha['Preço'] for linha in json.load(f)] == ['R$ 0,00', 'R$ 1,00', '']
+    planilha = openpyxl.load_workbook(tmp_path / 'precos.xlsx', read_only=True)
+    assert [linha[5] for linha in planilha.active.iter_rows(min_row=2, values_only=True)][:2] == ['R$ 0,00', 'R$ 1,00']
+    planilha.close()
+    assert str(df['Preço'].dtype) == 'Int64'  # o DataFrame original continua em centavos
+
+
+def test_export_da_cli_grava_precos_como_o_crawl(tmp_path):
+    parte = tmp_path / 'parte.jsonl'
+    with open(parte, 'w', encoding='utf-8') as f:
+        for linha in _linhas(3):
+            f.write(json.dumps(linha.como_dict(), ensure_ascii=False) + '\n')
+    saida = str(tmp_path / 'saida.csv')
+
+    assert main(['export', str(parte), '--formato', 'csv', 'json', '--saida', saida]) == 0
+    assert _precos_csv(saida) == ['R$ 0,00', 'R$ 1,00', 'R$ 2,00']
+    with open(tmp_path / 'saida.json', encoding='utf-8') as f:
+        assert [linha['Preço'] for linha in json.load(f)] == ['R$ 0,00', 'R$ 1,00', 'R$ 2,00']
@@ -0,0 +1,72 @@
+import numpy as np
+
+from fipe_client import VehicleType
+from fipe_historico import SEM_PRECO, HistoricoPrecos
+
+
+def _resposta(codigo, modelo, precos):
+    return {
+        'codeFipe': codigo, 'brand': 'Marca', 'model': modelo,
+        'priceHistory': [
+            {'reference': ref, 'month': f'mes {ref}', 'price': preco} for ref, preco in precos.items()
+        ],
+    }
+
+
+def _historico():
+    return HistoricoPrecos.de_respostas([
+        (VehicleType.CARS, '2020-1', _resposta('001-1', 'A', {1: 'R$ 100.000,00', 13: 'R$ 81.000,00'})),
+        (VehicleType.CARS, '2020-1', _resposta('002-1', 'A', {1: 'R$ 50.000,01', 2: 'R$ 49.000,00'})),
+        (VehicleType.CARS, '2020-1', _resposta('003-1', 'B', {2: 'R$ 10.000,00', 13: 'inválido'})),
+    ])
+
+
+def test_precos_em_centavos_inteiros():
+    historico = _historico()
+    assert historico.precos.dtype == np.int64
+    assert list(historico.referencias) == [1, 2, 13]
+    assert historico.precos[1, 0] == 5_000_001
+    assert historico.precos[2, 0] == SEM_PRECO and historico.precos[2, 2] == SEM_PRECO
+
+
+def test_depreciacao_ignora_meses_sem_preco():
+    taxa = _historico().taxa_depreciacao(anualizada=False)
+    assert np.isclose(taxa[0], 1 - 0.81 ** (1 / 12))  # referências 1 e 13: doze meses
+    assert np.isnan(taxa[2])
+
+
+def test_variacao_mensal_usa_o_intervalo_entre_referencias():
+    variacao = _historico().variacao_mensal()
+    assert variacao.shape == (3, 2)
+    assert np.isclose(variacao[1, 0], 4_900_000 / 5_000_001 - 1)  # referências 1 e 2
+    assert np.isnan(variacao[0, 0]) and np.isnan(variacao[0, 1])
+    # Sem preço no mês 2, a variação de 1 a 13 de '001-1' não aparece em nenhuma coluna
+    assert np.isnan(variacao[2, 1])
+
+    colunas = {c: ['x'] for c in ('tipo', 'codigo_fipe', 'ano', 'marca', 'modelo')}
+    anual = HistoricoPrecos([1, 13], ['jan', 'jan'], [[10_000_000, 8_100_000]], colunas)
+    assert np.isclose(anual.variacao_mensal()[0, 0], 0.81 ** (1 / 12) - 1)
+
+
+def test_faixas_percentis_coincidem_com_nanpercentile():
+    historico = _historico()
+    chaves, faixas = historico.faixas_percentis('modelo', (0, 50, 100))
+    assert chaves == [('cars', 'Marca', 'A'), ('cars', 'Marca', 'B')]
+    mascarados = np.where(historico.precos == SEM_PRECO, np.nan, historico.precos)
+    for mes in range(len(historico.referencias)):
+        coluna = mascarados[:2, mes]
+        if np.isnan(coluna).all():
+            assert np.isnan(faixas[0, :, mes]).all()
+        else:
+            assert np.allclose(faixas[0, :, mes], np.nanpercentile(coluna, (0, 50, 100)))
+    assert faixas[1, 1, 1] == 1_000_000
+
+
+def test_salvar_e_carregar_preservam_os_centavos(tmp_path):
+    historico = _historico()
+    caminho = str(tmp_path / 'historico.npz')
+    historico.salvar(caminho)
+    carregado = HistoricoPrecos.carregar(caminho)
+    assert np.array_equal(carregado.precos, historico.precos)
+    df = carregado.para_dataframe()
+    assert str(df['1'].dtype) == 'Int64' and df['1'].isna().tolist() == [False, False, True]
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from criar_tabela_carros import EstadoBusca, iter_todos_precos
+from fipe_client import FipeClient
+from fipe_journal import CrawlJournal
+from fipe_mock_server import MockFipeServer
+
+REFERENCIA = 330
+
+
+def _chaves(linhas):
+    return sorted((l.codigo_fipe, l.ano_descricao) for l in linhas)
+
+
+def test_busca_com_falhas_e_completada_ao_retomar(tmp_path):
+    catalogo = dict(marcas=3, modelos_por_marca=3, anos_por_modelo=2, semente=7)
+    with MockFipeServer(**catalogo) as estavel:
+        esperado = _chaves(iter_todos_precos(FipeClient(base_url=estavel.url), reference=REFERENCIA))
+    assert len(esperado) == 18
+
+    journal = str(tmp_path / 'busca.journal.jsonl')
+    with MockFipeServer(taxa_erro=0.15, **catalogo) as instavel:
+        for _ in range(20):
+            # Cliente novo a cada execução: sem cache em memória entre as retomadas
+            client = FipeClient(base_url=instavel.url, max_retries=0)
+            linhas = list(iter_todos_precos(client, reference=REFERENCIA, journal=journal))
+            if len(linhas) == len(esperado):
+                break
+
+    assert _chaves(linhas) == esperado
+
+
+def test_journal_nao_guarda_linhas_e_as_rele_do_arquivo(tmp_path):
+    caminho = str(tmp_path / 'j.jsonl')
+    with CrawlJournal(caminho, REFERENCIA) as journal:
+        journal.registrar_unidade('1/1/2020-1', {'Marca': 'A'})
+        journal.registrar_unidade('1/1/2021-1', None)
+        assert not hasattr(journal, 'linhas')
+
+    with CrawlJournal(caminho, REFERENCIA) as journal:
+        assert journal.total_linhas == 1
+        assert journal.concluido('unidade', '1/1/2021-1')
+        assert list(journal.iter_linhas()) == [{'Marca': 'A'}]
+
+
+def test_ultima_linha_incompleta_e_terminada_antes_de_gravar(tmp_path):
+    caminho = tmp_path / 'j.jsonl'
+    with CrawlJournal(str(caminho), REFERENCIA) as journal:
+        journal.registrar_unidade('1/1/2020-1', {'Marca': 'A'})
+    with open(caminho, 'a', encoding='utf-8') as f:
+        f.write('{"tipo": "unidade", "chave": "1/1/20')  # interrupção durante a gravação
+
+    with CrawlJournal(str(caminho), REFERENCIA) as journal:
+        journal.registrar_unidade('1/2/2020-1', {'Marca': 'B'})
+
+    with CrawlJournal(str(caminho), REFERENCIA) as journal:
+        assert journal.concluido('unidade', '1/2/2020-1')
+        assert [l['Marca'] for l in journal.iter_linhas()] == ['A', 'B']
+    ultima = caminho.read_text(encoding='utf-8').splitlines()[-1]
+    assert json.loads(ultima)['chave'] == '1/2/2020-1'
+
+
+def test_journal_de_outro_tipo_nao_e_retomado(tmp_path):
+    caminho = str(tmp_path / 'j.jsonl')
+    CrawlJournal(caminho, REFERENCIA, 'cars').close()
+    with pytest.raises(ValueError):
+        CrawlJournal(caminho, REFERENCIA, 'motorcycles')
+
+
+def test_busca_com_limite_e_completada_ao_retomar_sem_limite(servidor, tmp_path):
+    journal = str(tmp_path / 'busca.journal.jsonl')
+    parcial = list(iter_todos_precos(
+        FipeClient(base_url=servidor.url), reference=REFERENCIA, journal=journal,
+        limite_modelos_por_marca=2, limite_anos_por_modelo=1
+    ))
+    assert len(parcial) == 6
+
+    linhas = list(iter_todos_precos(FipeClient(base_url=servidor.url), reference=REFERENCIA, journal=journal))
+    assert len(linhas) == 18
+    assert len(set(_chaves(linhas))) == 18
+
+
+def test_ctrl_c_e_repassado_apos_gravar_o_journal(servidor, tmp_path):
+    journal = str(tmp_path / 'busca.journal.jsonl')
+    estado = EstadoBusca()
+    busca = iter_todos_precos(FipeClient(base_url=servidor.url), reference=REFERENCIA,
+                              journal=journal, estado=estado)
+    next(busca)
+    with pytest.raises(KeyboardInterrupt):
+        busca.throw(KeyboardInterrupt)
+
+    assert not estado.completa
+    assert estado.motivo == 'interrompida'
+    with CrawlJournal(journal, REFERENCIA, 'cars') as registro:
+        assert registro.total_linhas == 1
@@ -0,0 +1,26 @@
+from fipe_client import FipeAPIError, FipeClient, VehicleType
+
+
+def _pares(client):
+    brand = client.get_brands(VehicleType.CARS, reference=330)[0]
+    model = client.get_models(VehicleType.CARS, brand['code'], reference=330)[0]
+    years = client.get_years_by_model(VehicleType.CARS, brand['code'], model['code'], reference=330)
+    fipe = client.get_vehicle_details_by_model(VehicleType.CARS, brand['code'], model['code'], years[0]['code'], 330)
+    return [(fipe['codeFipe'], year['code']) for year in years]
+
+
+def test_lote_preserva_a_ordem_e_isola_falhas(servidor):
+    client = FipeClient(base_url=servidor.url)
+    a, b = _pares(client)
+    pares = [b, ('999999-9', '2020-1'), a, b]
+    total_antes = servidor.total
+
+    resultados = client.get_vehicle_details_many(pares, reference=330, max_workers=4)
+
+    assert [(r.fipe_code, r.year_id) for r in resultados] == pares
+    assert [r.ok for r in resultados] == [True, False, True, True]
+    assert isinstance(resultados[1].error, FipeAPIError) and resultados[1].error.status == 404
+    assert resultados[0].details['codeFipe'] == a[0]
+    assert resultados[3].details == resultados[0].details
+    # O par repetido gera uma única consulta
+    assert servidor.total - total_antes == 3
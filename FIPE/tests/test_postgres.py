@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from criar_tabela_carros import LinhaPreco
+from fipe_postgres import _linha_staging
+
+PASTA_FIPE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LINHA = {
+    'Marca': 'VW - VolksWagen', 'Modelo': 'AMAROK', 'Ano': 2014, 'Ano Descrição': '2014 Diesel',
+    'Combustível': 'Diesel', 'Preço': 'R$ 100.000,50', 'Código FIPE': '005340-6',
+    'Referência': 'outubro de 2026',
+}
+
+
+def test_linha_staging_converte_preco_e_usa_carros_como_tipo_padrao():
+    assert _linha_staging(LINHA) == (
+        'cars', 'VW - VolksWagen', 'AMAROK', '005340-6', 2014, 'Diesel', '2014 Diesel', 'outubro de 2026',
+        10_000_050,
+    )
+    linha = LinhaPreco(**dict(zip(LinhaPreco._fields, [
+        'HONDA', 'CG 160', '2020', '2020 Gasolina', 'Gasolina', 'R$ 15.000,00', '811120-3', 'out', 'motorcycles'
+    ])))
+    assert _linha_staging(linha)[0] == 'motorcycles'
+    assert _linha_staging(linha)[4] == 2020
+
+
+@pytest.mark.parametrize('alteracao', [
+    {'Preço': 'N/A'},
+    {'Preço': None},
+    {'Ano': 'zero km'},
+    {'Ano': None},
+    {'Código FIPE': ''},
+    {'Marca': None},
+])
+def test_linha_staging_rejeita_linhas_incompletas(alteracao):
+    assert _linha_staging({**LINHA, **alteracao}) is None
+
+
+def test_importar_o_modulo_nao_carrega_o_driver():
+    codigo = "import sys, fipe_postgres; print('psycopg' in sys.modules)"
+    resultado = subprocess.run([sys.executable, '-c', codigo], cwd=PASTA_FIPE,
+                               capture_output=True, text=True, check=True)
+    assert resultado.stdout.strip() == 'False'
+
+
+@pytest.mark.skipif(not os.environ.get('FIPE_DATABASE_URL'), reason="sem FIPE_DATABASE_URL")
+def test_copy_e_upserts_no_postgres():
+    import psycopg
+
+    from fipe_postgres import carregar_precos
+
+    codigo = '999999-0'
+    linhas = [
+        {**LINHA, 'Código FIPE': codigo, 'Referência': 'teste'},
+        {**LINHA, 'Código FIPE': codigo, 'Referência': 'teste', 'Preço': 'inválido'},
+    ]
+    with psycopg.connect(os.environ['FIPE_DATABASE_URL']) as conn:
+        assert carregar_precos(linhas, conn=conn) == 1
+        # Recarregar atualiza o preço sem duplicar
+        assert carregar_precos([{**linhas[0], 'Preço': 'R$ 1,00'}], conn=conn) == 1
+        precos = conn.execute(
+            "SELECT p.preco_centavos FROM fipe_precos p"
+            " JOIN fipe_modelo_anos ma ON ma.id = p.modelo_ano_id"
+            " JOIN fipe_modelos mo ON mo.id = ma.modelo_id"
+            " WHERE mo.codigo_fipe = %s AND p.referencia = 'teste'",
+            (codigo,)
+        ).fetchall()
+        assert precos == [(100,)]
+        modelos = "SELECT id FROM fipe_modelos WHERE codigo_fipe = %s"
+        anos = f"SELECT id FROM fipe_modelo_anos WHERE modelo_id IN ({modelos})"
+        conn.execute(f"DELETE FROM fipe_precos WHERE modelo_ano_id IN ({anos})", (codigo,))
+        conn.execute(f"DELETE FROM fipe_modelo_anos WHERE id IN ({anos})", (codigo,))
+        conn.execute("DELETE FROM fipe_modelos WHERE codigo_fipe = %s", (codigo,))
+        conn.commit()
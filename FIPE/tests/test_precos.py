@@ -0,0 +1,30 @@
+import math
+
+import pandas as pd
+
+from criar_tabela_carros import formatar_preco, preco_em_centavos
+from fipe_records import centavos, formatar_reais
+
+
+def test_centavos_interpreta_o_formato_da_api():
+    assert centavos('R$ 10.000,00') == 1_000_000
+    assert centavos(' R$ 1.234.567,89 ') == 123_456_789
+    assert centavos('R$ 0,05') == 5
+    assert centavos(1500) == 1500
+    for invalido in (None, '', 'N/A', '10.000,00', 'R$ 10,0', True):
+        assert centavos(invalido) is None
+
+
+def test_formatar_reais_e_inverso_de_centavos():
+    for valor in (0, 5, 99, 100, 123_456_789):
+        assert centavos(formatar_reais(valor)) == valor
+    assert formatar_reais(1_234_550) == 'R$ 12.345,50'
+    assert formatar_reais(None) == formatar_reais(math.nan) == formatar_reais(pd.NA) == ''
+    assert formatar_preco is formatar_reais
+
+
+def test_versao_vetorizada_coincide_com_centavos():
+    precos = pd.Series(['R$ 10.000,00', 'R$ 0,05', None, 'N/A', ' R$ 1.234,56'])
+    resultado = preco_em_centavos(precos)
+    assert str(resultado.dtype) == 'Int64'
+    assert [None if pd.isna(v) else int(v) for v in resultado] == [centavos(p) for p in precos]
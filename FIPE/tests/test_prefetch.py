@@ -0,0 +1,91 @@
+import threading
+import time
+
+from fipe_cache import cache_key, endpoint_template
+from fipe_client import FipeClient, VehicleType
+from fipe_prefetch import Prefetcher
+from fipe_rate_limit import DailyQuota, RateLimiter
+
+
+def test_modelos_das_marcas_sao_pre_buscados(servidor):
+    # limite_modelos=0: get_models não agenda os anos, que mudariam servidor.total
+    prefetch = Prefetcher(limite_marcas=2, limite_modelos=0, max_requisicoes=10)
+    client = FipeClient(base_url=servidor.url, prefetch=prefetch)
+    brands = client.get_brands(VehicleType.CARS, reference=330)
+    assert prefetch.aguardar(5)
+    assert prefetch.stats()['enviadas'] == 2
+    total = servidor.total
+
+    for brand in brands[:2]:
+        client.get_models(VehicleType.CARS, brand['code'], reference=330)
+    assert prefetch.aguardar(5)
+    assert servidor.total == total
+    client.close()
+
+
+def test_reserva_e_devolvida_se_a_chave_chega_ao_cache_durante_a_espera(servidor):
+    limiter = RateLimiter(por_segundo=0.1)
+    assert limiter.bucket.tentar_reservar()  # sem fichas ociosas
+    prefetch = Prefetcher(max_requisicoes=5, espera_ficha=3)
+    client = FipeClient(base_url=servidor.url, rate_limiter=limiter, prefetch=prefetch)
+    endpoint, params = 'cars/brands/1/models', {'reference': 330}
+
+    tarefa = threading.Thread(target=client._aquecer, args=(endpoint, params))
+    tarefa.start()
+    time.sleep(0.2)
+    # A consulta do usuário guardou a resposta enquanto a pré-busca esperava a ficha
+    client.memory_cache.set(cache_key(endpoint, params, servidor.url), endpoint_template(endpoint), [], 330)
+    tarefa.join(3)
+
+    assert prefetch.stats()['em_cache'] == 1
+    assert prefetch.restantes(client) == 5
+    assert servidor.total == 0
+    client.close()
+
+
+class _LimitadorComCorrida(RateLimiter):
+    """Libera a ficha no mesmo instante em que a consulta do usuário guarda a resposta"""
+
+    def __init__(self, ao_liberar, **kwargs):
+        super().__init__(**kwargs)
+        self.ao_liberar = ao_liberar
+
+    def tentar_acquire(self):
+        ficha = super().tentar_acquire()
+        self.ao_liberar()
+        return ficha
+
+
+def test_ficha_e_devolvida_se_a_chave_chega_ao_cache_depois_de_obtida(servidor, tmp_path):
+    endpoint, params = 'cars/brands/1/models', {'reference': 330}
+    chave = cache_key(endpoint, params, servidor.url)
+    quota = DailyQuota(100, caminho=str(tmp_path / 'q.sqlite'))
+    prefetch = Prefetcher(max_requisicoes=5)
+    client = FipeClient(base_url=servidor.url, prefetch=prefetch)
+    client.rate_limiter = _LimitadorComCorrida(
+        lambda: client.memory_cache.set(chave, endpoint_template(endpoint), [], 330),
+        por_segundo=1, quota=quota
+    )
+
+    client._aquecer(endpoint, params)
+
+    assert prefetch.stats() == {'em_cache': 1, 'pendentes': 0}
+    assert prefetch.restantes(client) == 5
+    assert quota.restantes() == 100
+    assert client.rate_limiter.bucket.tentar_reservar()
+    assert servidor.total == 0
+    client.close()
+
+
+def test_devolver_remove_a_propria_reserva():
+    client = FipeClient()
+    prefetch = Prefetcher(max_requisicoes=2, janela=0.2)
+    antiga = prefetch.reservar(client)
+    time.sleep(0.15)
+    assert prefetch.reservar(client) is not None
+    assert prefetch.reservar(client) is None
+
+    prefetch.devolver(antiga)
+    time.sleep(0.1)
+    # A reserva recente continua na janela; a antiga já teria saído dela
+    assert prefetch.restantes(client) == 1
@@ -0,0 +1,164 @@
+import time
+
+import pytest
+
+from fipe_client import FipeAPIError, FipeClient, VehicleType
+from fipe_mock_server import MockFipeServer
+from fipe_rate_limit import (
+    AdaptiveConcurrencyLimiter, DailyQuota, QuotaExceededError, RateLimiter, TokenBucket, espera_nova_tentativa,
+    interpretar_retry_after
+)
+
+
+def test_token_bucket_permite_rajada_e_depois_impoe_a_taxa():
+    bucket = TokenBucket(10, capacidade=3)
+    assert [bucket.reservar() for _ in range(3)] == [0.0, 0.0, 0.0]
+    espera = bucket.reservar()
+    assert 0.05 < espera <= 0.1
+
+
+def test_daily_quota_limita_e_e_compartilhada_entre_instancias(tmp_path):
+    caminho = str(tmp_path / 'quota.sqlite')
+    primeira = DailyQuota(3, caminho=caminho, conta='a')
+    segunda = DailyQuota(3, caminho=caminho, conta='a')
+    outra_conta = DailyQuota(3, caminho=caminho, conta='b')
+
+    assert primeira.consumir()[0] and segunda.consumir()[0] and primeira.consumir()[0]
+    liberada, liberacao_em = segunda.consumir()
+    assert not liberada
+    assert liberacao_em > time.time()
+    assert primeira.restantes() == 0
+    assert outra_conta.restantes() == 3
+
+
+def test_daily_quota_libera_apos_a_janela(tmp_path):
+    quota = DailyQuota(1, caminho=str(tmp_path / 'quota.sqlite'), janela=0.2)
+    assert quota.consumir()[0]
+    assert not quota.consumir()[0]
+    time.sleep(0.25)
+    assert quota.consumir()[0]
+
+
+def test_rate_limiter_sem_esperar_janela_levanta_quota_exceeded(tmp_path):
+    limiter = RateLimiter(por_segundo=100, quota=DailyQuota(1, caminho=str(tmp_path / 'q.sqlite')))
+    limiter.acquire()
+    with pytest.raises(QuotaExceededError):
+        limiter.acquire()
+
+
+class _QuotaRecemLiberada:
+    """Cota cuja liberação acabou de passar: a primeira consulta ainda recusa"""
+
+    def __init__(self):
+        self.respostas = [(False, time.time() - 1), (True, 0.0)]
+        self.consumidas = 0
+
+    def consumir(self):
+        liberada, liberacao_em = self.respostas.pop(0)
+        self.consumidas += liberada
+        return liberada, liberacao_em
+
+
+def test_acquire_so_libera_apos_registrar_na_cota():
+    quota = _QuotaRecemLiberada()
+    limiter = RateLimiter(por_segundo=100, quota=quota, esperar_janela=True)
+    limiter.acquire()
+    assert quota.consumidas == 1
+    assert quota.respostas == []
+
+
+def test_retry_after_em_segundos_e_data_http():
+    assert interpretar_retry_after('3') == 3.0
+    assert interpretar_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert interpretar_retry_after('x') is None
+
+
+def test_espera_nova_tentativa_respeita_retry_after_e_maximo():
+    assert 2.0 <= espera_nova_tentativa(0, 2.0, 0.5, 60.0) <= 2.5
+    assert espera_nova_tentativa(0, 120.0, 0.5, 60.0) is None
+    assert 0 <= espera_nova_tentativa(3, None, 0.5, 60.0) <= 4.0
+
+
+def test_tentar_acquire_nao_gasta_ficha_com_cota_esgotada(tmp_path):
+    caminho = str(tmp_path / 'q.sqlite')
+    limiter = RateLimiter(por_segundo=1, quota=DailyQuota(1, caminho=caminho))
+    assert DailyQuota(1, caminho=caminho).consumir()[0]  # outro processo esgota a cota
+
+    assert not limiter.tentar_acquire()
+    assert limiter.bucket.tentar_reservar()
+
+
+class _QuotaDisputada:
+    """Cota que parece livre, mas recusa o registro (esgotada por outro processo)"""
+
+    def restantes(self):
+        return 1
+
+    def consumir(self):
+        return False, time.time() + 60
+
+
+def test_tentar_acquire_devolve_a_ficha_quando_a_cota_recusa():
+    limiter = RateLimiter(por_segundo=1, quota=_QuotaDisputada())
+    assert not limiter.tentar_acquire()
+    assert limiter.bucket.tentar_reservar()
+
+
+def test_ficha_devolvida_restaura_ritmo_e_cota(tmp_path):
+    quota = DailyQuota(5, caminho=str(tmp_path / 'q.sqlite'))
+    limiter = RateLimiter(por_segundo=1, quota=quota)
+    outro = DailyQuota(5, caminho=str(tmp_path / 'q.sqlite'))
+    ficha = limiter.tentar_acquire()
+    assert ficha is not None
+    assert outro.consumir()[0]
+    assert limiter.tentar_acquire() is None  # sem fichas ociosas
+
+    limiter.devolver(ficha)
+    assert quota.restantes() == 4
+    assert limiter.tentar_acquire() is not None
+
+
+def _resposta(limiter, latencia=0.05, sobrecarga=False):
+    limiter.acquire()
+    limiter.release(latencia, sobrecarga=sobrecarga)
+
+
+def test_aimd_reduz_o_limite_em_429_503_uma_vez_por_intervalo():
+    limiter = AdaptiveConcurrencyLimiter(inicial=16, minimo=2, maximo=32)
+    _resposta(limiter, latencia=0.1)
+    limite = limiter.limite
+
+    _resposta(limiter, sobrecarga=True)
+    assert limiter.limite == limite / 2 and limiter.reducoes == 1
+    # Respostas já em andamento no mesmo intervalo de latência não reduzem de novo
+    _resposta(limiter, sobrecarga=True)
+    assert limiter.reducoes == 1
+
+    time.sleep(0.15)
+    for _ in range(5):
+        _resposta(limiter, sobrecarga=True)
+        time.sleep(0.15)
+    assert limiter.limite == 2  # nunca abaixo do mínimo
+
+
+def test_aimd_recupera_aditivamente_ate_o_maximo():
+    limiter = AdaptiveConcurrencyLimiter(inicial=4, maximo=6)
+    for _ in range(4):
+        _resposta(limiter)
+    assert 4.9 < limiter.limite < 5.1  # cerca de +1 a cada `limite` respostas
+
+    for _ in range(100):
+        _resposta(limiter)
+    assert limiter.limite == 6
+    assert limiter.reducoes == 0
+
+
+def test_cliente_reduz_a_concorrencia_com_respostas_429():
+    limiter = AdaptiveConcurrencyLimiter(inicial=8)
+    with MockFipeServer(marcas=3, taxa_429=1.0, retry_after=0) as sobrecarregado:
+        client = FipeClient(base_url=sobrecarregado.url, concurrency_limiter=limiter, max_retries=1, backoff_base=0.01)
+        with pytest.raises(FipeAPIError) as erro:
+            client.get_brands(VehicleType.CARS)
+    assert erro.value.status == 429
+    assert limiter.reducoes >= 1 and limiter.limite <= 4
+    assert limiter.em_andamento == 0
@@ -0,0 +1,44 @@
+import copy
+import json
+import pickle
+
+from fipe_cache import SQLiteCache
+from fipe_client import FipeClient, VehicleType
+from fipe_records import Brand, VehicleDetails
+
+
+def test_registros_sao_dicts_serializaveis_e_alteraveis():
+    details = VehicleDetails({'price': 'R$ 10.000,00', 'modelYear': 2014, 'priceHistory': [
+        {'month': 'outubro de 2026', 'price': 'R$ 9.000,00', 'reference': 330},
+    ]})
+    assert isinstance(details, dict)
+    assert json.loads(json.dumps(details)) == details
+    assert pickle.loads(pickle.dumps(details)) == details
+    assert not hasattr(details, '__dict__')
+
+    details['price'] = 'R$ 12.000,00'
+    assert details.price_cents == 1_200_000
+    assert details.price_history[0].price_cents == 900_000
+    assert copy.deepcopy(details).model_year == 2014
+    assert type(details.to_dict()) is dict
+
+
+def test_respostas_do_cliente_sao_registros(servidor):
+    brands = FipeClient(base_url=servidor.url).get_brands(VehicleType.CARS, reference=330)
+    assert all(isinstance(brand, Brand) for brand in brands)
+    assert json.loads(json.dumps(brands))[0]['code'] == brands[0].code
+
+
+def test_registros_sao_criados_uma_vez_e_reaproveitados_do_cache(servidor, tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.sqlite'))
+    client = FipeClient(base_url=servidor.url, cache=cache)
+    brands = client.get_brands(VehicleType.CARS, reference=330)
+    assert client.get_brands(VehicleType.CARS, reference=330) is brands
+
+    # Do cache persistente: convertidos ao entrar no cache em memória
+    outro = FipeClient(base_url=servidor.url, cache=cache)
+    models = outro.get_models(VehicleType.CARS, brands[0].code, reference=330)
+    assert servidor.total == 2
+    assert isinstance(outro.get_brands(VehicleType.CARS, reference=330)[0], Brand)
+    assert outro.get_models(VehicleType.CARS, brands[0].code, reference=330) is models
+    cache.close()
@@ -0,0 +1,64 @@
+from fipe_cache import SQLiteCache
+from fipe_client import FipeAPIError, FipeClient
+from fipe_mock_server import MockFipeServer
+from fipe_refresh import atualizar_incremental, carregar_pendentes, carregar_snapshot, salvar_snapshot
+
+CATALOGO = dict(marcas=3, modelos_por_marca=3, anos_por_modelo=2, semente=7)
+
+
+def test_falhas_ficam_pendentes_e_sao_repetidas_sem_virar_removidos(tmp_path):
+    snapshot = str(tmp_path / 'snapshot.jsonl')
+    # Cache persistente, como no uso real: listas já obtidas não são repetidas
+    cache = SQLiteCache(str(tmp_path / 'cache.sqlite'))
+    deltas = []
+    with MockFipeServer(taxa_erro=0.2, **CATALOGO) as instavel:
+        for _ in range(30):
+            client = FipeClient(base_url=instavel.url, max_retries=0, cache=cache)
+            try:
+                delta = atualizar_incremental(client, snapshot)
+            except FipeAPIError:
+                continue  # referências ou marcas indisponíveis: nada foi gravado
+            if delta is None:
+                break
+            deltas.append(delta)
+    cache.close()
+
+    assert delta is None
+    assert any(d['nao_verificados'] for d in deltas)
+    assert all(not d['removidos'] for d in deltas)
+    _, linhas = carregar_snapshot(snapshot)
+    assert len(linhas) == 18
+    assert carregar_pendentes(snapshot) == []
+
+
+def test_limite_de_marcas_nao_remove_as_demais(tmp_path):
+    snapshot = str(tmp_path / 'snapshot.jsonl')
+    with MockFipeServer(**CATALOGO) as servidor:
+        atualizar_incremental(FipeClient(base_url=servidor.url), snapshot)
+        reference, linhas = carregar_snapshot(snapshot)
+        # Snapshot completo do mês anterior, atualizado só na primeira marca
+        salvar_snapshot(snapshot, reference - 1, linhas)
+        delta = atualizar_incremental(FipeClient(base_url=servidor.url), snapshot, limite_marcas=1)
+
+    assert delta['reference'] == reference
+    assert delta['removidos'] == []
+    assert len(delta['nao_verificados']) == 12
+    assert carregar_snapshot(snapshot)[1].keys() == linhas.keys()
+
+
+def test_precos_das_chaves_mantidas_so_sao_consultados_quando_pedido(tmp_path):
+    snapshot = str(tmp_path / 'snapshot.jsonl')
+    with MockFipeServer(**CATALOGO) as servidor:
+        atualizar_incremental(FipeClient(base_url=servidor.url), snapshot)
+        reference, linhas = carregar_snapshot(snapshot)
+        requisicoes = []
+        for verificar_precos in (False, True):
+            salvar_snapshot(snapshot, reference - 1, linhas)
+            client = FipeClient(base_url=servidor.url)
+            delta = atualizar_incremental(client, snapshot, verificar_precos=verificar_precos)
+            assert delta['precos_verificados'] is verificar_precos
+            detalhes = client.metrics.snapshot()['templates'].get('details', {})
+            requisicoes.append(detalhes.get('requisicoes', 0))
+
+    # Sem chaves novas: o padrão não consulta detalhes; a verificação, um por chave
+    assert requisicoes == [0, 18]
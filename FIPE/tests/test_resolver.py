@@ -0,0 +1,31 @@
+from criar_tabela_carros import iter_todos_precos
+from fipe_client import FipeClient, VehicleType
+from fipe_resolver import FipeCodeResolver
+
+
+def test_busca_faz_uma_requisicao_por_preco(servidor):
+    linhas = list(iter_todos_precos(FipeClient(base_url=servidor.url), reference=330))
+    # 1 lista de marcas + 3 de modelos + 9 de anos + 18 preços
+    assert len(linhas) == 18
+    assert servidor.total == 31
+
+
+def test_codigo_desatualizado_conta_as_duas_requisicoes(servidor):
+    client = FipeClient(base_url=servidor.url)
+    resolver = FipeCodeResolver(client)
+    brand = client.get_brands(VehicleType.CARS, reference=330)[0]
+    model = client.get_models(VehicleType.CARS, brand['code'], reference=330)[0]
+    year = client.get_years_by_model(VehicleType.CARS, brand['code'], model['code'], reference=330)[0]
+
+    resolver.registrar(VehicleType.CARS, brand['code'], model['code'], '999999-9')
+    details = resolver.get_vehicle_details(VehicleType.CARS, brand['code'], model['code'], year['code'], 330)
+
+    assert resolver.requisicoes == 2
+    assert resolver.lookup(VehicleType.CARS, brand['code'], model['code']) == details['codeFipe']
+    resolver.close()
+
+
+def test_limite_de_requisicoes_inclui_as_do_resolver(servidor):
+    client = FipeClient(base_url=servidor.url)
+    list(iter_todos_precos(client, max_requisicoes=10, reference=330))
+    assert servidor.total <= 10
@@ -0,0 +1,45 @@
+import json
+import os
+
+from fipe_client import VehicleType
+from fipe_shards import caminho_parte, executar_shard, mesclar_partes
+
+
+def test_parte_so_e_publicada_quando_a_busca_termina(servidor, tmp_path):
+    diretorio = str(tmp_path)
+    argumentos = dict(diretorio=diretorio, tipos=(VehicleType.CARS,), por_segundo=None, base_url=servidor.url)
+    destino = caminho_parte(diretorio, 0, 2)
+
+    assert executar_shard(0, 2, 330, max_requisicoes=5, **argumentos) is None
+    assert not os.path.exists(destino)
+    assert os.path.exists(f"{destino}.tmp")
+
+    assert executar_shard(0, 2, 330, **argumentos) == destino
+    assert not os.path.exists(f"{destino}.tmp")
+
+
+def _gravar(caminho, linhas):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for linha in linhas:
+            f.write(json.dumps(linha, ensure_ascii=False) + '\n')
+    return str(caminho)
+
+
+def _linha(marca, codigo, ano, preco):
+    return {
+        'Marca': marca, 'Modelo': f'Modelo {codigo}', 'Ano': ano, 'Ano Descrição': f'{ano} Gasolina',
+        'Combustível': 'Gasolina', 'Preço': preco, 'Código FIPE': codigo,
+        'Referência': 'outubro de 2026', 'Tipo': 'cars',
+    }
+
+
+def test_mesclagem_remove_duplicatas_e_independe_da_ordem(tmp_path):
+    a = _linha('B', '002-1', 2020, 'R$ 20.000,00')
+    b = _linha('A', '001-1', 2021, 'R$ 10.000,00')
+    c = _linha('A', '001-1', 2020, 'R$ 9.000,00')
+    primeira = _gravar(tmp_path / 'parte_000.jsonl', [a, b])
+    segunda = _gravar(tmp_path / 'parte_001.jsonl', [c, b])
+
+    df = mesclar_partes([primeira, segunda])
+    assert list(zip(df['Marca'], df['Ano'])) == [('A', 2020), ('A', 2021), ('B', 2020)]
+    assert mesclar_partes([segunda, primeira]).equals(df)
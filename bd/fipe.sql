@@ -0,0 +1,40 @@
+-- Tabelas da FIPE (carregadas por FIPE/fipe_postgres.py)
+
+-- Marcas por tipo de veículo (cars, motorcycles, trucks)
+CREATE TABLE IF NOT EXISTS fipe_marcas (
+    id SERIAL PRIMARY KEY,
+    tipo VARCHAR(16) NOT NULL,
+    nome VARCHAR(255) NOT NULL,
+    UNIQUE (tipo, nome)
+);
+
+-- Modelos, identificados pelo código FIPE
+CREATE TABLE IF NOT EXISTS fipe_modelos (
+    id SERIAL PRIMARY KEY,
+    marca_id INTEGER NOT NULL REFERENCES fipe_marcas (id),
+    codigo_fipe VARCHAR(16) NOT NULL,
+    nome VARCHAR(255) NOT NULL,
+    UNIQUE (marca_id, codigo_fipe)
+);
+
+CREATE INDEX IF NOT EXISTS idx_fipe_modelos_codigo_fipe ON fipe_modelos (codigo_fipe);
+
+-- Anos/combustíveis disponíveis de cada modelo
+CREATE TABLE IF NOT EXISTS fipe_modelo_anos (
+    id SERIAL PRIMARY KEY,
+    modelo_id INTEGER NOT NULL REFERENCES fipe_modelos (id),
+    ano SMALLINT NOT NULL,
+    combustivel VARCHAR(32) NOT NULL,
+    ano_descricao VARCHAR(64),
+    UNIQUE (modelo_id, ano, combustivel)
+);
+
+-- Preços por referência (mês), em centavos
+CREATE TABLE IF NOT EXISTS fipe_precos (
+    modelo_ano_id INTEGER NOT NULL REFERENCES fipe_modelo_anos (id),
+    referencia VARCHAR(32) NOT NULL,
+    preco_centavos BIGINT NOT NULL,
+    PRIMARY KEY (modelo_ano_id, referencia)
+);
+
+CREATE INDEX IF NOT EXISTS idx_fipe_precos_referencia ON fipe_precos (referencia);